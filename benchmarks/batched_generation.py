@@ -0,0 +1,41 @@
+"""Brute-force (stack) state graph generation against the batched NumPy BFS.
+
+Run from the repository root with:
+
+    python -m benchmarks.batched_generation
+"""
+import time
+
+from sacred_grove.puzzle_graph import TILE_GRAPH, make_grid_tile_graph
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    generator = StateGraphGenerator(graph=TILE_GRAPH)
+    brute_force_graph, brute_force_time = timed(generator.brute_force_state_graph_generation)
+    compact_graph, batched_time = timed(generator.batched_state_graph_generation)
+    print(f"Sacred Grove: brute force {len(brute_force_graph)} nodes / {brute_force_graph.number_of_edges()} edges in {brute_force_time:.3f}s, "
+          f"batched {len(compact_graph)} nodes / {compact_graph.number_of_edges} edges in {batched_time:.3f}s")
+
+    for side in (6, 10, 15, 20, 25):
+        grid = make_grid_tile_graph(side, side)
+        # Wolf Link in the middle of the board, shadow statue in the north-west and mirror statue in the north-east corner
+        start = (side * side // 2, 1, side)
+        generator = StateGraphGenerator(graph=grid, maximum_number_of_states=side ** 6)
+        compact_graph, batched_time = timed(lambda: generator.batched_state_graph_generation(*start))
+        line = (f"{side}x{side} grid ({side * side} tiles): batched {len(compact_graph):>9} nodes / "
+                f"{compact_graph.number_of_edges:>9} edges in {batched_time:7.3f}s")
+        if side <= 10:
+            brute_force_graph, brute_force_time = timed(lambda: generator.brute_force_state_graph_generation(*start))
+            line += f" | brute force {len(brute_force_graph)} nodes in {brute_force_time:7.3f}s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Batched generation and the distance table on boards far larger than the Sacred Grove.
+
+Run from the repository root with:
+
+    python -m benchmarks.boards
+"""
+import time
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.distance_table import DistanceTable
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+
+def main():
+    boards = [SACRED_GROVE] + [grid_board(side, side) for side in (8, 12, 16, 24, 32)] + [
+        grid_board(5, 5, ('shadow', 'mirror', 'clockwise')),
+        grid_board(6, 6, ('shadow', 'mirror', 'counterclockwise')),
+    ]
+    for board in boards:
+        generator = StateGraphGenerator.from_board(board)
+        start = time.perf_counter()
+        state_graph = generator.batched_state_graph_generation()
+        generation_time = time.perf_counter() - start
+        start = time.perf_counter()
+        distance_table = DistanceTable.from_state_graph(state_graph, board.goal_tiles)
+        table_time = time.perf_counter() - start
+        print(f"{board.name.ljust(14)} {board.number_of_tiles:>4} tiles, {len(board.statue_patterns)} statues: "
+              f"{len(state_graph):>9} states / {state_graph.number_of_edges:>9} edges generated in {generation_time:7.3f}s, "
+              f"distance table in {table_time:7.3f}s, optimal solution {distance_table.distance(board.start)} moves")
+
+
+if __name__ == "__main__":
+    main()
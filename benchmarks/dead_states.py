@@ -0,0 +1,97 @@
+"""How much the dead state index shrinks the state graph, and how much it helps random and informed search.
+
+Run from the repository root with:
+
+    python -m benchmarks.dead_states
+"""
+import contextlib
+import io
+import random
+import time
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.dead_states import LiveStateIndex, prune_dead_states
+from sacred_grove.moving_characters import Statue, WolfLink
+from sacred_grove.random_walks import absorbing_chain_analysis, simulate_random_walks
+from sacred_grove.search import Search
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+MAXIMUM_STEPS = 200
+
+
+def make_search(board, live_states=None) -> Search:
+    wolf_link_position, shadow_statue_position, mirror_statue_position = board.start
+    return Search(board.tile_graph(), WolfLink(position=wolf_link_position), Statue(position=mirror_statue_position, pattern='mirror'),
+                  Statue(position=shadow_statue_position, pattern='shadow'), maximum_steps=MAXIMUM_STEPS,
+                  goal_tiles=board.goal_tiles, live_states=live_states)
+
+
+def search_space(board):
+    generator = StateGraphGenerator.from_board(board)
+    for name, state_graph in (('reachable', generator.batched_state_graph_generation()),
+                              ('complete', generator.complete_state_graph_generation())):
+        start = time.perf_counter()
+        live_states = LiveStateIndex.from_state_graph(state_graph, board.goal_tiles)
+        elapsed = time.perf_counter() - start
+        pruned = prune_dead_states(state_graph, live_states)
+        print(f"    {name:>9} graph: {len(state_graph):>7} states / {state_graph.number_of_edges:>7} edges -> "
+              f"{len(pruned):>7} live states / {pruned.number_of_edges:>7} edges "
+              f"({1 - len(pruned) / len(state_graph):.1%} of the states pruned), index built in {elapsed * 1e3:.1f} ms, "
+              f"{live_states.live.nbytes} bytes")
+    return generator, live_states
+
+
+def random_search(board, live_states):
+    random.seed(0)
+    for label, index in (('without index', None), ('with index', live_states)):
+        number_of_walks, successes, steps = 300, 0, 0
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(number_of_walks):
+                search = make_search(board, index)
+                search.random_walk_search()
+                if search.has_reached_goal():
+                    successes += 1
+                    steps += len(search.wolf_link.history)
+        elapsed = time.perf_counter() - start
+        mean_steps = steps / successes if successes else float('nan')
+        print(f"    Search.random_walk_search {label:>13}: {successes / number_of_walks:6.1%} solved within {MAXIMUM_STEPS} moves "
+              f"(mean {mean_steps:5.1f} moves), {elapsed / number_of_walks * 1e3:6.2f} ms per walk")
+
+    for label, index in (('without index', None), ('with index', live_states)):
+        start = time.perf_counter()
+        result = simulate_random_walks(board.kernel(), board.start, board.goal_tiles, number_of_walks=100000,
+                                       maximum_steps=MAXIMUM_STEPS, seed=0, live_states=index)
+        elapsed = time.perf_counter() - start
+        print(f"    simulate_random_walks     {label:>13}: {result.success_rate:6.1%} solved within {MAXIMUM_STEPS} moves "
+              f"(mean {result.mean_hitting_time:5.1f} moves), {elapsed:.2f}s for 100k walks")
+
+
+def informed_search(board, live_states):
+    for method in ('astar_search', 'bidirectional_search'):
+        for label, index in (('without index', None), ('with index', live_states)):
+            search = make_search(board, index)
+            start = time.perf_counter()
+            result = getattr(search, method)()
+            elapsed = time.perf_counter() - start
+            print(f"    {method:>20} {label:>13}: {result.number_of_moves} moves, {result.nodes_expanded:>6} states expanded "
+                  f"in {elapsed * 1e3:7.1f} ms")
+
+
+def main():
+    for board in (SACRED_GROVE, grid_board(6, 6)):
+        print(f"{board.name}:")
+        generator, live_states = search_space(board)
+        start = time.perf_counter()
+        pruned = generator.batched_state_graph_generation(live_states=live_states)
+        print(f"    pruned on the fly: {len(pruned)} states / {pruned.number_of_edges} edges in {(time.perf_counter() - start) * 1e3:.1f} ms")
+        # A walk that refuses dead moves is a random walk on the pruned graph.
+        for label, state_graph in (('without index', generator.batched_state_graph_generation()), ('with index', pruned)):
+            probability, expected_steps, _ = absorbing_chain_analysis(state_graph, board.goal_tiles).for_state(board.start)
+            print(f"    exact random walk {label:>13}: solves with probability {probability:.4f}, expected moves {expected_steps:.1f}")
+        random_search(board, live_states)
+        informed_search(board, live_states)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Memory ceiling of IDA* with a bounded transposition table against A* and the BFS/Dijkstra
+approach (generate the whole state graph, then search it), on the same boards.
+
+Peak memory is measured with tracemalloc in a separate run from the timing.
+
+Run from the repository root with:
+
+    python -m benchmarks.ida_star
+"""
+import time
+import tracemalloc
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.distance_table import DistanceTable
+from sacred_grove.heuristics import TileDistanceHeuristic
+from sacred_grove.moving_characters import Statue, WolfLink
+from sacred_grove.search import Search
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+MEMORY_BUDGETS = (0, 1 << 12, 1 << 16, 1 << 20)
+
+
+def new_search(board, tile_graph) -> Search:
+    wolf_link_position, *statue_positions = board.start
+    statues = dict(zip(board.statue_patterns, statue_positions))
+    return Search(
+        graph=tile_graph,
+        wolf_link=WolfLink(position=wolf_link_position),
+        statue_mirror=Statue(position=statues['mirror'], pattern='mirror'),
+        statue_shadow=Statue(position=statues['shadow'], pattern='shadow'),
+        goal_tiles=board.goal_tiles)
+
+
+def measured(function) -> tuple[object, float, int]:
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bfs_solution_length(board) -> int:
+    state_graph = StateGraphGenerator.from_board(board).batched_state_graph_generation()
+    return DistanceTable.from_state_graph(state_graph, board.goal_tiles).distance(board.start)
+
+
+def dijkstra_solution_length(board, tile_graph) -> int:
+    import networkx as nx
+
+    state_graph = StateGraphGenerator(tile_graph, len(board.tiles) ** 3, board.statue_patterns, board.start).brute_force_state_graph_generation()
+    goal_tiles = set(board.goal_tiles)
+    goals = [state for state in state_graph if set(state[1:]) == goal_tiles]
+    return min(nx.multi_source_dijkstra_path_length(state_graph.reverse(copy=False), goals).get(board.start, float('inf')), float('inf'))
+
+
+def report(name: str, moves, elapsed: float, peak: int, extra: str = '') -> None:
+    print(f"    {name:<28} {moves} moves in {elapsed:7.3f}s, peak {peak / 2 ** 20:8.2f} MiB {extra}")
+
+
+def main():
+    boards = [SACRED_GROVE] + [grid_board(side, side) for side in (16, 32, 48)]
+    for board in boards:
+        tile_graph = board.tile_graph()
+        print(f"{board.name} ({board.number_of_tiles} tiles):")
+        # A* and IDA* both start by building the all-pairs tile distances, which grow with the square of the tiles.
+        _, elapsed, peak = measured(lambda: TileDistanceHeuristic(board.kernel(), board.goal_tiles))
+        print(f"    {'(TileDistanceHeuristic alone)':<28}          {elapsed:7.3f}s, peak {peak / 2 ** 20:8.2f} MiB")
+        if board.number_of_tiles <= 100:
+            moves, elapsed, peak = measured(lambda: dijkstra_solution_length(board, tile_graph))
+            report("Dijkstra (brute force graph)", moves, elapsed, peak)
+        if board.number_of_tiles <= 1024:
+            moves, elapsed, peak = measured(lambda: bfs_solution_length(board))
+            report("BFS (batched graph + table)", moves, elapsed, peak)
+        else:
+            print("    BFS (batched graph + table)  skipped, the visited bitset alone needs number_of_tiles ** 3 / 8 bytes")
+        result, elapsed, peak = measured(lambda: new_search(board, tile_graph).astar_search())
+        report("A*", result.number_of_moves, elapsed, peak, f"{result.nodes_expanded:>7} states expanded")
+        for memory_budget in MEMORY_BUDGETS:
+            result, elapsed, peak = measured(lambda: new_search(board, tile_graph).ida_star_search(memory_budget))
+            report(f"IDA*, table {memory_budget >> 10:>5} KiB", result.number_of_moves, elapsed, peak,
+                   f"{result.nodes_expanded:>7} states expanded, {result.details['iterations']} iterations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Incremental updates of a state graph and its distance table after a board change against
+regenerating both: a removed wall, a removed tile, an added tile and moved goals, on the Sacred
+Grove and on square grids.
+
+Run from the repository root with:
+
+    python -m benchmarks.incremental_update
+"""
+import time
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.distance_table import DistanceTable
+from sacred_grove.incremental_update import BoardDelta, update_state_graph
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+
+def best_time(function, repeats: int = 3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def grid_deltas(width: int, height: int):
+    middle = height // 2 * width + width // 2
+    yield 'wall removed', BoardDelta(removed_edges=((middle, middle + 1),))
+    yield 'tile removed', BoardDelta(removed_tiles=(middle,))
+    yield 'goals moved', BoardDelta(goal_tiles=frozenset({width + 1, width + 2}))
+
+
+def sacred_grove_deltas():
+    yield 'wall removed', BoardDelta(removed_edges=((12, 13),))
+    yield 'tile removed', BoardDelta(removed_tiles=(8,))
+    yield 'tile added', BoardDelta(added_tiles=(30,), added_edges=((6, 30, 'S'),))
+    yield 'goals moved', BoardDelta(goal_tiles=frozenset({1, 21}))
+
+
+def regenerate(board, complete: bool) -> DistanceTable:
+    generator = StateGraphGenerator.from_board(board)
+    state_graph = generator.complete_state_graph_generation() if complete else generator.batched_state_graph_generation()
+    return DistanceTable.from_state_graph(state_graph, board.goal_tiles)
+
+
+def main():
+    cases = [(SACRED_GROVE, sacred_grove_deltas()), (grid_board(8, 8), grid_deltas(8, 8)), (grid_board(10, 10), grid_deltas(10, 10))]
+    for board, deltas in cases:
+        deltas = list(deltas)
+        for complete in (False, True):
+            distance_table = regenerate(board, complete)
+            print(f"{board.name} ({'every placement' if complete else 'reachable from the start'}), {len(distance_table.state_graph)} states:")
+            for name, delta in deltas:
+                update, update_time = best_time(lambda: update_state_graph(distance_table, delta, complete=complete))
+                _, regeneration_time = best_time(lambda: regenerate(delta.apply(board), complete))
+                print(f"    {name.ljust(14)} {update.states_recomputed:>8} states recomputed {update.distances_changed:>8} distances changed "
+                      f"{update_time * 1e3:9.2f} ms, regenerated {regeneration_time * 1e3:9.2f} ms ({regeneration_time / update_time:5.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
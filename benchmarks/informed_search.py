@@ -0,0 +1,48 @@
+"""States expanded by A* and bidirectional search against the full brute-force state graph.
+
+Run from the repository root with:
+
+    python -m benchmarks.informed_search
+"""
+import time
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.moving_characters import Statue, WolfLink
+from sacred_grove.search import Search
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+
+def new_search(board, tile_graph) -> Search:
+    wolf_link_position, shadow_statue_position, mirror_statue_position = board.start
+    return Search(
+        graph=tile_graph,
+        wolf_link=WolfLink(position=wolf_link_position),
+        statue_mirror=Statue(position=mirror_statue_position, pattern='mirror'),
+        statue_shadow=Statue(position=shadow_statue_position, pattern='shadow'),
+        goal_tiles=board.goal_tiles)
+
+
+def main():
+    for board in [SACRED_GROVE] + [grid_board(side, side) for side in (12, 24, 32, 48)]:
+        tile_graph = board.tile_graph()
+        reachable_states = None
+        if board.number_of_tiles <= 1024:
+            start = time.perf_counter()
+            reachable_states = len(StateGraphGenerator.from_board(board).batched_state_graph_generation())
+            generation_time = time.perf_counter() - start
+            print(f"{board.name} ({board.number_of_tiles} tiles): {reachable_states} reachable states, generated in {generation_time:.3f}s")
+        else:
+            # The visited bitset alone would take number_of_tiles ** 3 / 8 bytes
+            print(f"{board.name} ({board.number_of_tiles} tiles): too large to generate the state graph")
+        for name in ('astar_search', 'bidirectional_search'):
+            search = new_search(board, tile_graph)
+            start = time.perf_counter()
+            result = getattr(search, name)()
+            elapsed = time.perf_counter() - start
+            share = f"({result.nodes_expanded / reachable_states:6.1%})" if reachable_states else ""
+            print(f"    {name.ljust(22)} {result.number_of_moves} moves, {result.nodes_expanded:>7} states expanded "
+                  f"{share}, peak frontier {result.peak_frontier_size:>6}, {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
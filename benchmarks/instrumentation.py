@@ -0,0 +1,65 @@
+"""Cost of instrumentation: generation and search with no instrumentation, with counters only, and
+with a JSON-lines sink, cProfile and tracemalloc.
+
+Run from the repository root with:
+
+    python -m benchmarks.instrumentation
+"""
+import io
+import time
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.instrumentation import Instrumentation, JsonLinesSink
+from sacred_grove.moving_characters import Statue, WolfLink
+from sacred_grove.search import Search
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+
+def best_time(function, repeats: int = 5) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def configurations():
+    yield 'off', lambda: None
+    yield 'counters', lambda: Instrumentation()
+    yield 'sink + cProfile + tracemalloc', lambda: Instrumentation(JsonLinesSink(io.StringIO()), profile=True, trace_memory=True)
+
+
+def measure(name: str, run) -> None:
+    baseline = None
+    for configuration, new_instrumentation in configurations():
+        def instrumented_run():
+            instrumentation = new_instrumentation()
+            if instrumentation is None:
+                return run(None)
+            with instrumentation:
+                run(instrumentation)
+        elapsed = best_time(instrumented_run)
+        baseline = baseline or elapsed
+        print(f"{name.ljust(40)} {configuration.ljust(30)} {elapsed * 1e3:9.2f} ms ({elapsed / baseline:5.2f}x)")
+
+
+def main():
+    generator = StateGraphGenerator.from_board(SACRED_GROVE)
+    measure('Sacred Grove, brute force', lambda instrumentation: generator.brute_force_state_graph_generation(instrumentation=instrumentation))
+    for board in (SACRED_GROVE, grid_board(20, 20)):
+        generator = StateGraphGenerator.from_board(board)
+        measure(f'{board.name}, batched', lambda instrumentation: generator.batched_state_graph_generation(instrumentation=instrumentation))
+    tile_graph = SACRED_GROVE.tile_graph()
+    wolf_link_position, shadow_statue_position, mirror_statue_position = SACRED_GROVE.start
+
+    def astar(instrumentation):
+        Search(graph=tile_graph, wolf_link=WolfLink(position=wolf_link_position),
+               statue_mirror=Statue(position=mirror_statue_position, pattern='mirror'),
+               statue_shadow=Statue(position=shadow_statue_position, pattern='shadow'),
+               instrumentation=instrumentation).astar_search()
+    measure('Sacred Grove, A*', astar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Peak traced memory of the in-memory batched BFS against the out-of-core exploration,
+with a few chunk sizes.
+
+Run from the repository root with:
+
+    python -m benchmarks.out_of_core_generation
+"""
+import tempfile
+import time
+import tracemalloc
+
+from sacred_grove.puzzle_graph import make_grid_tile_graph
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+
+def measured(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    side = 25
+    grid = make_grid_tile_graph(side, side)
+    start = (side * side // 2, 1, side)
+    generator = StateGraphGenerator(graph=grid, maximum_number_of_states=side ** 6)
+    graph, elapsed, peak = measured(lambda: generator.batched_state_graph_generation(*start))
+    print(f"{side}x{side} grid, {len(graph)} states / {graph.number_of_edges} edges")
+    print(f"    batched in memory:          {elapsed:6.2f}s, peak {peak / 2 ** 20:7.1f} MiB")
+    for chunk_size in (1 << 14, 1 << 16, 1 << 18):
+        with tempfile.TemporaryDirectory() as directory:
+            exploration, elapsed, peak = measured(lambda: generator.out_of_core_state_graph_generation(directory, *start, chunk_size=chunk_size))
+            print(f"    out of core, chunks {chunk_size:>7}: {elapsed:6.2f}s, peak {peak / 2 ** 20:7.1f} MiB, "
+                  f"{exploration.number_of_states()} states / {exploration.number_of_edges()} edges on disk")
+
+
+if __name__ == "__main__":
+    main()
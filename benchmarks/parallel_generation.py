@@ -0,0 +1,39 @@
+"""Parallel state graph generation against the single-process batched BFS, for 1, 2, 4, ... workers
+up to the number of CPUs.
+
+Run from the repository root with:
+
+    python -m benchmarks.parallel_generation
+"""
+import os
+import time
+
+import numpy as np
+
+from sacred_grove.puzzle_graph import make_grid_tile_graph
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, cpus, *(2 ** power for power in range(1, 8) if 2 ** power < cpus)})
+    for side in (15, 20, 25):
+        grid = make_grid_tile_graph(side, side)
+        start = (side * side // 2, 1, side)
+        generator = StateGraphGenerator(graph=grid, maximum_number_of_states=side ** 6)
+        serial_graph, serial_time = timed(lambda: generator.batched_state_graph_generation(*start))
+        print(f"{side}x{side} grid: {len(serial_graph)} nodes / {serial_graph.number_of_edges} edges, batched in {serial_time:.3f}s")
+        for number_of_workers in worker_counts:
+            graph, elapsed = timed(lambda: generator.parallel_state_graph_generation(*start, number_of_workers=number_of_workers))
+            identical = all(np.array_equal(getattr(graph, name), getattr(serial_graph, name)) for name in ('states', 'offsets', 'targets', 'directions'))
+            print(f"    {number_of_workers:>3} workers: {elapsed:7.3f}s ({serial_time / elapsed:4.1f}x){'' if identical else '  MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Puzzle-space scan throughput: configurations per second for 1, 2, 4, ... workers up to the number
+of CPUs, against one A* search per start of the Sacred Grove.
+
+Run from the repository root with:
+
+    python -m benchmarks.puzzle_scanner
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.columnar_store import read_columns
+from sacred_grove.moving_characters import Statue, WolfLink
+from sacred_grove.puzzle_scanner import perturbed_boards, scan_boards
+from sacred_grove.search import Search
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, cpus, *(2 ** power for power in range(1, 8) if 2 ** power < cpus)})
+    boards = perturbed_boards(number_of_boards=200, seed=0)
+    with tempfile.TemporaryDirectory() as directory:
+        for number_of_workers in worker_counts:
+            start = time.perf_counter()
+            rows = scan_boards(boards, directory, number_of_workers)
+            elapsed = time.perf_counter() - start
+            print(f"{number_of_workers:>3} workers: {rows} configurations of {len(boards)} boards in {elapsed:.2f}s "
+                  f"({rows / elapsed:,.0f} per second)")
+        columns = read_columns(directory)
+        sacred_grove = np.asarray(columns['board']) == 0
+        optimal_moves = np.asarray(columns['optimal_moves'])[sacred_grove]
+        starts = np.column_stack([np.asarray(columns[name])[sacred_grove] for name in SACRED_GROVE.kernel().position_names])
+
+    # One search per start instead, on a sample of the Sacred Grove's solvable starts.
+    tile_graph = SACRED_GROVE.tile_graph()
+    sample = np.random.default_rng(0).choice(np.flatnonzero(optimal_moves >= 0), 100, replace=False)
+    start = time.perf_counter()
+    mismatches = 0
+    for row in sample:
+        wolf_link_position, shadow_statue_position, mirror_statue_position = starts[row].tolist()
+        result = Search(
+            graph=tile_graph,
+            wolf_link=WolfLink(position=wolf_link_position),
+            statue_mirror=Statue(position=mirror_statue_position, pattern='mirror'),
+            statue_shadow=Statue(position=shadow_statue_position, pattern='shadow'),
+            goal_tiles=SACRED_GROVE.goal_tiles).astar_search()
+        mismatches += result.number_of_moves != optimal_moves[row]
+    elapsed = time.perf_counter() - start
+    print(f"A* per start: {len(sample) / elapsed:,.0f} starts per second{f', {mismatches} MISMATCHES' if mismatches else ''}")
+
+
+if __name__ == "__main__":
+    main()
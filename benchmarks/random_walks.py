@@ -0,0 +1,55 @@
+"""Random walk throughput: Search.random_walk_search one walk at a time against the batched engine,
+and the exact absorbing Markov chain answer the simulations approximate.
+
+Run from the repository root with:
+
+    python -m benchmarks.random_walks
+"""
+import contextlib
+import io
+import time
+
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.moving_characters import Statue, WolfLink
+from sacred_grove.puzzle_graph import TILE_GRAPH
+from sacred_grove.random_walks import absorbing_chain_analysis, simulate_random_walks
+from sacred_grove.search import Search
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+MAXIMUM_STEPS = 200
+
+
+def main():
+    wolf_link_position, shadow_statue_position, mirror_statue_position = SACRED_GROVE.start
+    number_of_walks = 200
+    start = time.perf_counter()
+    steps = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(number_of_walks):
+            wolf_link = WolfLink(position=wolf_link_position)
+            search = Search(TILE_GRAPH, wolf_link, Statue(position=mirror_statue_position, pattern='mirror'),
+                            Statue(position=shadow_statue_position, pattern='shadow'), maximum_steps=MAXIMUM_STEPS)
+            search.random_walk_search()
+            steps += len(wolf_link.history)
+    elapsed = time.perf_counter() - start
+    print(f"Search.random_walk_search: {number_of_walks} walks, {steps / elapsed:>12,.0f} steps/s")
+
+    kernel = SACRED_GROVE.kernel()
+    number_of_walks = 100000
+    start = time.perf_counter()
+    result = simulate_random_walks(kernel, SACRED_GROVE.start, number_of_walks=number_of_walks, maximum_steps=MAXIMUM_STEPS, seed=0)
+    elapsed = time.perf_counter() - start
+    print(f"simulate_random_walks:     {number_of_walks} walks, {result.walk_lengths.sum() / elapsed:>12,.0f} steps/s")
+    print(f"    success rate within {MAXIMUM_STEPS} moves {result.success_rate:.4f}, hitting time mean {result.mean_hitting_time:.1f}, quantiles {result.quantiles()}")
+
+    state_graph = StateGraphGenerator.from_board(SACRED_GROVE).batched_state_graph_generation()
+    start = time.perf_counter()
+    analysis = absorbing_chain_analysis(state_graph)
+    elapsed = time.perf_counter() - start
+    probability, expected_steps, expected_steps_given_success = analysis.for_state(SACRED_GROVE.start)
+    print(f"absorbing_chain_analysis in {elapsed * 1e3:.1f} ms: from {SACRED_GROVE.start} a random walk ever solves the puzzle with "
+          f"probability {probability:.4f}; expected steps {expected_steps}, {expected_steps_given_success:.1f} given success")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Load test of the solver daemon: concurrent clients over a Unix socket, reporting latency
+percentiles and throughput for single and batched requests.
+
+Run from the repository root with:
+
+    python -m benchmarks.solver_daemon
+"""
+import asyncio
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from sacred_grove.solver_daemon import DEFAULT_STATE_GRAPH_FILE, SolverClient
+from sacred_grove.state_graph_format import load_state_graph
+
+NUMBER_OF_CLIENTS = 8
+REQUESTS_PER_CLIENT = 2000
+BATCH_SIZE = 256
+
+
+async def client_load(socket_path, method: str, states: list, batch_size: int | None, seed: int) -> list[float]:
+    client = await SolverClient.connect(socket_path)
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(REQUESTS_PER_CLIENT if batch_size is None else REQUESTS_PER_CLIENT // 20):
+        start = time.perf_counter()
+        if batch_size is None:
+            await client.request(method, state=rng.choice(states))
+        else:
+            await client.request(method, states=rng.choices(states, k=batch_size))
+        latencies.append(time.perf_counter() - start)
+    await client.close()
+    return latencies
+
+
+async def load_test(socket_path, states: list) -> None:
+    for method, batch_size in (('distance', None), ('next_move', None), ('solve', None), ('distance', BATCH_SIZE), ('next_move', BATCH_SIZE)):
+        start = time.perf_counter()
+        results = await asyncio.gather(*(client_load(socket_path, method, states, batch_size, seed) for seed in range(NUMBER_OF_CLIENTS)))
+        elapsed = time.perf_counter() - start
+        latencies = np.concatenate(results) * 1e6
+        number_of_states = len(latencies) * (batch_size or 1)
+        label = f"{method} x{batch_size}" if batch_size else method
+        print(f"{label:>16}: p50 {np.percentile(latencies, 50):8.1f} us, p99 {np.percentile(latencies, 99):8.1f} us, "
+              f"{len(latencies) / elapsed:>8,.0f} requests/s, {number_of_states / elapsed:>10,.0f} states/s")
+    client = await SolverClient.connect(socket_path)
+    print(f"server stats: {await client.request('stats')}")
+    await client.close()
+
+
+def main():
+    state_graph, _ = load_state_graph(DEFAULT_STATE_GRAPH_FILE)
+    states = state_graph.state_tuples()
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = Path(directory) / 'solver.sock'
+        server = subprocess.Popen([sys.executable, '-m', 'sacred_grove.solver_daemon', '--socket', str(socket_path)], cwd=Path(__file__).parent.parent)
+        try:
+            while not socket_path.exists():
+                time.sleep(0.01)
+            print(f"{NUMBER_OF_CLIENTS} clients, {len(states)} distinct states")
+            asyncio.run(load_test(socket_path, states))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
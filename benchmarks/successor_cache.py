@@ -0,0 +1,133 @@
+"""SuccessorCache against computing every move with the kernel: cost of a lookup, hit rate of the
+CLOCK eviction by capacity on a random walk, repeated IDA* queries sharing a cache, and a frozen
+cache read by forked worker processes.
+
+Run from the repository root with:
+
+    python -m benchmarks.successor_cache
+"""
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.moving_characters import Statue, WolfLink
+from sacred_grove.search import Search
+from sacred_grove.state_graph_generation import StateGraphGenerator
+from sacred_grove.successor_cache import SuccessorCache
+
+THREE_STATUES = grid_board(5, 5, ('shadow', 'mirror', 'clockwise'))
+
+
+def per_call(function, states, repeats: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for state in states:
+            function(state)
+        best = min(best, time.perf_counter() - start)
+    return best / len(states)
+
+
+def random_walk_trace(kernel, states: list[int], steps: int, walk_length: int = 100, seed: int = 0) -> list[int]:
+    # States visited by walks of `walk_length` moves from random states, since a walk from the start soon gets stuck in a dead end.
+    rng = random.Random(seed)
+    trace = []
+    while len(trace) < steps:
+        state = rng.choice(states)
+        for _ in range(walk_length):
+            trace.append(state)
+            moves = kernel.next_states(state)
+            if not moves:
+                break
+            state = rng.choice(moves)[1]
+    return trace[:steps]
+
+
+def lookups(board) -> None:
+    generator = StateGraphGenerator.from_board(board)
+    states = generator.batched_state_graph_generation().states.tolist()
+    cache = SuccessorCache(generator.kernel, 2 * len(states))
+    cache.warm(states)
+    kernel_time, cache_time = per_call(generator.kernel.next_states, states), per_call(cache.next_states, states)
+    print(f"{board.name} ({len(board.statue_patterns)} statues): kernel.next_states {kernel_time * 1e6:6.2f} us, "
+          f"cache hit {cache_time * 1e6:6.2f} us ({kernel_time / cache_time:.2f}x)")
+
+
+def hit_rates(board, steps: int = 200000) -> None:
+    generator = StateGraphGenerator.from_board(board)
+    kernel = generator.kernel
+    trace = random_walk_trace(kernel, generator.batched_state_graph_generation().states.tolist(), steps)
+    kernel_time = per_call(kernel.next_states, trace, repeats=3) * len(trace)
+    print(f"{board.name}, random walk of {steps} moves over {len(set(trace))} distinct states, kernel {kernel_time:.3f}s:")
+    for capacity in (1 << 10, 1 << 12, 1 << 14, 1 << 16):
+        cache = SuccessorCache(kernel, capacity)
+        cache_time = per_call(cache.next_states, trace, repeats=1) * len(trace)
+        # Timed again on the warm cache, with the statistics of the first pass only.
+        hits, misses, evictions = cache.hits, cache.misses, cache.evictions
+        cache_time = min(cache_time, per_call(cache.next_states, trace, repeats=2) * len(trace))
+        cache.hits, cache.misses, cache.evictions = hits, misses, evictions
+        print(f"    capacity {capacity:>6} ({cache.memory_usage / 2 ** 20:6.2f} MiB): hit rate {cache.hit_rate:6.1%}, "
+              f"{cache.evictions:>7} evictions, {cache_time:.3f}s ({kernel_time / cache_time:.2f}x)")
+
+
+def repeated_queries(board, number_of_queries: int = 30) -> None:
+    generator = StateGraphGenerator.from_board(board)
+    states = generator.batched_state_graph_generation().states.tolist()
+    starts = [generator.kernel.unpack(state) for state in random.Random(0).sample(states, number_of_queries)]
+    tile_graph = board.tile_graph()
+    cache = SuccessorCache(generator.kernel)
+
+    def solve_all(successor_cache):
+        for wolf_link_position, shadow_statue_position, mirror_statue_position in starts:
+            Search(tile_graph, WolfLink(position=wolf_link_position), Statue(position=mirror_statue_position, pattern='mirror'),
+                   Statue(position=shadow_statue_position, pattern='shadow'), goal_tiles=board.goal_tiles,
+                   successor_cache=successor_cache).ida_star_search()
+    timings = {}
+    for name, successor_cache in (('kernel', None), ('shared cache', cache)):
+        start = time.perf_counter()
+        solve_all(successor_cache)
+        timings[name] = time.perf_counter() - start
+    print(f"{board.name}, IDA* from {number_of_queries} starts: kernel {timings['kernel']:.3f}s, shared cache {timings['shared cache']:.3f}s "
+          f"({timings['kernel'] / timings['shared cache']:.2f}x), hit rate {cache.hit_rate:.1%}")
+
+
+_shared_cache = None
+
+
+def _worker_lookups(states: list[int]) -> tuple[int, int]:
+    hits, misses = _shared_cache.hits, _shared_cache.misses
+    for state in states:
+        _shared_cache.next_states(state)
+    return _shared_cache.hits - hits, _shared_cache.misses - misses
+
+
+def forked_workers(board, number_of_workers: int = 4) -> None:
+    global _shared_cache
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        print("No fork start method on this platform")
+        return
+    generator = StateGraphGenerator.from_board(board)
+    states = generator.batched_state_graph_generation().states.tolist()
+    _shared_cache = SuccessorCache(generator.kernel, 2 * len(states))
+    _shared_cache.warm(states)
+    _shared_cache.freeze()
+    chunks = [states[worker::number_of_workers] for worker in range(number_of_workers)]
+    with ProcessPoolExecutor(number_of_workers, mp_context=multiprocessing.get_context('fork')) as executor:
+        counts = list(executor.map(_worker_lookups, chunks))
+    print(f"{board.name}, frozen cache of {_shared_cache.memory_usage / 2 ** 20:.2f} MiB read by {number_of_workers} forked workers: "
+          f"{sum(hits for hits, _ in counts)} hits, {sum(misses for _, misses in counts)} misses")
+
+
+def main():
+    for board in (SACRED_GROVE, THREE_STATUES):
+        lookups(board)
+    for board in (SACRED_GROVE, THREE_STATUES):
+        hit_rates(board)
+    repeated_queries(SACRED_GROVE)
+    forked_workers(THREE_STATUES)
+
+
+if __name__ == "__main__":
+    main()
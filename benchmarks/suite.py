@@ -0,0 +1,446 @@
+"""The benchmark suite: a fixed set of measurements recorded as JSON, compared against a baseline,
+and scaling curves of the generation engines.
+
+Measurements are grouped in sections:
+
+    kernel       successors of every Sacred Grove state, one state at a time (get_next_states,
+                 TransitionKernel.next_states, SuccessorCache hits) and in one batch (successors_batch)
+    generation   the Sacred Grove and N x M grids with each generator
+    loading      GraphML with networkx against the binary state graph file
+    solving      find_solutions-style queries: cold load and solve, then per-query latency of the
+                 distance table, optimal solution counting and A*
+    walks        random walk throughput, Search.random_walk_search and simulate_random_walks
+
+Every measurement keeps the best time of a few runs and the tracemalloc peak of one more run,
+with the amount of work done (states, queries, steps) for a rate. Results are saved with
+--save; --compare flags every measurement whose time or peak memory grew by more than the
+tolerance over a baseline saved on the same machine, and exits with status 1 if there is one.
+
+--curves runs every generation engine on square grids of growing size and records time and
+peak memory against the number of states generated. An engine drops out after the first board
+it takes longer than --time-budget to generate, or before a board it would need more than
+--memory-budget for, extrapolating its last peak by the growth of the packed state space.
+
+Run from the repository root with:
+
+    python -m benchmarks.suite [--quick] [--only SECTION ...] [--save results.json] [--compare baseline.json]
+    python -m benchmarks.suite --curves scaling.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+
+SECTIONS = ('kernel', 'generation', 'loading', 'solving', 'walks')
+DEFAULT_TOLERANCE = 0.25
+# Differences below these are noise whatever the tolerance says.
+MINIMUM_SECONDS = 1e-3
+MINIMUM_PEAK_BYTES = 1 << 20
+# Short benchmarks are repeated until they add up to this much time, the best run is kept.
+MINIMUM_TOTAL_SECONDS = 0.25
+MAXIMUM_REPEATS = 50
+
+
+@dataclass
+class Measurement:
+    """Best time and peak memory of one benchmark."""
+    # Section and case, e.g. 'generation/batched/grid 10x10'.
+    name: str
+    # Best wall-clock time of the timed runs.
+    seconds: float
+    # tracemalloc peak of a separate run, None when not measured.
+    peak_bytes: int | None
+    # Work done by one run, in `unit`s: states, queries, steps...
+    work: int
+    unit: str
+    # Anything else worth recording, e.g. latency percentiles. Not compared.
+    details: dict = field(default_factory=dict)
+
+    @property
+    def rate(self) -> float:
+        """Units of work per second."""
+        return self.work / self.seconds if self.seconds > 0 else float('inf')
+
+
+@dataclass
+class Regression:
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1
+
+
+def measure(name: str, function, work: int, unit: str, repeats: int = 3, memory: bool = True, **details) -> Measurement:
+    """Time `function` at least `repeats` times, then trace the peak memory of one more run.
+
+    Fast functions are run again, up to MAXIMUM_REPEATS times, until MINIMUM_TOTAL_SECONDS have been spent.
+    """
+    times = []
+    while len(times) < repeats or (sum(times) < MINIMUM_TOTAL_SECONDS and len(times) < MAXIMUM_REPEATS):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return Measurement(name, min(times), peak, work, unit, details)
+
+
+def new_search(board, **options):
+    from sacred_grove.moving_characters import Statue, WolfLink
+    from sacred_grove.search import Search
+
+    wolf_link_position, *statue_positions = board.start
+    statues = dict(zip(board.statue_patterns, statue_positions))
+    return Search(graph=board.tile_graph(), wolf_link=WolfLink(position=wolf_link_position),
+                  statue_mirror=Statue(position=statues['mirror'], pattern='mirror'),
+                  statue_shadow=Statue(position=statues['shadow'], pattern='shadow'),
+                  goal_tiles=board.goal_tiles, **options)
+
+
+def kernel_benchmarks(quick: bool):
+    from sacred_grove.state_graph_generation import StateGraphGenerator
+    from sacred_grove.successor_cache import SuccessorCache
+
+    generator = StateGraphGenerator.from_board(SACRED_GROVE)
+    kernel = generator.kernel
+    state_graph = generator.batched_state_graph_generation()
+    states = state_graph.states
+    placements = [kernel.unpack(state) for state in states.tolist()]
+    yield measure('kernel/get_next_states', lambda: [generator.get_next_states(placement) for placement in placements],
+                  len(states), 'states', memory=False)
+    yield measure('kernel/next_states', lambda: [kernel.next_states(state) for state in states.tolist()],
+                  len(states), 'states', memory=False)
+    cache = SuccessorCache(kernel, 2 * len(states))
+    cache.warm(states)
+    yield measure('kernel/SuccessorCache.next_states, hits', lambda: [cache.next_states(state) for state in states.tolist()],
+                  len(states), 'states', memory=False)
+    complete_states = generator.complete_state_graph_generation().states
+    for name, batch in (('reachable', states), ('every placement', complete_states)):
+        yield measure(f'kernel/successors_batch/{name}', lambda: kernel.successors_batch(batch), len(batch), 'states', repeats=10)
+
+
+def generation_benchmarks(quick: bool):
+    from sacred_grove.state_graph_generation import StateGraphGenerator
+
+    generator = StateGraphGenerator.from_board(SACRED_GROVE)
+    yield measure('generation/brute force/Sacred Grove', generator.brute_force_state_graph_generation,
+                  len(generator.batched_state_graph_generation()), 'states')
+    sizes = ((6, 6), (10, 10)) if quick else ((6, 6), (10, 10), (12, 12))
+    for board in (SACRED_GROVE, *(grid_board(rows, columns) for rows, columns in sizes)):
+        generator = StateGraphGenerator.from_board(board)
+        reachable = len(generator.batched_state_graph_generation())
+        yield measure(f'generation/batched/{board.name}', generator.batched_state_graph_generation, reachable, 'states')
+        complete = len(generator.complete_state_graph_generation())
+        yield measure(f'generation/complete/{board.name}', generator.complete_state_graph_generation, complete, 'states',
+                      repeats=1 if complete > 1 << 22 else 3)
+        with tempfile.TemporaryDirectory() as directory:
+            def out_of_core():
+                # A fresh directory every run: an existing one resumes the finished exploration.
+                with tempfile.TemporaryDirectory(dir=directory) as run_directory:
+                    generator.out_of_core_state_graph_generation(run_directory)
+            yield measure(f'generation/out of core/{board.name}', out_of_core, reachable, 'states')
+
+
+def loading_benchmarks(quick: bool):
+    import networkx as nx
+
+    from sacred_grove.distance_table import DistanceTable
+    from sacred_grove.state_graph_format import binary_to_graphml, load_state_graph, save_state_graph
+    from sacred_grove.state_graph_generation import StateGraphGenerator
+
+    boards = (SACRED_GROVE,) if quick else (SACRED_GROVE, grid_board(6, 6))
+    for board in boards:
+        generator = StateGraphGenerator.from_board(board)
+        state_graph = generator.complete_state_graph_generation() if board is not SACRED_GROVE else generator.batched_state_graph_generation()
+        distance_table = DistanceTable.from_state_graph(state_graph, board.goal_tiles)
+        with tempfile.TemporaryDirectory() as directory:
+            binary_file, graphml_file = Path(directory) / 'state-graph.bin', Path(directory) / 'state-graph.graphml'
+            save_state_graph(binary_file, state_graph, distance_table)
+            binary_to_graphml(binary_file, graphml_file)
+            sizes = {'graphml_bytes': graphml_file.stat().st_size, 'binary_bytes': binary_file.stat().st_size}
+            yield measure(f'loading/graphml/{board.name}', lambda: nx.read_graphml(graphml_file), len(state_graph), 'states',
+                          repeats=1 if len(state_graph) > 100000 else 3, **sizes)
+            yield measure(f'loading/binary/{board.name}', lambda: load_state_graph(binary_file), len(state_graph), 'states', **sizes)
+
+            def load_and_touch():
+                # Memory-mapped arrays are only read when used: fault every page in.
+                loaded, loaded_distances = load_state_graph(binary_file)
+                return int(loaded.targets.sum()) + int(loaded.states.sum()) + int(loaded_distances.distances.sum())
+            yield measure(f'loading/binary, every page read/{board.name}', load_and_touch, len(state_graph), 'states', **sizes)
+
+
+def solving_benchmarks(quick: bool):
+    from sacred_grove.distance_table import DistanceTable
+    from sacred_grove.optimal_solutions import OptimalSolutions
+    from sacred_grove.state_graph_format import load_state_graph, save_state_graph
+    from sacred_grove.state_graph_generation import StateGraphGenerator
+
+    with tempfile.TemporaryDirectory() as directory:
+        state_graph = StateGraphGenerator.from_board(SACRED_GROVE).batched_state_graph_generation()
+        file_name = Path(directory) / 'state-graph.bin'
+        save_state_graph(file_name, state_graph, DistanceTable.from_state_graph(state_graph, SACRED_GROVE.goal_tiles))
+
+        def cold_query():
+            _, distance_table = load_state_graph(file_name)
+            return distance_table.solve(SACRED_GROVE.start)
+        yield measure('solving/load and solve', cold_query, 1, 'queries', repeats=10)
+
+        _, distance_table = load_state_graph(file_name)
+        rng = np.random.default_rng(0)
+        starts = [distance_table.state_graph.kernel.unpack(state)
+                  for state in rng.choice(distance_table.state_graph.states, 200 if quick else 1000).tolist()]
+        for name, query in (('distance table', distance_table.solve), ('optimal solution count', OptimalSolutions(distance_table).count)):
+            latencies = []
+            for start in starts:
+                started = time.perf_counter()
+                query(start)
+                latencies.append(time.perf_counter() - started)
+            yield measure(f'solving/{name}', lambda: [query(start) for start in starts], len(starts), 'queries',
+                          latency_percentiles_us=dict(zip(('50', '90', '99'), (np.percentile(latencies, (50, 90, 99)) * 1e6).round(1).tolist())))
+    yield measure('solving/A*', lambda: new_search(SACRED_GROVE).astar_search(), 1, 'queries')
+
+
+def walk_benchmarks(quick: bool):
+    from sacred_grove.random_walks import simulate_random_walks
+
+    maximum_steps = 200
+    steps = []
+
+    def search_walks():
+        # Search shuffles its moves with the random module: seed it for the same walks every run.
+        random.seed(0)
+        steps.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(20 if quick else 100):
+                search = new_search(SACRED_GROVE, maximum_steps=maximum_steps)
+                search.random_walk_search()
+                steps.append(len(search.wolf_link.history))
+    search_walks()
+    yield measure('walks/Search.random_walk_search', search_walks, sum(steps), 'steps', memory=False)
+
+    kernel = SACRED_GROVE.kernel()
+    number_of_walks = 10000 if quick else 100000
+    result = simulate_random_walks(kernel, SACRED_GROVE.start, SACRED_GROVE.goal_tiles, number_of_walks, maximum_steps, seed=0)
+    yield measure('walks/simulate_random_walks',
+                  lambda: simulate_random_walks(kernel, SACRED_GROVE.start, SACRED_GROVE.goal_tiles, number_of_walks, maximum_steps, seed=0),
+                  int(result.walk_lengths.sum()), 'steps')
+
+
+BENCHMARKS = {
+    'kernel': kernel_benchmarks,
+    'generation': generation_benchmarks,
+    'loading': loading_benchmarks,
+    'solving': solving_benchmarks,
+    'walks': walk_benchmarks,
+}
+
+
+def run(sections=SECTIONS, quick: bool = False, report=print) -> list[Measurement]:
+    """Run the benchmarks of `sections`, reporting every measurement as it is made."""
+    measurements = []
+    for section in sections:
+        for measurement in BENCHMARKS[section](quick):
+            report(format_measurement(measurement))
+            measurements.append(measurement)
+    return measurements
+
+
+def format_measurement(measurement: Measurement) -> str:
+    peak = f"{measurement.peak_bytes / 2 ** 20:9.2f} MiB" if measurement.peak_bytes is not None else ' ' * 13
+    return (f"{measurement.name:<48} {measurement.seconds * 1e3:11.3f} ms {peak} "
+            f"{measurement.rate:>14,.0f} {measurement.unit}/s")
+
+
+def environment() -> dict:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+    }
+
+
+def save_results(file_name, measurements: list[Measurement], quick: bool) -> None:
+    """Write measurements as a JSON baseline."""
+    results = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'quick': quick,
+        'environment': environment(),
+        'measurements': {measurement.name: {key: value for key, value in asdict(measurement).items() if key != 'name'}
+                         for measurement in measurements},
+    }
+    Path(file_name).write_text(json.dumps(results, indent=2) + '\n')
+
+
+def load_results(file_name) -> list[Measurement]:
+    results = json.loads(Path(file_name).read_text())
+    return [Measurement(name=name, **fields) for name, fields in results['measurements'].items()]
+
+
+def compare(measurements: list[Measurement], baseline: list[Measurement], tolerance: float = DEFAULT_TOLERANCE) -> list[Regression]:
+    """Measurements slower, or with a higher peak, than their baseline by more than `tolerance`.
+
+    Args:
+        measurements (list[Measurement]): the current run.
+        baseline (list[Measurement]): an earlier run, e.g. from load_results; measurements missing from either are skipped.
+        tolerance (float): allowed relative growth, 0.25 for 25%.
+
+    Returns:
+        list[Regression]: one per regressed metric.
+    """
+    baseline = {measurement.name: measurement for measurement in baseline}
+    regressions = []
+    for measurement in measurements:
+        previous = baseline.get(measurement.name)
+        if previous is None:
+            continue
+        for metric, noise in (('seconds', MINIMUM_SECONDS), ('peak_bytes', MINIMUM_PEAK_BYTES)):
+            current, reference = getattr(measurement, metric), getattr(previous, metric)
+            if current is None or reference is None:
+                continue
+            if current > reference * (1 + tolerance) and current - reference > noise:
+                regressions.append(Regression(measurement.name, metric, reference, current))
+    return regressions
+
+
+def scaling_curves(sides=(4, 5, 6, 8, 10, 12, 14, 16, 20, 24, 32, 48, 64), engines=None, time_budget: float = 10.0,
+                   memory_budget: int = 2 << 30, report=print) -> dict[str, list[dict]]:
+    """Generation time and peak memory against the number of states, on square grids of growing size.
+
+    Args:
+        sides (Iterable[int]): grid sizes, increasing.
+        engines (Iterable[str] | None): names from ENGINES, all by default.
+        time_budget (float): an engine stops after the first board it takes longer than this, in seconds.
+        memory_budget (int): an engine skips the boards it is expected to need more bytes than this for.
+        report (Callable[[str], None]): called with a line per point.
+
+    Returns:
+        dict[str, list[dict]]: per engine, one point per board with board, tiles, states, edges, seconds and peak_bytes.
+    """
+    curves = {}
+    for engine in engines or ENGINES:
+        points = curves[engine] = []
+        for side in sides:
+            board = grid_board(side, side)
+            packed_states = board.number_of_tiles ** len(board.start)
+            if points and points[-1]['peak_bytes'] * packed_states / points[-1]['packed_states'] > memory_budget:
+                report(f"{engine:<14} stops before {board.name}: it would need more than {memory_budget / 2 ** 30:.1f} GiB")
+                break
+            # The traced run first, which also warms up lazy imports and caches for the timed one.
+            tracemalloc.start()
+            try:
+                ENGINES[engine](board)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            start = time.perf_counter()
+            states, edges = ENGINES[engine](board)
+            seconds = time.perf_counter() - start
+            points.append({'board': board.name, 'tiles': board.number_of_tiles, 'packed_states': packed_states,
+                           'states': states, 'edges': edges, 'seconds': seconds, 'peak_bytes': peak})
+            report(f"{engine:<14} {board.name:<12} {states:>10} states {edges:>11} edges {seconds:9.3f}s "
+                   f"{peak / 2 ** 20:10.2f} MiB {states / seconds:>12,.0f} states/s")
+            if seconds > time_budget:
+                report(f"{engine:<14} stops after {board.name}: slower than {time_budget:g}s")
+                break
+    return curves
+
+
+def _brute_force(board):
+    from sacred_grove.state_graph_generation import StateGraphGenerator
+
+    graph = StateGraphGenerator.from_board(board).brute_force_state_graph_generation()
+    return graph.number_of_nodes(), graph.number_of_edges()
+
+
+def _batched(board):
+    from sacred_grove.state_graph_generation import StateGraphGenerator
+
+    state_graph = StateGraphGenerator.from_board(board).batched_state_graph_generation()
+    return len(state_graph), state_graph.number_of_edges
+
+
+def _out_of_core(board):
+    from sacred_grove.state_graph_generation import StateGraphGenerator
+
+    with tempfile.TemporaryDirectory() as directory:
+        exploration = StateGraphGenerator.from_board(board).out_of_core_state_graph_generation(directory)
+        return exploration.number_of_states(), exploration.number_of_edges()
+
+
+def _complete(board):
+    from sacred_grove.state_graph_generation import StateGraphGenerator
+
+    state_graph = StateGraphGenerator.from_board(board).complete_state_graph_generation()
+    return len(state_graph), state_graph.number_of_edges
+
+
+# Generation engines of the scaling curves: board -> (states, edges).
+ENGINES = {
+    'brute force': _brute_force,
+    'batched': _batched,
+    'out of core': _out_of_core,
+    'complete': _complete,
+}
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite', description="Run the benchmark suite.")
+    parser.add_argument('--only', nargs='+', choices=SECTIONS, default=SECTIONS, metavar='SECTION', help=f"sections to run: {', '.join(SECTIONS)}")
+    parser.add_argument('--quick', action='store_true', help="smaller boards and fewer queries")
+    parser.add_argument('--save', metavar='FILE', help="write the results to FILE as JSON")
+    parser.add_argument('--compare', metavar='FILE', help="flag regressions against the results in FILE")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help=f"allowed relative growth (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument('--curves', metavar='FILE', help="instead, write scaling curves of the generation engines to FILE as JSON")
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, metavar='ENGINE', help=f"engines of the curves: {', '.join(ENGINES)}")
+    parser.add_argument('--time-budget', type=float, default=10.0, help="seconds after which an engine drops out of the curves (default: 10)")
+    parser.add_argument('--memory-budget', type=float, default=2.0, help="GiB an engine may use in the curves (default: 2)")
+    return parser
+
+
+def main(argv=None) -> int:
+    arguments = parser().parse_args(argv)
+    if arguments.curves:
+        curves = scaling_curves(engines=arguments.engines, time_budget=arguments.time_budget,
+                                memory_budget=int(arguments.memory_budget * 2 ** 30))
+        Path(arguments.curves).write_text(json.dumps({'environment': environment(), 'curves': curves}, indent=2) + '\n')
+        return 0
+    measurements = run(arguments.only, arguments.quick)
+    if arguments.save:
+        save_results(arguments.save, measurements, arguments.quick)
+    if arguments.compare:
+        regressions = compare(measurements, load_results(arguments.compare), arguments.tolerance)
+        for regression in regressions:
+            unit, scale = ('ms', 1e3) if regression.metric == 'seconds' else ('MiB', 2 ** -20)
+            print(f"REGRESSION {regression.name} {regression.metric}: {regression.baseline * scale:.3f} -> "
+                  f"{regression.current * scale:.3f} {unit} ({regression.change:+.0%})")
+        print(f"{len(regressions)} regressions beyond {arguments.tolerance:.0%} against {arguments.compare}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""State graphs over canonical representatives of symmetric states against the full state graphs:
+symmetry group size, states, edges, array memory and generation time.
+
+Run from the repository root with:
+
+    python -m benchmarks.symmetry
+"""
+import time
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def memory_usage(state_graph) -> int:
+    return sum(getattr(state_graph, name).nbytes for name in ('states', 'offsets', 'targets', 'directions'))
+
+
+def main():
+    for board in (SACRED_GROVE, grid_board(5, 8), grid_board(10, 10), grid_board(14, 14)):
+        generator = StateGraphGenerator.from_board(board)
+        for complete in (False, True):
+            if complete:
+                full, full_time = timed(generator.complete_state_graph_generation)
+            else:
+                full, full_time = timed(generator.batched_state_graph_generation)
+            quotient, quotient_time = timed(lambda: generator.symmetric_state_graph_generation(goal_tiles=board.goal_tiles, complete=complete))
+            print(f"{board.name} ({'every placement' if complete else 'reachable from the start'}), "
+                  f"{len(quotient.symmetry_group)} symmetries:\n"
+                  f"    full       {len(full):>9} states {full.number_of_edges:>9} edges {memory_usage(full) / 2 ** 20:8.2f} MiB {full_time:7.3f}s\n"
+                  f"    canonical  {len(quotient):>9} states {quotient.state_graph.number_of_edges:>9} edges "
+                  f"{memory_usage(quotient.state_graph) / 2 ** 20:8.2f} MiB {quotient_time:7.3f}s ({len(full) / len(quotient):.2f}x fewer states)")
+
+
+if __name__ == "__main__":
+    main()
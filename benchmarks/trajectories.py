@@ -0,0 +1,64 @@
+"""Bulk move sequence validation against a scalar loop over TransitionKernel.step.
+
+Run from the repository root with:
+
+    python -m benchmarks.trajectories
+"""
+import time
+
+import numpy as np
+
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.transition_kernel import DIRECTION_CODES, DIRECTIONS, INVALID_STATE
+from sacred_grove.trajectory import NO_ILLEGAL_STEP, validate_move_sequences
+
+NUMBER_OF_SEQUENCES = 200000
+
+
+def scalar_validation(kernel, start, sequences, goal_indices):
+    results = []
+    for sequence in sequences:
+        state, first_illegal_step = kernel.pack(*start), NO_ILLEGAL_STEP
+        for step, direction in enumerate(sequence):
+            next_state = kernel.step(state, DIRECTION_CODES[direction]) if direction in DIRECTION_CODES else INVALID_STATE
+            if next_state == INVALID_STATE:
+                first_illegal_step = step
+                break
+            state = next_state
+        solved = first_illegal_step == NO_ILLEGAL_STEP and set(kernel.unpack_indices(state)[1:]) == goal_indices
+        results.append((first_illegal_step, solved))
+    return results
+
+
+def main():
+    kernel = SACRED_GROVE.kernel()
+    rng = np.random.default_rng(0)
+    # Known solutions with a few moves changed and random moves appended: a mix of solved, unsolved and illegal sequences.
+    known_solutions = ['NEWWWSSEEENW', 'SEWWWNNEEESW']
+    sequences = []
+    for _ in range(NUMBER_OF_SEQUENCES):
+        moves = list(known_solutions[rng.integers(2)])
+        for _ in range(rng.integers(0, 3)):
+            moves[rng.integers(len(moves))] = DIRECTIONS[rng.integers(4)]
+        moves += [DIRECTIONS[direction] for direction in rng.integers(0, 4, rng.integers(0, 20))]
+        sequences.append(''.join(moves))
+    number_of_moves = sum(map(len, sequences))
+
+    start = time.perf_counter()
+    result = validate_move_sequences(kernel, SACRED_GROVE.start, sequences)
+    batched_time = time.perf_counter() - start
+    print(f"validate_move_sequences: {len(sequences)} sequences ({number_of_moves} moves) in {batched_time:.3f}s, "
+          f"{len(sequences) / batched_time:>12,.0f} sequences/s; {result.legal.mean():.1%} legal, {result.solved.mean():.2%} solved")
+
+    sample = 20000
+    goal_indices = {kernel.tile_index[tile] for tile in SACRED_GROVE.goal_tiles}
+    start = time.perf_counter()
+    expected = scalar_validation(kernel, SACRED_GROVE.start, sequences[:sample], goal_indices)
+    scalar_time = (time.perf_counter() - start) * len(sequences) / sample
+    print(f"scalar TransitionKernel.step loop: {len(sequences) / scalar_time:>12,.0f} sequences/s "
+          f"({scalar_time / batched_time:.1f}x slower)")
+    assert expected == list(zip(result.first_illegal_step[:sample].tolist(), result.solved[:sample].tolist()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""States/sec of the compiled transition kernel against the original networkx-based expansion.
+
+Run from the repository root with:
+
+    python -m benchmarks.transition_kernel
+"""
+import time
+
+from sacred_grove.puzzle_graph import TILE_GRAPH
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+opposite_directions = {
+    'N': 'S',
+    'S': 'N',
+    'E': 'W',
+    'W': 'E'
+}
+
+
+def legacy_get_next_states(graph, current_state):
+    """The original StateGraphGenerator.get_next_states, walking networkx neighbors and edge data."""
+    def neighbor_in_direction(tile, direction):
+        return next(iter([n for n in graph.neighbors(tile) if graph.get_edge_data(tile, n).get('dir') == direction]), tile)
+
+    wolf_link_position, shadow_statue_position, mirror_statue_position = current_state
+    next_states = []
+    for neighbor in set(graph.neighbors(wolf_link_position)) - {shadow_statue_position, mirror_statue_position}:
+        direction = graph.get_edge_data(wolf_link_position, neighbor).get('dir')
+        new_shadow = neighbor_in_direction(shadow_statue_position, direction)
+        if new_shadow == mirror_statue_position:
+            new_shadow = shadow_statue_position
+        new_mirror = neighbor_in_direction(mirror_statue_position, opposite_directions[direction])
+        if new_mirror == shadow_statue_position:
+            new_mirror = mirror_statue_position
+        if neighbor not in {new_shadow, new_mirror} and new_shadow != new_mirror:
+            next_states.append((neighbor, new_shadow, new_mirror))
+    return next_states
+
+
+def states_per_second(expand, states, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        expand(states)
+        best = min(best, time.perf_counter() - start)
+    return len(states) / best
+
+
+def main():
+    generator = StateGraphGenerator(graph=TILE_GRAPH)
+    kernel = generator.kernel
+    states = list(generator.brute_force_state_graph_generation().nodes)
+    packed_states = [kernel.pack(*state) for state in states]
+
+    # Sanity check: both expansions agree on every reachable state.
+    for state in states:
+        assert set(legacy_get_next_states(TILE_GRAPH, state)) == set(generator.get_next_states(state))
+
+    results = {
+        'legacy get_next_states (networkx)': states_per_second(
+            lambda batch: [legacy_get_next_states(TILE_GRAPH, state) for state in batch], states),
+        'get_next_states (kernel, tuples)': states_per_second(
+            lambda batch: [generator.get_next_states(state) for state in batch], states),
+        'TransitionKernel.next_states (packed)': states_per_second(
+            lambda batch: [kernel.next_states(state) for state in batch], packed_states),
+        'TransitionKernel.successors_batch': states_per_second(
+            kernel.successors_batch, packed_states),
+    }
+    baseline = results['legacy get_next_states (networkx)']
+    print(f"Expanding {len(states)} reachable states of the Sacred Grove:")
+    for name, rate in results.items():
+        print(f"{name.ljust(40)} {rate:>14,.0f} states/s  ({rate / baseline:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,59 @@
-import networkx as nx
+import time
 from pathlib import Path
 
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.distance_table import DistanceTable, goal_state_mask
+from sacred_grove.optimal_solutions import OptimalSolutions
+from sacred_grove.state_graph_format import load_state_graph
+
 dir_to_save = Path(__file__).parent
-file_name = dir_to_save / 'state-graph.graphml'
+file_name = dir_to_save / 'sacred_grove' / 'state-graph.bin'
+
+original_state = SACRED_GROVE.start  # (wolf_link_position, shadow_statue_position, mirror_statue_position)
+
+start = time.perf_counter()
+state_graph, distance_table = load_state_graph(file_name)
+print(f"Successfully loaded the graph from {file_name} in {(time.perf_counter() - start) * 1e3:.2f} ms")
+print(f"Graph has {len(state_graph)} nodes and {state_graph.number_of_edges} edges.")
+
+# The saved graph holds every placement of the statues, not only the ones the puzzle can reach.
+start_index = state_graph.index_of(state_graph.kernel.pack(*original_state))
+reachable = state_graph.reachable_mask(start_index)
+print(f"{int(reachable.sum())} of them are reachable from {original_state}.")
 
-try:
-    graph = nx.read_graphml(file_name)
-    print(f"Successfully loaded the graph from {file_name}")
-    print(f"Graph has {len(graph.nodes)} nodes and {len(graph.edges)} edges.")
-except Exception as e:
-    print(f"An error occurred while loading the file: {e}")
+# A single reverse BFS from all solution nodes at once gives the distance to the closest one from every state.
+# main.graph_generation stores it in the file; rebuild it for files saved without one.
+if distance_table is None:
+    start = time.perf_counter()
+    distance_table = DistanceTable.from_state_graph(state_graph)
+    print(f"Distance table built in {(time.perf_counter() - start) * 1e3:.2f} ms")
 
-# List all solution nodes
+# List all solution nodes reachable from the start
 # That is, those with shadow_statue_position, mirror_statue_position equal to 5, 15 or 15, 5
-solution_nodes = []
-for node in graph.nodes:
-    node_data = graph.nodes[node]
-    if (node_data.get('shadow_statue_position') == 5 and node_data.get('mirror_statue_position') == 15) or \
-       (node_data.get('shadow_statue_position') == 15 and node_data.get('mirror_statue_position') == 5):
-        solution_nodes.append(node)
-print(f"Found {len(solution_nodes)} solution nodes:")
+solution_mask = goal_state_mask(state_graph, distance_table.goal_tiles) & reachable
+solution_nodes = [state_graph.kernel.unpack(state) for state in state_graph.states[solution_mask]]
+print(f"Found {len(solution_nodes)} reachable solution nodes:")
 for node in solution_nodes:
-    print(f"Node {node} with data: {graph.nodes[node]}")
-
-original_state = (11, 13, 9)  # (wolf_link_position, mirror_statue_position, shadow_statue_position)
-
-# run dijkstra between original state and first solution node with weight as the number of steps
-if solution_nodes:
-    solution_node = solution_nodes[0]
-    try:
-        path = nx.dijkstra_path(graph, source=str(original_state), target=solution_node, weight='steps')
-        print('\n\n\n-------------')
-        print(f"Shortest path from {original_state} to {solution_node}:")
-        for step in path:
-            print(f"Node {step} with data: {graph.nodes[step]}")
-    except nx.NetworkXNoPath:
-        print(f"No path found from {original_state} to {solution_node}.")
-else:
-    print("No solution nodes found in the graph.")
-
-# Now run dijkstra between original state and all solution nodes, and find the shortest path among them
-shortest_path = None
-shortest_path_length = float('inf')
-for solution_node in solution_nodes:
-    try:
-        path = nx.dijkstra_path(graph, source=str(original_state), target=solution_node, weight='steps')
-        path_length = nx.dijkstra_path_length(graph, source=str(original_state), target=solution_node, weight='steps')
-        if path_length < shortest_path_length:
-            shortest_path_length = path_length
-            shortest_path = path
-    except nx.NetworkXNoPath:
-        print(f"No path found from {original_state} to {solution_node}.")
+    print(f"Node {node}")
+
+start = time.perf_counter()
+shortest_path = distance_table.solve(original_state)
+print(f"Solution looked up in {(time.perf_counter() - start) * 1e6:.1f} us")
 if shortest_path:
     print('\n\n\n-------------')
-    print(f"Shortest path from {original_state} to any solution node (length {shortest_path_length}):")
+    print(f"Shortest path from {original_state} to any solution node (length {len(shortest_path) - 1}):")
     for step in shortest_path:
-        print(f"Node {step} with data: {graph.nodes[step]}")
+        print(f"Node {step} | WL: {str(step[0]).rjust(2)} | SS: {str(step[1]).rjust(2)} | MS: {str(step[2]).rjust(2)}")
 else:
     print("No path found from original state to any solution node.")
-    
\ No newline at end of file
+
+# Count every optimal solution with dynamic programming over the distance layers, then list them one at a time
+optimal_solutions = OptimalSolutions(distance_table)
+start = time.perf_counter()
+number_of_solutions = optimal_solutions.count(original_state)
+print(f"\n{number_of_solutions} optimal solutions from {original_state}, counted in {(time.perf_counter() - start) * 1e3:.2f} ms:")
+for solution in optimal_solutions.iterate(original_state):
+    print(f"{solution.number_of_moves} moves: {solution.moves}")
+print("The 10 shortest solutions, optimal or not:")
+for solution in optimal_solutions.near_optimal(original_state, k=10):
+    print(f"{solution.number_of_moves} moves: {solution.moves}")
@@ -1,20 +1,26 @@
-from puzzle_graph import TILE_GRAPH
-from moving_characters import WolfLink, Statue
-from search import Search
-from state_graph_generation import StateGraphGenerator
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.puzzle_graph import TILE_GRAPH
+from sacred_grove.moving_characters import WolfLink, Statue
+from sacred_grove.search import Search
+from sacred_grove.trajectory import Trajectory
+from sacred_grove.state_graph_generation import StateGraphGenerator
+from sacred_grove.dead_states import LiveStateIndex
+from sacred_grove.distance_table import DistanceTable
+from sacred_grove import state_graph_format
 from pathlib import Path
 import networkx as nx
 dir_to_save = Path(__file__).parent
 
 def print_trajectory(wolf_link: WolfLink, statue_mirror: Statue, statue_shadow: Statue):
     print("Trajectory:")
-    for i in range(len(wolf_link.history)):
-        print(f"Step {str(i).rjust(2)} | WL: {str(wolf_link.history[i]).rjust(2)} | MS: {str(statue_mirror.history[i]).rjust(2)} | SS: {str(statue_shadow.history[i]).rjust(2)}")
+    for i, (wolf_link_position, mirror_statue_position, shadow_statue_position) in enumerate(Trajectory.from_characters(wolf_link, statue_mirror, statue_shadow)):
+        print(f"Step {str(i).rjust(2)} | WL: {str(wolf_link_position).rjust(2)} | MS: {str(mirror_statue_position).rjust(2)} | SS: {str(shadow_statue_position).rjust(2)}")
 
 def main():
-    mirror_statue = Statue(position=9, pattern='mirror')
-    wolf_link = WolfLink(position=11)
-    shadow_statue = Statue(position=13, pattern='shadow')
+    wolf_link_position, shadow_statue_position, mirror_statue_position = SACRED_GROVE.start
+    mirror_statue = Statue(position=mirror_statue_position, pattern='mirror')
+    wolf_link = WolfLink(position=wolf_link_position)
+    shadow_statue = Statue(position=shadow_statue_position, pattern='shadow')
     search = Search(
         graph=TILE_GRAPH, 
         wolf_link=wolf_link, 
@@ -38,11 +44,20 @@ def save_state_graph(graph):
     except Exception as e:
         print(f"An error occurred while saving the file: {e}")    
 
+def save_compact_state_graph(state_graph, distance_table):
+    file_name = dir_to_save / 'sacred_grove' / 'state-graph.bin'
+    live_states = LiveStateIndex.from_state_graph(state_graph, distance_table=distance_table)
+    state_graph_format.save_state_graph(file_name, state_graph, distance_table, live_states=live_states)
+    print(f"Successfully saved the compact graph to {file_name}")
+
 def graph_generation():
     state_graph_generator = StateGraphGenerator(graph=TILE_GRAPH)
     state_graph = state_graph_generator.brute_force_state_graph_generation()
     print(f"Generated state graph with {len(state_graph)} states.")
     save_state_graph(state_graph)
+    # Every placement, not only those reachable from the start, so any state can be looked up in the file.
+    compact_state_graph = state_graph_generator.complete_state_graph_generation()
+    save_compact_state_graph(compact_state_graph, DistanceTable.from_state_graph(compact_state_graph))
 
 if __name__ == "__main__":
     # main()
@@ -0,0 +1,5 @@
+"""Solver and analysis tools for the Sacred Grove statue puzzle and its variants.
+
+The modules are imported one by one, e.g. `from sacred_grove.board import SACRED_GROVE`, so that
+each command only loads the dependencies it needs; see sacred_grove.cli.
+"""
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+def bitset_size(number_of_bits: int) -> int:
+    """Number of bytes needed to hold `number_of_bits` bits."""
+    return (number_of_bits + 7) // 8
+
+
+def new_bitset(number_of_bits: int) -> np.ndarray:
+    """A zeroed bitset, one bit per packed state id."""
+    return np.zeros(bitset_size(number_of_bits), dtype=np.uint8)
+
+
+def test_bits(bitset: np.ndarray, ids) -> np.ndarray:
+    """Boolean mask telling which of `ids` are set in `bitset`."""
+    ids = np.asarray(ids, dtype=np.int64)
+    return ((bitset[ids >> 3] >> (ids & 7).astype(np.uint8)) & 1).astype(bool)
+
+
+def set_bits(bitset: np.ndarray, ids) -> None:
+    """Set the bits of `ids` in place. Repeated ids are allowed."""
+    ids = np.asarray(ids, dtype=np.int64)
+    np.bitwise_or.at(bitset, ids >> 3, (1 << (ids & 7)).astype(np.uint8))
+
+
+def bitset_members(bitset: np.ndarray, number_of_bits: int) -> np.ndarray:
+    """Sorted ids of every set bit."""
+    # Only unpack the non-zero bytes, the bitset of a large state space is mostly empty.
+    nonzero_bytes = np.flatnonzero(bitset)
+    rows, bits = np.nonzero(np.unpackbits(bitset[nonzero_bytes][:, None], axis=1, bitorder='little'))
+    ids = nonzero_bytes[rows] * 8 + bits
+    return ids[ids < number_of_bits]
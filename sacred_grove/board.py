@@ -0,0 +1,236 @@
+"""Declarative board definitions.
+
+A board is a set of tiles with directed 'N'/'S'/'E'/'W' connections, the goal tiles the
+statues have to reach and a start placement for Wolf Link and the statues. Boards can be
+written as an ASCII grid:
+
+    .   floor tile                 #   hole (no tile)
+    G   goal tile                  L   Wolf Link's start tile
+    S   shadow statue              M   mirror statue
+    C   clockwise statue           A   counterclockwise statue
+    V   flip_vertical statue       H   flip_horizontal statue
+
+A statue letter in lower case stands on a goal tile. Tiles are numbered from 1, row by row
+from the north-west corner, and neighboring tiles are connected both ways. Statues are listed
+in the state in reading order unless `statue_patterns` says otherwise.
+
+The same board can be given as JSON, either with a "grid" (list of ASCII rows) or with
+explicit "tiles" and "edges":
+
+    {
+        "name": "...",
+        "grid": ["...", ".G.", "..."],          or   "tiles": [1, 2, ...], "edges": [[1, 2, "E"], ...],
+        "walls": [[1, 2], ...],                 connections to remove, both ways
+        "goal_tiles": [5, 15],                  optional with a grid
+        "start": {"wolf_link": 11, "statues": [[13, "shadow"], [9, "mirror"]]}   optional with a grid
+    }
+
+Explicit edges are added both ways, the reverse one with the opposite direction.
+"""
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from sacred_grove.transition_kernel import DIRECTION_CODES, DIRECTIONS, OPPOSITE_DIRECTION_CODES, STATUE_PATTERNS, TransitionKernel
+
+STATUE_LETTERS = {
+    'S': 'shadow',
+    'M': 'mirror',
+    'C': 'clockwise',
+    'A': 'counterclockwise',
+    'V': 'flip_vertical',
+    'H': 'flip_horizontal',
+}
+# Row and column offsets of every direction on an ASCII grid.
+GRID_OFFSETS = {'N': (-1, 0), 'S': (1, 0), 'E': (0, 1), 'W': (0, -1)}
+
+
+@dataclass(frozen=True)
+class Board:
+    """A puzzle board: tiles, their connections, goal tiles and start placement."""
+    tiles: tuple[int, ...]
+    # Directed (origin, destination, direction) connections.
+    edges: tuple[tuple[int, int, str], ...]
+    goal_tiles: frozenset[int]
+    # Wolf Link's tile followed by every statue's tile.
+    start: tuple[int, ...]
+    statue_patterns: tuple[str, ...] = ('shadow', 'mirror')
+    name: str = field(default='', compare=False)
+
+    def __post_init__(self):
+        tiles = set(self.tiles)
+        if len(self.start) != len(self.statue_patterns) + 1:
+            raise ValueError(f"Board {self.name!r}: start {self.start} does not match {len(self.statue_patterns)} statues")
+        if len(set(self.start)) != len(self.start) or not set(self.start) <= tiles:
+            raise ValueError(f"Board {self.name!r}: start {self.start} must be distinct tiles of the board")
+        if len(self.goal_tiles) != len(self.statue_patterns) or not self.goal_tiles <= tiles:
+            raise ValueError(f"Board {self.name!r}: needs one goal tile of the board per statue, got {sorted(self.goal_tiles)}")
+        unknown_patterns = set(self.statue_patterns) - set(STATUE_PATTERNS)
+        if unknown_patterns:
+            raise ValueError(f"Board {self.name!r}: unknown statue patterns {sorted(unknown_patterns)}")
+
+    @property
+    def number_of_tiles(self) -> int:
+        return len(self.tiles)
+
+    def kernel(self) -> TransitionKernel:
+        """Compile the board's move table, without going through networkx."""
+        return TransitionKernel.from_edges(self.tiles, self.edges, self.statue_patterns)
+
+    def tile_graph(self):
+        """The board as a tile graph with 'dir' edge attributes, like puzzle_graph.TILE_GRAPH."""
+        import networkx as nx
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self.tiles)
+        for origin, destination, direction in self.edges:
+            graph.add_edge(origin, destination, dir=direction)
+        return graph
+
+    @classmethod
+    def from_ascii(cls, text: str, name: str = '', statue_patterns=None, walls=()) -> 'Board':
+        """Parse an ASCII grid, see the module docstring for the legend.
+
+        Args:
+            text (str): the grid, one row per line. Blank lines around it are ignored.
+            name (str): the board's name.
+            statue_patterns (Sequence[str] | None): reorder the statues: the i-th statue of the state is the
+                first not yet used statue of this pattern in reading order. Defaults to reading order.
+            walls (Iterable[tuple[int, int]]): pairs of neighboring tiles that are not connected.
+
+        Returns:
+            Board: the parsed board.
+        """
+        tiles, edges, goal_tiles, wolf_link, statues = _parse_ascii(text, name)
+        if wolf_link is None:
+            raise ValueError(f"Board {name!r}: the grid has no Wolf Link ('L')")
+        return cls._build(name, tiles, edges, walls, goal_tiles, wolf_link, statues, statue_patterns)
+
+    @classmethod
+    def from_json(cls, spec) -> 'Board':
+        """Build a board from a JSON spec, see the module docstring for the format.
+
+        Args:
+            spec (dict | str | Path): the parsed spec, or the path of a JSON file.
+
+        Returns:
+            Board: the board.
+        """
+        if not isinstance(spec, dict):
+            spec = json.loads(Path(spec).read_text())
+        name = spec.get('name', '')
+        walls = [tuple(wall) for wall in spec.get('walls', ())]
+        start = spec.get('start')
+        if 'grid' in spec:
+            tiles, edges, goal_tiles, wolf_link, statues = _parse_ascii('\n'.join(spec['grid']), name)
+            goal_tiles = spec.get('goal_tiles', goal_tiles)
+        else:
+            tiles = spec['tiles']
+            edges = []
+            for origin, destination, direction in spec['edges']:
+                edges.append((origin, destination, direction))
+                edges.append((destination, origin, DIRECTIONS[OPPOSITE_DIRECTION_CODES[DIRECTION_CODES[direction]]]))
+            goal_tiles = spec['goal_tiles']
+        if start is not None:
+            wolf_link, statues = start['wolf_link'], [tuple(statue) for statue in start['statues']]
+        if wolf_link is None:
+            raise ValueError(f"Board {name!r}: no start given and the grid has no Wolf Link ('L')")
+        return cls._build(name, tiles, edges, walls, goal_tiles, wolf_link, statues, None)
+
+    def to_json(self) -> dict:
+        """The board as a JSON spec with explicit tiles and edges."""
+        edges = [[origin, destination, direction] for origin, destination, direction in self.edges if origin < destination]
+        return {
+            'name': self.name,
+            'tiles': list(self.tiles),
+            'edges': edges,
+            'goal_tiles': sorted(self.goal_tiles),
+            'start': {
+                'wolf_link': self.start[0],
+                'statues': [[position, pattern] for position, pattern in zip(self.start[1:], self.statue_patterns)],
+            },
+        }
+
+    @classmethod
+    def _build(cls, name, tiles, edges, walls, goal_tiles, wolf_link, statues, statue_patterns) -> 'Board':
+        walls = {frozenset(wall) for wall in walls}
+        edges = tuple(sorted(edge for edge in set(edges) if frozenset(edge[:2]) not in walls))
+        if statue_patterns is not None:
+            remaining = list(statues)
+            ordered = []
+            for pattern in statue_patterns:
+                statue = next((statue for statue in remaining if statue[1] == pattern), None)
+                if statue is None:
+                    raise ValueError(f"Board {name!r}: no {pattern} statue left on the grid")
+                remaining.remove(statue)
+                ordered.append(statue)
+            statues = ordered + remaining
+        return cls(
+            tiles=tuple(sorted(tiles)),
+            edges=edges,
+            goal_tiles=frozenset(goal_tiles),
+            start=(wolf_link, *(position for position, _ in statues)),
+            statue_patterns=tuple(pattern for _, pattern in statues),
+            name=name,
+        )
+
+
+def _parse_ascii(text: str, name: str):
+    """Tiles, edges, goal tiles, Wolf Link's tile (or None) and (tile, pattern) statues of an ASCII grid."""
+    rows = [row.rstrip() for row in text.strip('\n').splitlines()]
+    tile_numbers = {}
+    goal_tiles = set()
+    wolf_link = None
+    statues = []
+    for row_number, row in enumerate(rows):
+        for column_number, cell in enumerate(row):
+            if cell in '# ':
+                continue
+            if cell not in '.GL' and cell.upper() not in STATUE_LETTERS:
+                raise ValueError(f"Board {name!r}: unknown cell {cell!r} at row {row_number}, column {column_number}")
+            tile = len(tile_numbers) + 1
+            tile_numbers[row_number, column_number] = tile
+            if cell == 'G' or cell.islower():
+                goal_tiles.add(tile)
+            if cell == 'L':
+                wolf_link = tile
+            elif cell.upper() in STATUE_LETTERS:
+                statues.append((tile, STATUE_LETTERS[cell.upper()]))
+    edges = []
+    for (row_number, column_number), tile in tile_numbers.items():
+        for direction, (row_offset, column_offset) in GRID_OFFSETS.items():
+            neighbor = tile_numbers.get((row_number + row_offset, column_number + column_offset))
+            if neighbor is not None:
+                edges.append((tile, neighbor, direction))
+    return list(tile_numbers.values()), edges, goal_tiles, wolf_link, statues
+
+
+def grid_board(rows: int, columns: int, statue_patterns=('shadow', 'mirror')) -> Board:
+    """A rectangular board with no holes, for benchmarks on boards larger than the Sacred Grove.
+
+    Wolf Link starts on the southern edge, the statues along the northern edge and the goal tiles are
+    spread along the diagonal, one tile away from the edges.
+    """
+    number_of_statues = len(statue_patterns)
+    if columns < number_of_statues or rows < 3:
+        raise ValueError(f"A {rows}x{columns} grid is too small for {number_of_statues} statues")
+    grid = [['.'] * columns for _ in range(rows)]
+    letters = {pattern: letter for letter, pattern in STATUE_LETTERS.items()}
+    statue_columns = [round(statue * (columns - 1) / max(number_of_statues - 1, 1)) for statue in range(number_of_statues)]
+    for statue, (column, pattern) in enumerate(zip(statue_columns, statue_patterns)):
+        grid[0][column] = letters[pattern]
+        fraction = statue / max(number_of_statues - 1, 1)
+        grid[1 + round(fraction * (rows - 3))][1 + round(fraction * (columns - 3))] = 'G'
+    grid[rows - 1][columns // 2] = 'L'
+    return Board.from_ascii('\n'.join(''.join(row) for row in grid), name=f'{rows}x{columns} grid')
+
+
+SACRED_GROVE = Board.from_ascii("""
+...###
+.G...#
+#M.L.S
+.G...#
+...###
+""", name='Sacred Grove', statue_patterns=('shadow', 'mirror'))
+
+GOAL_TILES = SACRED_GROVE.goal_tiles
@@ -0,0 +1,220 @@
+"""The `sacred-grove` command line.
+
+    sacred-grove solve [--start 11 13 9] [--all]     optimal solution from a compiled state graph
+    sacred-grove generate [--board board.json]      compile a board into a binary state graph file
+                          [--metrics metrics.jsonl] [--profile generate.prof] [--trace-memory]
+    sacred-grove walk [--walks 10000] [--exact]     random walk statistics
+    sacred-grove bench [name] [options]             run one of the benchmarks, e.g. `bench suite --compare baseline.json`
+
+`solve` only needs numpy and the memory-mapped state graph file: it never imports networkx and
+never builds a graph, so it answers in a few tens of milliseconds from a cold start. Every other
+dependency is imported by the subcommand that uses it.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_STATE_GRAPH_FILE = Path(__file__).parent / 'state-graph.bin'
+
+
+def load_board(file_name):
+    """A board from a JSON spec or an ASCII grid file, the Sacred Grove if `file_name` is None."""
+    from sacred_grove.board import SACRED_GROVE, Board
+
+    if file_name is None:
+        return SACRED_GROVE
+    path = Path(file_name)
+    if path.suffix == '.json':
+        return Board.from_json(path)
+    return Board.from_ascii(path.read_text(), name=path.stem)
+
+
+def solve(arguments) -> int:
+    from sacred_grove.distance_table import UNREACHABLE, DistanceTable
+    from sacred_grove.state_graph_format import load_state_graph
+
+    state_graph, distance_table = load_state_graph(arguments.file)
+    if distance_table is None:
+        distance_table = DistanceTable.from_state_graph(state_graph)
+    if arguments.start:
+        start = tuple(arguments.start)
+    elif Path(arguments.file).resolve() == DEFAULT_STATE_GRAPH_FILE.resolve():
+        start = load_board(None).start
+    else:
+        # The file does not record the start of its board.
+        print("--start is needed with a state graph file other than state-graph.bin", file=sys.stderr)
+        return 2
+    if len(start) != state_graph.kernel.number_of_statues + 1:
+        print(f"--start needs {state_graph.kernel.number_of_statues + 1} positions: Wolf Link, then every statue", file=sys.stderr)
+        return 2
+    if any(position not in state_graph.kernel.tile_index for position in start):
+        print(f"{start} uses tiles that are not on the board", file=sys.stderr)
+        return 2
+    if start not in distance_table:
+        print(f"{start} is not a state of this state graph (regenerate it with `sacred-grove generate --complete`)", file=sys.stderr)
+        return 1
+    if distance_table.distance(start) == UNREACHABLE:
+        print(f"No solution from {start}.")
+        return 1
+    if arguments.all:
+        from sacred_grove.optimal_solutions import OptimalSolutions
+
+        optimal_solutions = OptimalSolutions(distance_table)
+        print(f"{optimal_solutions.count(start)} optimal solutions of {distance_table.distance(start)} moves from {start}:")
+        for solution in optimal_solutions.iterate(start):
+            print(solution.moves)
+        return 0
+    path, moves = [start], []
+    move = distance_table.best_next_move(start)
+    while move is not None:
+        moves.append(move[0])
+        path.append(move[1])
+        move = distance_table.best_next_move(move[1])
+    print(f"{len(moves)} moves from {start}: {''.join(moves)}")
+    names = state_graph.kernel.position_names
+    for step, state in enumerate(path):
+        print(f"Step {str(step).rjust(2)} | " + ' | '.join(f"{name}: {str(position).rjust(2)}" for name, position in zip(names, state)))
+    return 0
+
+
+def generate(arguments) -> int:
+    from sacred_grove.dead_states import LiveStateIndex
+    from sacred_grove.distance_table import DistanceTable
+    from sacred_grove.instrumentation import Instrumentation, JsonLinesSink, phase_timer
+    from sacred_grove.state_graph_format import save_state_graph
+    from sacred_grove.state_graph_generation import StateGraphGenerator
+
+    instrumentation, sinks = None, []
+    if arguments.metrics or arguments.profile or arguments.trace_memory:
+        sinks = [JsonLinesSink(arguments.metrics)] if arguments.metrics else []
+        instrumentation = Instrumentation(*sinks, profile=arguments.profile or False, trace_memory=arguments.trace_memory).start()
+    phase = phase_timer(instrumentation)
+    board = load_board(arguments.board)
+    generator = StateGraphGenerator.from_board(board)
+    start = time.perf_counter()
+    if arguments.complete:
+        state_graph = generator.complete_state_graph_generation()
+    elif arguments.out_of_core:
+        state_graph = generator.out_of_core_state_graph_generation(arguments.out_of_core).to_compact_state_graph()
+    elif arguments.workers:
+        state_graph = generator.parallel_state_graph_generation(number_of_workers=arguments.workers)
+    else:
+        state_graph = generator.batched_state_graph_generation(instrumentation=instrumentation)
+    with phase('distances'):
+        distance_table = DistanceTable.from_state_graph(state_graph, board.goal_tiles)
+        live_states = LiveStateIndex.from_state_graph(state_graph, board.goal_tiles, distance_table)
+    with phase('serialize'):
+        save_state_graph(arguments.output, state_graph, distance_table, live_states=live_states)
+    print(f"{board.name or 'board'}: {len(state_graph)} states, {state_graph.number_of_edges} edges, "
+          f"{live_states.number_of_live_states} can reach the goal; saved to {arguments.output} in {time.perf_counter() - start:.2f}s")
+    if arguments.graphml:
+        from sacred_grove.state_graph_format import binary_to_graphml
+
+        with phase('graphml'):
+            binary_to_graphml(arguments.output, arguments.graphml)
+        print(f"GraphML saved to {arguments.graphml}")
+    if instrumentation is not None:
+        metrics = instrumentation.finish()
+        for sink in sinks:
+            sink.close()
+        phases = ', '.join(f"{name} {seconds:.3f}s" for name, seconds in metrics['phase_seconds'].items())
+        print(f"{metrics['states_per_second']:,.0f} states/s, duplicate ratio {metrics['duplicate_ratio']:.2f}, "
+              f"peak RSS {(metrics['peak_rss_bytes'] or 0) / 2 ** 20:.1f} MiB; {phases}")
+        if 'tracemalloc_peak_bytes' in metrics:
+            print(f"Peak traced Python allocations: {metrics['tracemalloc_peak_bytes'] / 2 ** 20:.1f} MiB")
+        if instrumentation.profile_stats is not None:
+            instrumentation.profile_stats.sort_stats('cumulative').print_stats(15)
+    return 0
+
+
+def walk(arguments) -> int:
+    from sacred_grove.random_walks import simulate_random_walks
+
+    board = load_board(arguments.board)
+    result = simulate_random_walks(board.kernel(), board.start, board.goal_tiles, number_of_walks=arguments.walks,
+                                   maximum_steps=arguments.steps, seed=arguments.seed)
+    print(f"{result.number_of_walks} random walks from {board.start}: {result.success_rate:.2%} reach the goal within "
+          f"{arguments.steps} moves, mean hitting time {result.mean_hitting_time:.1f}, quantiles {result.quantiles()}")
+    if arguments.exact:
+        from sacred_grove.random_walks import absorbing_chain_analysis
+        from sacred_grove.state_graph_generation import StateGraphGenerator
+
+        state_graph = StateGraphGenerator.from_board(board).batched_state_graph_generation()
+        probability, expected_steps, expected_steps_given_success = absorbing_chain_analysis(state_graph, board.goal_tiles).for_state(board.start)
+        print(f"Exactly: the goal is ever reached with probability {probability:.4f}, expected moves {expected_steps}, "
+              f"{expected_steps_given_success:.1f} given success")
+    return 0
+
+
+def bench(arguments) -> int:
+    import importlib
+    import inspect
+
+    # The benchmarks ship with the source tree, not with the installed package.
+    root = Path(__file__).parent.parent
+    if not (root / 'benchmarks').is_dir():
+        print("The benchmarks are only available from a source checkout", file=sys.stderr)
+        return 2
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+    names = sorted(path.stem for path in (root / 'benchmarks').glob('*.py') if path.stem != '__init__')
+    if arguments.name not in names:
+        print("Benchmarks: " + ', '.join(names), file=sys.stderr if arguments.name else sys.stdout)
+        return 2 if arguments.name else 0
+    benchmark = importlib.import_module(f'benchmarks.{arguments.name}')
+    if inspect.signature(benchmark.main).parameters:
+        return benchmark.main(arguments.options) or 0
+    # Benchmarks without a command line of their own take no options; their docstring is their help.
+    if arguments.options:
+        wants_help = arguments.options in (['-h'], ['--help'])
+        print(benchmark.__doc__.strip() if wants_help else f"benchmarks.{arguments.name} takes no options",
+              file=sys.stdout if wants_help else sys.stderr)
+        return 0 if wants_help else 2
+    return benchmark.main() or 0
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='sacred-grove', description="Solve and analyze the Sacred Grove statue puzzle and its variants.")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    solve_parser = subcommands.add_parser('solve', help="optimal solution from a compiled state graph file")
+    solve_parser.add_argument('--file', default=DEFAULT_STATE_GRAPH_FILE, help="binary state graph file (default: state-graph.bin)")
+    solve_parser.add_argument('--start', type=int, nargs='+', metavar='TILE', help="Wolf Link's tile, then every statue's (default: 11 13 9 with the default file)")
+    solve_parser.add_argument('--all', action='store_true', help="count and list every optimal solution")
+    solve_parser.set_defaults(function=solve)
+
+    generate_parser = subcommands.add_parser('generate', help="compile a board into a binary state graph file")
+    generate_parser.add_argument('--board', help="board JSON spec or ASCII grid file (default: the Sacred Grove)")
+    generate_parser.add_argument('--output', default=DEFAULT_STATE_GRAPH_FILE, help="where to write (default: state-graph.bin)")
+    generate_parser.add_argument('--complete', action='store_true', help="every valid placement instead of the states reachable from the start")
+    generate_parser.add_argument('--workers', type=int, help="generate with this many worker processes")
+    generate_parser.add_argument('--out-of-core', metavar='DIRECTORY', help="generate with bounded memory, keeping the search in DIRECTORY")
+    generate_parser.add_argument('--graphml', help="also write the state graph as GraphML")
+    generate_parser.add_argument('--metrics', metavar='FILE', help="append progress events and metrics to FILE as JSON lines")
+    generate_parser.add_argument('--profile', metavar='FILE', help="run cProfile and save its stats to FILE")
+    generate_parser.add_argument('--trace-memory', action='store_true', help="trace Python allocations with tracemalloc")
+    generate_parser.set_defaults(function=generate)
+
+    walk_parser = subcommands.add_parser('walk', help="random walk statistics")
+    walk_parser.add_argument('--board', help="board JSON spec or ASCII grid file (default: the Sacred Grove)")
+    walk_parser.add_argument('--walks', type=int, default=10000, help="number of walks (default: 10000)")
+    walk_parser.add_argument('--steps', type=int, default=200, help="moves before a walk gives up (default: 200)")
+    walk_parser.add_argument('--seed', type=int, help="random seed")
+    walk_parser.add_argument('--exact', action='store_true', help="also solve the absorbing Markov chain exactly")
+    walk_parser.set_defaults(function=walk)
+
+    bench_parser = subcommands.add_parser('bench', help="run a benchmark, or list them")
+    bench_parser.add_argument('name', nargs='?', help="benchmark module name")
+    bench_parser.add_argument('options', nargs=argparse.REMAINDER, help="options of the benchmark, e.g. `suite --quick --save baseline.json`")
+    bench_parser.set_defaults(function=bench)
+    return parser
+
+
+def main(argv=None) -> int:
+    arguments = parser().parse_args(argv)
+    return arguments.function(arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
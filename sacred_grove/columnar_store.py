@@ -0,0 +1,96 @@
+"""Append-only columnar tables on disk.
+
+A table is a directory with one raw little-endian binary file per column and a schema.json
+describing them:
+
+    {"rows": 7980, "columns": [{"name": "board", "dtype": "<i4"}, ...], "metadata": {...}}
+
+Rows are appended in chunks as they are produced, and reading memory-maps each column, so a
+table can be far larger than memory and a single column can be read without touching the rest.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+SCHEMA_FILE = 'schema.json'
+
+
+class ColumnarWriter:
+    """Writes a columnar table, chunk by chunk.
+
+    Args:
+        directory (str | Path): the table directory, created if needed; an existing table is overwritten.
+        columns (dict[str, np.dtype]): column names and types, in order.
+        metadata (dict | None): JSON data stored in the schema, e.g. what the rows describe.
+    """
+
+    def __init__(self, directory, columns: dict, metadata: dict | None = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.columns = {name: np.dtype(dtype).newbyteorder('<') for name, dtype in columns.items()}
+        self.metadata = metadata or {}
+        self.rows = 0
+        self._files = {name: open(self.directory / f'{name}.bin', 'wb') for name in self.columns}
+        self._write_schema()
+
+    def append(self, chunk: dict) -> None:
+        """Append rows given as one array per column, all of the same length.
+
+        Raises:
+            ValueError: if columns are missing or have different lengths.
+        """
+        if set(chunk) != set(self.columns):
+            raise ValueError(f"expected the columns {list(self.columns)}, got {list(chunk)}")
+        lengths = {len(values) for values in chunk.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"columns have different lengths: { {name: len(values) for name, values in chunk.items()} }")
+        for name, dtype in self.columns.items():
+            self._files[name].write(np.ascontiguousarray(chunk[name], dtype=dtype).tobytes())
+        self.rows += lengths.pop() if lengths else 0
+
+    def close(self) -> None:
+        for file in self._files.values():
+            file.close()
+        self._write_schema()
+
+    def _write_schema(self) -> None:
+        schema = {
+            'rows': self.rows,
+            'columns': [{'name': name, 'dtype': dtype.str} for name, dtype in self.columns.items()],
+            'metadata': self.metadata,
+        }
+        (self.directory / SCHEMA_FILE).write_text(json.dumps(schema, indent=2))
+
+    def __enter__(self) -> 'ColumnarWriter':
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+
+def read_schema(directory) -> dict:
+    return json.loads((Path(directory) / SCHEMA_FILE).read_text())
+
+
+def read_columns(directory, names=None) -> dict[str, np.ndarray]:
+    """Memory-map the columns of a table.
+
+    Args:
+        directory (str | Path): a directory written by ColumnarWriter.
+        names (Iterable[str] | None): columns to read; all of them by default.
+
+    Returns:
+        dict[str, np.ndarray]: read-only arrays, one per column.
+    """
+    directory = Path(directory)
+    schema = read_schema(directory)
+    columns = {}
+    for column in schema['columns']:
+        if names is not None and column['name'] not in names:
+            continue
+        if schema['rows'] == 0:
+            columns[column['name']] = np.empty(0, dtype=column['dtype'])
+        else:
+            columns[column['name']] = np.memmap(directory / f"{column['name']}.bin", dtype=column['dtype'], mode='r', shape=(schema['rows'],))
+    return columns
@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+from sacred_grove.transition_kernel import DIRECTIONS, TransitionKernel
+
+
+@dataclass
+class CompactStateGraph:
+    """State graph held as flat integer arrays instead of a networkx graph.
+
+    Nodes are packed state ids (see TransitionKernel) stored sorted in `states`. Edges are kept
+    in CSR form: the edges leaving node i are offsets[i]:offsets[i + 1] of `targets` (indices
+    into `states`) and `directions` (direction code of Wolf Link's move).
+    """
+    kernel: TransitionKernel
+    states: np.ndarray
+    offsets: np.ndarray
+    targets: np.ndarray
+    directions: np.ndarray
+
+    @classmethod
+    def from_edges(cls, kernel: TransitionKernel, states, sources, targets, directions) -> 'CompactStateGraph':
+        """Build the graph from edges given as parallel arrays of source index, target index and direction code."""
+        offsets, edge_ids = _csr(np.asarray(sources, dtype=np.int64), len(states))
+        return cls(
+            kernel=kernel,
+            states=np.asarray(states, dtype=np.int64),
+            offsets=offsets,
+            targets=np.asarray(targets, dtype=np.int64)[edge_ids],
+            directions=np.asarray(directions, dtype=np.uint8)[edge_ids],
+        )
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    @property
+    def number_of_edges(self) -> int:
+        return len(self.targets)
+
+    @cached_property
+    def sources(self) -> np.ndarray:
+        """Source index of every edge."""
+        return np.repeat(np.arange(len(self.states), dtype=np.int64), np.diff(self.offsets))
+
+    def index_of(self, state: int) -> int:
+        """Index of a packed state id in `states`, or -1 if the state is not in the graph."""
+        index = int(np.searchsorted(self.states, state))
+        if index < len(self.states) and self.states[index] == state:
+            return index
+        return -1
+
+    def indices_of(self, states) -> np.ndarray:
+        """Vectorized `index_of`."""
+        states = np.asarray(states, dtype=np.int64)
+        if len(self.states) == 0:
+            return np.full(states.shape, -1, dtype=np.int64)
+        indices = np.searchsorted(self.states, states)
+        clipped = np.minimum(indices, len(self.states) - 1)
+        return np.where(self.states[clipped] == states, clipped, -1)
+
+    def predecessor_csr(self) -> tuple[np.ndarray, np.ndarray]:
+        """Incoming edges in CSR form.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: offsets (len(states) + 1) and edge ids sorted by target.
+        """
+        return _csr(self.targets, len(self.states))
+
+    def reachable_mask(self, index: int) -> np.ndarray:
+        """Boolean mask of the states reachable from the state at `index`, itself included.
+
+        A graph from complete_state_graph_generation holds every placement; this picks out the
+        part batched_state_graph_generation would have generated from that start.
+        """
+        reached = np.zeros(len(self.states), dtype=bool)
+        frontier = np.array([index], dtype=np.int64)
+        reached[frontier] = True
+        while frontier.size:
+            targets = gather_csr(self.offsets, self.targets, frontier)
+            frontier = np.unique(targets[~reached[targets]])
+            reached[frontier] = True
+        return reached
+
+    def state_tuples(self) -> list[tuple[int, ...]]:
+        """(wolf_link_position, shadow_statue_position, mirror_statue_position) of every node, or more positions with more statues."""
+        return [self.kernel.unpack(state) for state in self.states.tolist()]
+
+    def to_networkx(self):
+        """Build the same nx.DiGraph brute_force_state_graph_generation returns.
+
+        Edges additionally carry the 'dir' of Wolf Link's move.
+        """
+        import networkx as nx
+
+        position_names = self.kernel.position_names
+        state_graph = nx.DiGraph()
+        nodes = self.state_tuples()
+        for node in nodes:
+            state_graph.add_node(node, **dict(zip(position_names, node)))
+        for source, target, direction in zip(self.sources.tolist(), self.targets.tolist(), self.directions.tolist()):
+            state_graph.add_edge(nodes[source], nodes[target], dir=DIRECTIONS[direction])
+        return state_graph
+
+
+def _csr(keys: np.ndarray, number_of_nodes: int) -> tuple[np.ndarray, np.ndarray]:
+    edge_ids = np.argsort(keys, kind='stable')
+    offsets = np.zeros(number_of_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=number_of_nodes), out=offsets[1:])
+    return offsets, edge_ids
+
+
+def gather_csr(offsets: np.ndarray, values: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Concatenate the CSR rows of `nodes`, i.e. values[offsets[node]:offsets[node + 1]] for each node."""
+    starts = offsets[nodes]
+    lengths = offsets[nodes + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return values[:0]
+    # Position of every gathered entry: its row start plus its rank inside the row.
+    row_firsts = np.cumsum(lengths) - lengths
+    positions = np.arange(total, dtype=np.int64) - np.repeat(row_firsts - starts, lengths)
+    return values[positions]
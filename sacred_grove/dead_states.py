@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+from sacred_grove.bitset import new_bitset, set_bits, test_bits
+from sacred_grove.board import GOAL_TILES
+from sacred_grove.compact_state_graph import CompactStateGraph, gather_csr
+from sacred_grove.distance_table import UNREACHABLE, DistanceTable, goal_state_mask
+
+
+@dataclass
+class LiveStateIndex:
+    """Which states of a state graph can still reach a goal state.
+
+    A state is live if some sequence of moves leads from it to a goal state, and dead otherwise:
+    once in a dead state the puzzle cannot be solved any more. `live` is a bitset over the
+    indices of `state_graph.states`, one bit per state, so it can be stored next to the graph.
+    """
+    state_graph: CompactStateGraph
+    live: np.ndarray
+
+    @classmethod
+    def from_state_graph(cls, state_graph: CompactStateGraph, goal_tiles=GOAL_TILES,
+                         distance_table: DistanceTable | None = None) -> 'LiveStateIndex':
+        """Reverse reachability from every goal state of `state_graph`.
+
+        Args:
+            state_graph (CompactStateGraph): a state graph closed under moves, e.g. from batched_state_graph_generation.
+            goal_tiles (Iterable[int]): tiles the statues must occupy.
+            distance_table (DistanceTable | None): reused instead of walking the graph again, if given.
+
+        Returns:
+            LiveStateIndex: the live states of the graph.
+        """
+        if distance_table is not None:
+            live_indices = np.flatnonzero(distance_table.distances != UNREACHABLE)
+        else:
+            reached = goal_state_mask(state_graph, goal_tiles)
+            frontier = np.flatnonzero(reached)
+            offsets, edge_ids = state_graph.predecessor_csr()
+            predecessors = state_graph.sources[edge_ids]
+            while frontier.size:
+                candidates = gather_csr(offsets, predecessors, frontier)
+                frontier = np.unique(candidates[~reached[candidates]])
+                reached[frontier] = True
+            live_indices = np.flatnonzero(reached)
+        live = new_bitset(len(state_graph))
+        set_bits(live, live_indices)
+        return cls(state_graph, live)
+
+    @property
+    def number_of_live_states(self) -> int:
+        return int(np.unpackbits(self.live, count=len(self.state_graph), bitorder='little').sum())
+
+    def live_mask(self) -> np.ndarray:
+        """Boolean mask over the states of the graph."""
+        return np.unpackbits(self.live, count=len(self.state_graph), bitorder='little').astype(bool)
+
+    def are_live(self, states) -> np.ndarray:
+        """Vectorized `is_live` for packed states."""
+        indices = self.state_graph.indices_of(states)
+        return (indices < 0) | test_bits(self.live, np.maximum(indices, 0))
+
+    def is_live(self, state: int) -> bool:
+        """Whether a packed state can still reach a goal state.
+
+        States outside the graph are not known to be dead, so they count as live.
+        """
+        return state not in self._dead_states
+
+    @cached_property
+    def _dead_states(self) -> frozenset[int]:
+        # Scalar lookups from Search go through a hash set, a binary search per move is too slow there.
+        return frozenset(self.state_graph.states[~self.live_mask()].tolist())
+
+
+def prune_dead_states(state_graph: CompactStateGraph, live_states: LiveStateIndex) -> CompactStateGraph:
+    """The subgraph of the live states and the moves between them.
+
+    Args:
+        state_graph (CompactStateGraph): the graph `live_states` was computed for, or a part of it.
+        live_states (LiveStateIndex): which states can reach a goal state.
+
+    Returns:
+        CompactStateGraph: a graph without dead states; distances to the goal are unchanged.
+    """
+    keep = live_states.are_live(state_graph.states)
+    new_index = np.cumsum(keep) - 1
+    kept_edges = keep[state_graph.sources] & keep[state_graph.targets]
+    return CompactStateGraph.from_edges(
+        state_graph.kernel,
+        state_graph.states[keep],
+        sources=new_index[state_graph.sources[kept_edges]],
+        targets=new_index[state_graph.targets[kept_edges]],
+        directions=state_graph.directions[kept_edges],
+    )
+
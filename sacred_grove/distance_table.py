@@ -0,0 +1,130 @@
+import numpy as np
+
+from sacred_grove.board import GOAL_TILES
+from sacred_grove.compact_state_graph import CompactStateGraph, gather_csr
+from sacred_grove.transition_kernel import DIRECTIONS
+
+# Distance of states that cannot reach any goal state.
+UNREACHABLE = -1
+
+
+class DistanceTable:
+    """Number of moves left to the closest goal state, for every state of a state graph.
+
+    The table is filled by a single breadth-first pass that walks the state graph backwards
+    from all goal states at once. After that, the distance of a state, the best move from it
+    and a full optimal solution are lookups in the table instead of new searches.
+    """
+
+    def __init__(self, state_graph: CompactStateGraph, distances: np.ndarray, goal_tiles=GOAL_TILES):
+        self.state_graph = state_graph
+        self.kernel = state_graph.kernel
+        self.distances = distances
+        self.goal_tiles = frozenset(goal_tiles)
+
+    @classmethod
+    def from_state_graph(cls, state_graph: CompactStateGraph, goal_tiles=GOAL_TILES) -> 'DistanceTable':
+        """Reverse multi-source BFS from every goal state of `state_graph`.
+
+        Args:
+            state_graph (CompactStateGraph): e.g. from StateGraphGenerator.batched_state_graph_generation,
+                or complete_state_graph_generation to answer queries for any placement.
+            goal_tiles (Iterable[int]): tiles the statues must occupy, in any order.
+
+        Returns:
+            DistanceTable: distances for every state of the graph, UNREACHABLE if no goal can be reached.
+        """
+        distances = np.full(len(state_graph), UNREACHABLE, dtype=np.int32)
+        frontier = np.flatnonzero(goal_state_mask(state_graph, goal_tiles))
+        distances[frontier] = 0
+        offsets, edge_ids = state_graph.predecessor_csr()
+        predecessors = state_graph.sources[edge_ids]
+        distance = 0
+        while frontier.size:
+            distance += 1
+            candidates = gather_csr(offsets, predecessors, frontier)
+            frontier = np.unique(candidates[distances[candidates] == UNREACHABLE])
+            distances[frontier] = distance
+        return cls(state_graph, distances, goal_tiles)
+
+    def index(self, state: tuple[int, ...]) -> int:
+        """Index of `state` in the state graph.
+
+        Args:
+            state (tuple[int, ...]): Wolf Link's tile followed by every statue's tile,
+                (wolf_link_position, shadow_statue_position, mirror_statue_position) on the Sacred Grove.
+
+        Raises:
+            KeyError: if `state` is not in the state graph: not a placement on the board, or not reachable
+                from the start the graph was generated from (see complete_state_graph_generation).
+        """
+        index = -1
+        if len(state) == self.kernel.number_of_statues + 1 and all(position in self.kernel.tile_index for position in state):
+            index = self.state_graph.index_of(self.kernel.pack(*state))
+        if index < 0:
+            raise KeyError(f"{tuple(state)} is not a state of this state graph")
+        return index
+
+    def __contains__(self, state: tuple[int, ...]) -> bool:
+        try:
+            self.index(state)
+        except KeyError:
+            return False
+        return True
+
+    def distance(self, state: tuple[int, ...]) -> int:
+        """Number of moves of an optimal solution from `state`.
+
+        Args:
+            state (tuple[int, ...]): Wolf Link's tile followed by every statue's tile,
+                (wolf_link_position, shadow_statue_position, mirror_statue_position) on the Sacred Grove.
+
+        Returns:
+            int: the distance to the closest goal state, UNREACHABLE if there is none.
+
+        Raises:
+            KeyError: if `state` is not in the state graph, see index.
+        """
+        return int(self.distances[self.index(state)])
+
+    def best_next_move(self, state: tuple[int, ...]) -> tuple[str, tuple[int, ...]] | None:
+        """An optimal move from `state`.
+
+        Returns:
+            tuple[str, tuple[int, ...]] | None: the direction and the resulting state,
+                or None if `state` is a goal state or cannot reach one.
+
+        Raises:
+            KeyError: if `state` is not in the state graph, see index.
+        """
+        distance = self.distance(state)
+        if distance <= 0:
+            return None
+        for direction, next_state in self.kernel.next_states(self.kernel.pack(*state)):
+            index = self.state_graph.index_of(next_state)
+            if index >= 0 and self.distances[index] == distance - 1:
+                return DIRECTIONS[direction], self.kernel.unpack(next_state)
+        return None
+
+    def solve(self, start: tuple[int, ...]) -> list[tuple[int, ...]] | None:
+        """An optimal solution from `start`.
+
+        Returns:
+            list[tuple[int, ...]] | None: the states from `start` to a goal state, or None if unsolvable.
+
+        Raises:
+            KeyError: if `start` is not in the state graph, see index.
+        """
+        if self.distance(start) == UNREACHABLE:
+            return None
+        path = [start]
+        move = self.best_next_move(start)
+        while move is not None:
+            path.append(move[1])
+            move = self.best_next_move(move[1])
+        return path
+
+
+def goal_state_mask(state_graph: CompactStateGraph, goal_tiles=GOAL_TILES) -> np.ndarray:
+    """Boolean mask of the states of `state_graph` where the statues occupy exactly `goal_tiles`."""
+    return state_graph.kernel.goal_state_mask(state_graph.states, goal_tiles)
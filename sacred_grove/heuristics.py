@@ -0,0 +1,67 @@
+from itertools import permutations
+
+import numpy as np
+
+from sacred_grove.transition_kernel import TransitionKernel
+
+# Tile distance between tiles that are not connected.
+NO_PATH = -1
+
+
+def all_pairs_tile_distances(kernel: TransitionKernel) -> np.ndarray:
+    """Number of moves between every pair of tiles, by a breadth-first search from every tile at once.
+
+    Returns:
+        np.ndarray: (number of tiles, number of tiles) array, distances[origin, destination], NO_PATH if unreachable.
+    """
+    number_of_tiles = kernel.number_of_tiles
+    reached = np.eye(number_of_tiles, dtype=bool)
+    distances = np.where(reached, 0, NO_PATH).astype(np.int32)
+    distance = 0
+    while True:
+        distance += 1
+        # An origin reaches a destination within `distance` moves if one of its neighbors does within `distance - 1`.
+        newly_reached = reached[kernel.move_table].any(axis=1) & ~reached
+        if not newly_reached.any():
+            return distances
+        distances[newly_reached] = distance
+        reached |= newly_reached
+
+
+class TileDistanceHeuristic:
+    """Admissible lower bound on the number of moves left to a goal state.
+
+    Every move takes each statue at most one tile further, so a state needs at least as many
+    moves as its farthest statue is from its goal tile. The bound is the minimum of that over
+    every way of assigning the statues to the goal tiles.
+    """
+
+    def __init__(self, kernel: TransitionKernel, goal_tiles):
+        self.kernel = kernel
+        self.goal_indices = frozenset(kernel.tile_index[tile] for tile in goal_tiles)
+        tile_distances = all_pairs_tile_distances(kernel)
+        goal_columns = sorted(self.goal_indices)
+        # Distance from every tile to every goal tile, as plain lists for fast scalar lookups.
+        self._goal_distances = tile_distances[:, goal_columns].tolist()
+        self._assignments = list(permutations(range(len(goal_columns))))
+
+    def __call__(self, state: int) -> float:
+        """Lower bound for a packed state; infinite if some assignment is impossible for every statue layout."""
+        _, *statues = self.kernel.unpack_indices(state)
+        goal_distances = self._goal_distances
+        best = float('inf')
+        for assignment in self._assignments:
+            farthest = 0
+            for statue, goal in zip(statues, assignment):
+                distance = goal_distances[statue][goal]
+                if distance == NO_PATH:
+                    farthest = float('inf')
+                    break
+                farthest = max(farthest, distance)
+            best = min(best, farthest)
+        return best
+
+    def is_goal(self, state: int) -> bool:
+        """Whether the statues of a packed state occupy exactly the goal tiles."""
+        _, *statues = self.kernel.unpack_indices(state)
+        return set(statues) == self.goal_indices
@@ -0,0 +1,338 @@
+"""Update a compiled state graph and its distance table after a small change to the board.
+
+A move from a state only depends on the move-table rows of the tiles Wolf Link and the statues
+stand on. When tiles or connections are added or removed, only the tiles whose row changed
+(the tiles next to the change) and the new tiles are affected, so only the states with a piece
+on one of them get their moves recomputed; the edges of every other state are copied over.
+New states reached by the recomputed moves are explored with the batched kernel, like
+StateGraphGenerator.batched_state_graph_generation does.
+
+Distances are then repaired with a dynamic shortest-path update instead of a new reverse BFS
+over the whole graph:
+
+    1. Invalidate, level by level from the goal, every state that lost all its moves one step
+       closer to the goal (its edges changed, it is no longer a goal state, or all such
+       successors were invalidated before it). Only these distances can increase.
+    2. Give the invalidated states, the states whose moves changed and the new goal states a
+       tentative distance from their successors, then settle them level by level, lowering the
+       distance of predecessors as in a breadth-first search.
+
+Both passes only touch the states around the change and their predecessors. When the goals
+move, or the first pass invalidates a large share of the graph, the distances are recomputed
+with one reverse BFS instead.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from sacred_grove.bitset import bitset_members, new_bitset, set_bits, test_bits
+from sacred_grove.board import Board
+from sacred_grove.compact_state_graph import CompactStateGraph, gather_csr
+from sacred_grove.distance_table import UNREACHABLE, DistanceTable
+from sacred_grove.transition_kernel import DIRECTION_CODES, DIRECTIONS, INVALID_STATE, OPPOSITE_DIRECTION_CODES, TransitionKernel
+
+# Distance of invalidated states during the repair, larger than any real distance.
+_INFINITY = np.iinfo(np.int64).max // 2
+# Share of invalidated states above which the repair gives way to a full reverse search.
+_FULL_SEARCH_SHARE = 0.25
+
+
+@dataclass(frozen=True)
+class BoardDelta:
+    """A change to a board: tiles and connections added or removed, goals moved."""
+    added_tiles: tuple[int, ...] = ()
+    removed_tiles: tuple[int, ...] = ()
+    # (origin, destination, direction) connections, added both ways like the edges of a JSON board spec.
+    added_edges: tuple[tuple[int, int, str], ...] = ()
+    # (tile, tile) pairs disconnected both ways, like walls.
+    removed_edges: tuple[tuple[int, int], ...] = ()
+    # The new goal tiles, None to keep them.
+    goal_tiles: frozenset[int] | None = None
+
+    def apply_to_edges(self, tiles, edges) -> tuple[list[int], list[tuple[int, int, str]]]:
+        """Tiles and directed (origin, destination, direction) edges after the change.
+
+        Raises:
+            ValueError: if an added tile exists already or a removed tile or connection does not.
+        """
+        tiles = set(tiles)
+        if tiles & set(self.added_tiles):
+            raise ValueError(f"Tiles {sorted(tiles & set(self.added_tiles))} are already on the board")
+        if not set(self.removed_tiles) <= tiles:
+            raise ValueError(f"Tiles {sorted(set(self.removed_tiles) - tiles)} are not on the board")
+        tiles = (tiles | set(self.added_tiles)) - set(self.removed_tiles)
+        walls = {frozenset(wall) for wall in self.removed_edges}
+        existing = {frozenset((origin, destination)) for origin, destination, _ in edges}
+        if not walls <= existing:
+            raise ValueError(f"Connections {sorted(tuple(sorted(wall)) for wall in walls - existing)} are not on the board")
+        edges = {
+            (origin, destination, direction) for origin, destination, direction in edges
+            if origin in tiles and destination in tiles and frozenset((origin, destination)) not in walls
+        }
+        for origin, destination, direction in self.added_edges:
+            if origin not in tiles or destination not in tiles:
+                raise ValueError(f"Connection {(origin, destination, direction)} uses tiles that are not on the board")
+            edges.add((origin, destination, direction))
+            edges.add((destination, origin, DIRECTIONS[OPPOSITE_DIRECTION_CODES[DIRECTION_CODES[direction]]]))
+        return sorted(tiles), sorted(edges)
+
+    def apply(self, board: Board) -> Board:
+        """The changed board; its start must avoid the removed tiles."""
+        tiles, edges = self.apply_to_edges(board.tiles, board.edges)
+        goal_tiles = self.goal_tiles if self.goal_tiles is not None else board.goal_tiles
+        return Board(tuple(tiles), tuple(edges), frozenset(goal_tiles), board.start, board.statue_patterns, board.name)
+
+    def apply_to_kernel(self, kernel: TransitionKernel) -> TransitionKernel:
+        """The kernel of the changed board."""
+        edges = [
+            (kernel.tiles[origin], kernel.tiles[destination], DIRECTIONS[direction])
+            for origin, row in enumerate(kernel.move_table.tolist())
+            for direction, destination in enumerate(row) if destination != origin
+        ]
+        tiles, edges = self.apply_to_edges(kernel.tiles, edges)
+        return TransitionKernel.from_edges(tiles, edges, kernel.statue_patterns)
+
+
+@dataclass
+class IncrementalUpdate:
+    """Outcome of update_state_graph."""
+    distance_table: DistanceTable
+    # States whose moves were computed: states with a piece on a changed tile and new states.
+    states_recomputed: int
+    states_added: int
+    states_removed: int
+    # States whose distance to the goal changed, counting new states.
+    distances_changed: int
+    details: dict = field(default_factory=dict)
+
+    @property
+    def state_graph(self) -> CompactStateGraph:
+        return self.distance_table.state_graph
+
+
+def update_state_graph(distance_table: DistanceTable, delta: BoardDelta, complete: bool = False) -> IncrementalUpdate:
+    """Apply a board change to a state graph and its distance table.
+
+    The updated graph is closed under moves like the original: every successor of one of its
+    states is in it. States that are no longer reachable from the start are kept; with
+    `complete`, the graph is expected to hold every valid placement (see
+    StateGraphGenerator.complete_state_graph_generation) and the placements using added tiles
+    are added, so the result equals a complete regeneration.
+
+    Args:
+        distance_table (DistanceTable): distances of the state graph to update, e.g. from load_state_graph.
+        delta (BoardDelta): the change.
+        complete (bool): whether the graph holds every valid placement.
+
+    Returns:
+        IncrementalUpdate: the updated distance table, its state graph and what was recomputed.
+
+    Raises:
+        ValueError: if the change does not apply to the board or a goal tile is removed.
+    """
+    old_graph = distance_table.state_graph
+    old_kernel = old_graph.kernel
+    kernel = delta.apply_to_kernel(old_kernel)
+    goal_tiles = frozenset(delta.goal_tiles if delta.goal_tiles is not None else distance_table.goal_tiles)
+    if not goal_tiles <= set(kernel.tiles):
+        raise ValueError(f"Goal tiles {sorted(goal_tiles - set(kernel.tiles))} are not on the board")
+
+    # The packing keeps the order of the surviving states: tile indices follow the labels.
+    index_map = np.array([kernel.tile_index.get(tile, -1) for tile in old_kernel.tiles], dtype=np.int64)
+    placements = index_map[old_kernel.unpack_batch(old_graph.states)]
+    surviving = np.all(placements >= 0, axis=1)
+    placements = placements[surviving]
+    kept_states = kernel.pack_batch(placements)
+    affected = _changed_tiles(old_kernel, kernel)[placements].any(axis=1)
+    seeds = kept_states[affected]
+    if complete:
+        seeds = _unique(np.concatenate([seeds, _placements_with_tiles(kernel, [kernel.tile_index[tile] for tile in delta.added_tiles])]))
+
+    # Recompute the moves of the affected states and explore the new states they lead to.
+    visited = new_bitset(kernel.number_of_states)
+    set_bits(visited, kept_states)
+    set_bits(visited, seeds)
+    frontier = seeds
+    edge_sources, edge_targets, edge_directions, recomputed = [], [], [], []
+    while frontier.size:
+        recomputed.append(frontier)
+        successors = kernel.successors_batch(frontier)
+        rows, directions = np.nonzero(successors != INVALID_STATE)
+        targets = successors[rows, directions]
+        edge_sources.append(frontier[rows])
+        edge_targets.append(targets)
+        edge_directions.append(directions.astype(np.uint8))
+        frontier = _unique(targets[~test_bits(visited, targets)])
+        set_bits(visited, frontier)
+    recomputed = np.concatenate(recomputed) if recomputed else np.empty(0, dtype=np.int64)
+    states = bitset_members(visited, kernel.number_of_states)
+    if len(recomputed) or not surviving.all():
+        state_graph = _splice_edges(kernel, states, old_graph, surviving, affected, kept_states, edge_sources, edge_targets, edge_directions)
+    else:
+        state_graph = CompactStateGraph(kernel, old_graph.states, old_graph.offsets, old_graph.targets, old_graph.directions)
+
+    distances = np.full(len(states), UNREACHABLE, dtype=np.int32)
+    kept_indices = np.searchsorted(states, kept_states)
+    distances[kept_indices] = distance_table.distances[surviving]
+    old_distances = distances.copy()
+    if goal_tiles != distance_table.goal_tiles:
+        # Moving the goals changes the distances all over the graph: one reverse search is cheaper.
+        repaired, invalidated = DistanceTable.from_state_graph(state_graph, goal_tiles).distances, len(states)
+    else:
+        repaired, invalidated = _repair_distances(state_graph, distances, np.searchsorted(states, recomputed), goal_tiles)
+    added = len(states) - len(kept_states)
+    return IncrementalUpdate(
+        distance_table=DistanceTable(state_graph, repaired, goal_tiles),
+        states_recomputed=len(recomputed),
+        states_added=added,
+        states_removed=int(np.count_nonzero(~surviving)),
+        distances_changed=int(np.count_nonzero(repaired != old_distances)),
+        details={'changed_tiles': [kernel.tiles[tile] for tile in np.flatnonzero(_changed_tiles(old_kernel, kernel))],
+                 'distances_invalidated': invalidated},
+    )
+
+
+def _changed_tiles(old_kernel: TransitionKernel, kernel: TransitionKernel) -> np.ndarray:
+    # Mask over the new tile indices of the tiles that are new or whose neighbor in some direction changed.
+    old_rows = {tile: tuple(old_kernel.tiles[neighbor] for neighbor in row) for tile, row in zip(old_kernel.tiles, old_kernel.move_table.tolist())}
+    return np.array([
+        old_rows.get(tile) != tuple(kernel.tiles[neighbor] for neighbor in row)
+        for tile, row in zip(kernel.tiles, kernel.move_table.tolist())
+    ], dtype=bool)
+
+
+def _placements_with_tiles(kernel: TransitionKernel, tiles) -> np.ndarray:
+    # Sorted valid placements with a piece on at least one of `tiles`: the first such piece is at slot `first`.
+    if not len(tiles):
+        return np.empty(0, dtype=np.int64)
+    tiles = np.asarray(tiles, dtype=np.int64)
+    others = np.setdiff1d(np.arange(kernel.number_of_tiles), tiles)
+    everything = np.arange(kernel.number_of_tiles)
+    number_of_positions = kernel.number_of_statues + 1
+    states = []
+    for first in range(number_of_positions):
+        slots = [others] * first + [tiles] + [everything] * (number_of_positions - first - 1)
+        grids = np.meshgrid(*slots, indexing='ij')
+        states.append(kernel.pack_batch(np.stack([grid.ravel() for grid in grids], axis=-1)))
+    states = np.concatenate(states)
+    return np.sort(states[kernel.valid_placement_mask(states)])
+
+
+def _splice_edges(kernel, states, old_graph, surviving, affected, kept_states, edge_sources, edge_targets, edge_directions) -> CompactStateGraph:
+    # CSR of the updated graph: the unaffected states' edges copied row by row, the recomputed rows in between.
+    new_index_of_old = np.full(len(old_graph), -1, dtype=np.int64)
+    new_index_of_old[np.flatnonzero(surviving)] = np.searchsorted(states, kept_states)
+    copied = np.flatnonzero(surviving)[~affected]
+    recomputed_sources = np.searchsorted(states, np.concatenate(edge_sources)) if edge_sources else np.empty(0, dtype=np.int64)
+    degrees = np.zeros(len(states), dtype=np.int64)
+    degrees[new_index_of_old[copied]] = np.diff(old_graph.offsets)[copied]
+    degrees += np.bincount(recomputed_sources, minlength=len(states))
+    offsets = np.zeros(len(states) + 1, dtype=np.int64)
+    np.cumsum(degrees, out=offsets[1:])
+    targets = np.empty(offsets[-1], dtype=np.int64)
+    directions = np.empty(offsets[-1], dtype=np.uint8)
+
+    copied_edges, rows = _row_edges(old_graph.offsets, copied)
+    copied_sources = copied[rows]
+    positions = offsets[new_index_of_old[copied_sources]] + copied_edges - old_graph.offsets[copied_sources]
+    targets[positions] = new_index_of_old[old_graph.targets[copied_edges]]
+    directions[positions] = old_graph.directions[copied_edges]
+
+    if len(recomputed_sources):
+        # Every recomputed row is contiguous and in direction order, as np.nonzero returns it.
+        row_starts = np.flatnonzero(np.r_[True, recomputed_sources[1:] != recomputed_sources[:-1]])
+        ranks = np.arange(len(recomputed_sources)) - np.repeat(row_starts, np.diff(np.r_[row_starts, len(recomputed_sources)]))
+        positions = offsets[recomputed_sources] + ranks
+        targets[positions] = np.searchsorted(states, np.concatenate(edge_targets))
+        directions[positions] = np.concatenate(edge_directions)
+    return CompactStateGraph(kernel, states, offsets, targets, directions)
+
+
+def _repair_distances(state_graph: CompactStateGraph, distances: np.ndarray, changed: np.ndarray, goal_tiles) -> tuple[np.ndarray, int]:
+    # Dynamic update of the reverse BFS distances after the moves of the `changed` states and the goals changed.
+    distance = distances.astype(np.int64)
+    distance[distance == UNREACHABLE] = _INFINITY
+    goals = state_graph.kernel.goal_state_mask(state_graph.states, goal_tiles)
+    changed = _unique(np.concatenate([changed, np.flatnonzero(goals != (distance == 0))]))
+    predecessor_offsets, edge_ids = state_graph.predecessor_csr()
+    predecessors = state_graph.sources[edge_ids]
+
+    # 1. Invalidate the states whose distance may have increased, in order of distance.
+    invalid = np.zeros(len(state_graph), dtype=bool)
+    candidates = changed[(distance[changed] < _INFINITY) & ~goals[changed]]
+    pending = np.empty(0, dtype=np.int64)
+    number_invalid = 0
+    for level, starting in _by_level(candidates, distance, lambda: pending.size > 0):
+        nodes = _unique(np.concatenate([starting, pending]))
+        nodes = nodes[(distance[nodes] == level) & ~invalid[nodes] & ~goals[nodes]]
+        unsupported = nodes[~_has_successor(state_graph, nodes, lambda targets: ~invalid[targets] & (distance[targets] == level - 1))]
+        invalid[unsupported] = True
+        number_invalid += len(unsupported)
+        if number_invalid > len(state_graph) * _FULL_SEARCH_SHARE:
+            # Most distances are stale, e.g. after the goals moved: one reverse search is cheaper.
+            return DistanceTable.from_state_graph(state_graph, goal_tiles).distances, len(state_graph)
+        pending = gather_csr(predecessor_offsets, predecessors, unsupported)
+        pending = pending[distance[pending] == level + 1]
+
+    # 2. Settle the invalidated, changed and goal states level by level from tentative distances.
+    distance[invalid] = _INFINITY
+    distance[goals] = 0
+    seeds = _unique(np.concatenate([np.flatnonzero(invalid), changed]))
+    seeds = seeds[~goals[seeds]]
+    distance[seeds] = np.minimum(distance[seeds], _best_successor_distance(state_graph, seeds, distance) + 1)
+    seeds = _unique(np.concatenate([seeds[distance[seeds] < _INFINITY], np.flatnonzero(goals & (distances != 0))]))
+    frontier = np.empty(0, dtype=np.int64)
+    for level, starting in _by_level(seeds, distance, lambda: frontier.size > 0):
+        # Seeds lowered by an earlier level were settled then.
+        frontier = _unique(np.concatenate([frontier, starting]))
+        frontier = frontier[distance[frontier] == level]
+        candidates = gather_csr(predecessor_offsets, predecessors, frontier)
+        frontier = _unique(candidates[distance[candidates] > level + 1])
+        distance[frontier] = level + 1
+    repaired = np.where(distance >= _INFINITY, UNREACHABLE, distance).astype(np.int32)
+    return repaired, int(np.count_nonzero(invalid))
+
+
+def _unique(values: np.ndarray) -> np.ndarray:
+    # np.unique by sorting, faster than its hash table on large integer arrays.
+    values = np.sort(values)
+    return values[np.r_[True, values[1:] != values[:-1]]] if len(values) else values
+
+
+def _by_level(nodes: np.ndarray, distance: np.ndarray, carrying):
+    # Levels in increasing order, each with the nodes whose distance it was when the iteration started.
+    # Levels without such nodes are only visited while carrying() says the previous level passed work on.
+    levels = distance[nodes]
+    order = np.argsort(levels, kind='stable')
+    nodes, levels = nodes[order], levels[order]
+    level = int(levels[0]) if len(levels) else 0
+    first = 0
+    while first < len(nodes) or carrying():
+        if first < len(nodes) and not carrying():
+            level = max(level, int(levels[first]))
+        last = int(np.searchsorted(levels, level, side='right'))
+        yield level, nodes[first:last]
+        first = max(first, last)
+        level += 1
+
+
+def _row_edges(offsets: np.ndarray, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Edge indices of the CSR rows of `nodes` and, for each, its position in `nodes`.
+    lengths = offsets[nodes + 1] - offsets[nodes]
+    rows = np.repeat(np.arange(len(nodes)), lengths)
+    row_firsts = np.cumsum(lengths) - lengths
+    return np.arange(len(rows), dtype=np.int64) + (offsets[nodes] - row_firsts)[rows], rows
+
+
+def _has_successor(state_graph: CompactStateGraph, nodes: np.ndarray, condition) -> np.ndarray:
+    # Whether each node has a successor meeting `condition`, a function of target index arrays.
+    edges, rows = _row_edges(state_graph.offsets, nodes)
+    return np.bincount(rows[condition(state_graph.targets[edges])], minlength=len(nodes)) > 0
+
+
+def _best_successor_distance(state_graph: CompactStateGraph, nodes: np.ndarray, distance: np.ndarray) -> np.ndarray:
+    # Smallest distance among the successors of each node, _INFINITY for nodes without successors.
+    edges, rows = _row_edges(state_graph.offsets, nodes)
+    best = np.full(len(nodes), _INFINITY, dtype=np.int64)
+    np.minimum.at(best, rows, distance[state_graph.targets[edges]])
+    return best
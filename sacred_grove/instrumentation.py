@@ -0,0 +1,193 @@
+"""Progress events, counters and profiling hooks for state graph generation and searches.
+
+Generators and searches take an optional `instrumentation` argument. Without it they run their
+plain loops: every hook is behind a test of a local variable, outside the per-state work of
+the batched loops. With it they count what they do and emit events, plain dicts, to the sinks:
+
+    with Instrumentation(JsonLinesSink('metrics.jsonl'), profile=True, trace_memory=True) as instrumentation:
+        state_graph = generator.batched_state_graph_generation(instrumentation=instrumentation)
+        with instrumentation.phase('serialize'):
+            save_state_graph('state-graph.bin', state_graph)
+    print(instrumentation.metrics())
+
+Every event has an "event" name and the "seconds" since the run started. Generators emit a
+"layer" (batched BFS) or "progress" (depth-first) event as they go and a "generation_finished"
+event at the end, searches a "search_finished" event, and the run ends with a "summary" event
+holding metrics(). Counters are plain names: states_expanded, edges_emitted, duplicate_hits,
+and the gauges peak_frontier and peak_stack_depth.
+"""
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process so far, None where the platform does not report it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class JsonLinesSink:
+    """Writes every event as one line of JSON.
+
+    Args:
+        file (str | Path | TextIO): a path, opened for appending, or an open text file.
+    """
+
+    def __init__(self, file):
+        self._owned = isinstance(file, (str, Path))
+        self.file = open(file, 'a') if self._owned else file
+
+    def __call__(self, event: dict) -> None:
+        self.file.write(json.dumps(event, default=str) + '\n')
+        self.file.flush()
+
+    def close(self) -> None:
+        if self._owned:
+            self.file.close()
+
+
+class Instrumentation:
+    """Collects the counters and phase timings of a run and sends its events to sinks.
+
+    Use it as a context manager around the run, or call start() and finish() yourself; the
+    clock starts when it is created otherwise.
+
+    Args:
+        sinks (Callable[[dict], None]): called with every event, e.g. JsonLinesSink or list.append.
+        profile (bool | str | Path): run cProfile over the run; a path also saves the stats there.
+        trace_memory (bool): trace Python allocations with tracemalloc, reported as tracemalloc_peak_bytes.
+        progress_every (int): states between two "progress" events of the depth-first generator.
+    """
+
+    def __init__(self, *sinks, profile=False, trace_memory: bool = False, progress_every: int = 10000):
+        self.sinks = list(sinks)
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.progress_every = progress_every
+        self.counters = defaultdict(int)
+        self.phase_seconds = defaultdict(float)
+        self.profile_stats: pstats.Stats | None = None
+        self._profiler = None
+        self._tracing_memory = False
+        self._summary = None
+        self.started = time.perf_counter()
+
+    def start(self) -> 'Instrumentation':
+        """Reset the counters and clock and start the profilers."""
+        self.counters.clear()
+        self.phase_seconds.clear()
+        self._summary = None
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing_memory = True
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self.started = time.perf_counter()
+        return self
+
+    def finish(self) -> dict:
+        """Stop the profilers and emit the "summary" event.
+
+        Returns:
+            dict: metrics() of the whole run.
+        """
+        if self._summary is not None:
+            return self._summary
+        elapsed = self.elapsed()
+        tracemalloc_peak = None
+        if tracemalloc.is_tracing():
+            tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+            if self._tracing_memory:
+                tracemalloc.stop()
+                self._tracing_memory = False
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_stats = pstats.Stats(self._profiler)
+            if isinstance(self.profile, (str, Path)):
+                self.profile_stats.dump_stats(self.profile)
+            self._profiler = None
+        self._summary = self.metrics(elapsed)
+        if tracemalloc_peak is not None:
+            self._summary['tracemalloc_peak_bytes'] = tracemalloc_peak
+        self.emit('summary', **self._summary)
+        return self._summary
+
+    def __enter__(self) -> 'Instrumentation':
+        return self.start()
+
+    def __exit__(self, *exception) -> None:
+        self.finish()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def emit(self, event: str, **fields) -> None:
+        """Send an event to every sink."""
+        record = {'event': event, 'seconds': round(self.elapsed(), 6), **fields}
+        for sink in self.sinks:
+            sink(record)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def maximum(self, name: str, value: int) -> None:
+        """Raise a gauge, e.g. peak_frontier, to `value` if it is higher."""
+        if value > self.counters[name]:
+            self.counters[name] = value
+
+    def add_time(self, phase: str, since: float) -> float:
+        """Charge the time since `since` (a perf_counter value) to `phase`; returns the current perf_counter."""
+        now = time.perf_counter()
+        self.phase_seconds[phase] += now - since
+        return now
+
+    @contextmanager
+    def phase(self, name: str):
+        """Charge the time spent in the block to the phase `name`, e.g. 'expand', 'dedupe', 'graph_insert', 'serialize'."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, started)
+
+    def metrics(self, elapsed: float | None = None) -> dict:
+        """Counters and derived rates of the run so far.
+
+        duplicate_ratio is the share of the generated moves that led to an already known state.
+        """
+        elapsed = self.elapsed() if elapsed is None else elapsed
+        counters = dict(self.counters)
+        edges_emitted = counters.get('edges_emitted', 0)
+        return {
+            'elapsed_seconds': elapsed,
+            'states_per_second': counters.get('states_expanded', 0) / elapsed if elapsed > 0 else 0.0,
+            'duplicate_ratio': counters.get('duplicate_hits', 0) / edges_emitted if edges_emitted else 0.0,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'phase_seconds': dict(self.phase_seconds),
+            'counters': counters,
+        }
+
+
+def phase_timer(instrumentation: Instrumentation | None):
+    """instrumentation.phase, or a context manager factory that does nothing without instrumentation."""
+    return instrumentation.phase if instrumentation is not None else _no_phase
+
+
+def _no_phase(name: str):
+    return nullcontext()
@@ -1,9 +1,12 @@
 from dataclasses import dataclass, field
 
+from sacred_grove.trajectory import PositionHistory
+
 @dataclass
 class MovingCharacter:
     position: int
-    history: list[int] = field(default_factory=list)
+    # Every past position, in a preallocated array instead of a growing list
+    history: PositionHistory = field(default_factory=PositionHistory)
 
     def move(self, new_position: int) -> None:
         self.history.append(self.position)
@@ -0,0 +1,187 @@
+import heapq
+from dataclasses import dataclass
+from functools import cached_property
+from itertools import count
+from typing import Iterator
+
+import numpy as np
+
+from sacred_grove.distance_table import UNREACHABLE, DistanceTable
+from sacred_grove.transition_kernel import DIRECTIONS
+
+# Path counts stay exact in int64 below this bound, above it they are recomputed with Python ints.
+_INT64_SAFE_COUNT = 2.0 ** 62
+
+
+@dataclass
+class Solution:
+    """A move sequence from a start state to a goal state."""
+    # Wolf Link's moves, e.g. 'NNESW'.
+    moves: str
+    # States from the start to the goal state, (wolf_link_position, shadow_statue_position, mirror_statue_position).
+    states: list[tuple[int, ...]]
+
+    @property
+    def number_of_moves(self) -> int:
+        return len(self.moves)
+
+
+class OptimalSolutions:
+    """Counts and enumerates the optimal solutions of a state graph.
+
+    A move is optimal when it takes a state one move closer to the goal, so the optimal moves of
+    the distance table form a layered DAG and the optimal solutions from a state are exactly the
+    paths of that DAG down to a goal state. The number of such paths is counted for every state
+    at once, layer by layer from the goal states up; the paths themselves are only produced on
+    demand, one at a time.
+    """
+
+    def __init__(self, distance_table: DistanceTable):
+        self.distance_table = distance_table
+        self.state_graph = distance_table.state_graph
+        self.kernel = distance_table.kernel
+
+    @cached_property
+    def _optimal_edges(self) -> np.ndarray:
+        # Mask of the edges that go one move closer to a goal state.
+        distances = self.distance_table.distances
+        source_distances = distances[self.state_graph.sources]
+        target_distances = distances[self.state_graph.targets]
+        return (source_distances > 0) & (target_distances != UNREACHABLE) & (target_distances == source_distances - 1)
+
+    @cached_property
+    def path_counts(self) -> np.ndarray:
+        """Number of optimal solutions from every state of the graph, 0 for states that cannot reach a goal.
+
+        The counts are int64 when they fit and Python ints (an object array) when they do not.
+        """
+        counts = self._count_paths(np.float64)
+        if counts.max(initial=0) < _INT64_SAFE_COUNT:
+            return self._count_paths(np.int64)
+        return self._count_paths(object)
+
+    def _count_paths(self, dtype) -> np.ndarray:
+        distances = self.distance_table.distances
+        edges = np.flatnonzero(self._optimal_edges)
+        sources, targets = self.state_graph.sources[edges], self.state_graph.targets[edges]
+        # Visit the edges layer by layer: the targets of a layer are all counted before its sources.
+        order = np.argsort(distances[sources], kind='stable')
+        sources, targets = sources[order], targets[order]
+        layer_starts = np.searchsorted(distances[sources], np.arange(1, distances.max(initial=0) + 2))
+        counts = np.zeros(len(self.state_graph), dtype=dtype)
+        counts[distances == 0] = 1
+        for first, last in zip(layer_starts[:-1], layer_starts[1:]):
+            np.add.at(counts, sources[first:last], counts[targets[first:last]])
+        return counts
+
+    def count(self, start: tuple[int, ...]) -> int:
+        """Number of distinct optimal solutions from `start`, 0 if it cannot reach a goal.
+
+        Raises:
+            KeyError: if `start` is not in the state graph, see DistanceTable.index.
+        """
+        return int(self.path_counts[self.distance_table.index(start)])
+
+    def iterate(self, start: tuple[int, ...]) -> Iterator[Solution]:
+        """Lazily yield every optimal solution from `start`, in lexicographic order of the moves (N, S, E, W).
+
+        Only the current path is kept, so memory grows with the solution length, not the number of solutions.
+
+        Raises:
+            KeyError: if `start` is not in the state graph, see DistanceTable.index.
+        """
+        state_graph = self.state_graph
+        index = self.distance_table.index(start)
+        if self.distance_table.distances[index] == UNREACHABLE:
+            return
+        path = [index]
+        moves = []
+        # One iterator over the optimal edges per state of the current path.
+        pending = [iter(self._optimal_edges_of(index))]
+        while pending:
+            edge = next(pending[-1], None)
+            if edge is None:
+                pending.pop()
+                path.pop()
+                if moves:
+                    moves.pop()
+                continue
+            target = int(state_graph.targets[edge])
+            path.append(target)
+            moves.append(DIRECTIONS[state_graph.directions[edge]])
+            if self.distance_table.distances[target] == 0:
+                yield self._solution(moves, path)
+                path.pop()
+                moves.pop()
+            else:
+                pending.append(iter(self._optimal_edges_of(target)))
+        # A start that is already a goal state has a single, empty solution.
+        if self.distance_table.distances[index] == 0:
+            yield self._solution([], [index])
+
+    def near_optimal(self, start: tuple[int, ...], k: int | None = None, maximum_moves: int | None = None) -> Iterator[Solution]:
+        """Lazily yield the `k` shortest solutions from `start`, optimal ones first, then longer ones.
+
+        Solutions never visit a state twice and stop at the first goal state. Partial solutions
+        are expanded best first by their length plus the exact distance left, so every solution
+        comes out in order of length as soon as it is found.
+
+        Unlike iterate, every partial solution still waiting to be expanded is kept in memory, and
+        their number grows with `k`: about 0.3 MiB for 100 solutions and 30 MiB for 10000 on the
+        Sacred Grove. `maximum_moves` bounds it by never keeping partial solutions that cannot
+        finish within that many moves.
+
+        Args:
+            start (tuple[int, ...]): the start state.
+            k (int | None): number of solutions to yield; all of them if None.
+            maximum_moves (int | None): only yield solutions of at most this many moves; no limit if None.
+
+        Raises:
+            KeyError: if `start` is not in the state graph, see DistanceTable.index.
+        """
+        state_graph = self.state_graph
+        distances = self.distance_table.distances
+        index = self.distance_table.index(start)
+        if distances[index] == UNREACHABLE or k == 0:
+            return
+        if maximum_moves is None:
+            maximum_moves = float('inf')
+        if distances[index] > maximum_moves:
+            return
+        tie_breaker = count()
+        # Partial solutions are linked lists (index, direction, previous) shared between the heap entries.
+        frontier = [(int(distances[index]), next(tie_breaker), 0, (index, None, None))]
+        found = 0
+        while frontier:
+            _, _, length, node = heapq.heappop(frontier)
+            state = node[0]
+            if distances[state] == 0:
+                moves, path = [], []
+                while node is not None:
+                    path.append(node[0])
+                    if node[1] is not None:
+                        moves.append(DIRECTIONS[node[1]])
+                    node = node[2]
+                yield self._solution(moves[::-1], path[::-1])
+                found += 1
+                if found == k:
+                    return
+                continue
+            on_path = set()
+            previous = node
+            while previous is not None:
+                on_path.add(previous[0])
+                previous = previous[2]
+            for edge in range(state_graph.offsets[state], state_graph.offsets[state + 1]):
+                target = int(state_graph.targets[edge])
+                estimate = length + 1 + int(distances[target])
+                if distances[target] != UNREACHABLE and estimate <= maximum_moves and target not in on_path:
+                    heapq.heappush(frontier, (estimate, next(tie_breaker), length + 1, (target, int(state_graph.directions[edge]), node)))
+
+    def _optimal_edges_of(self, index: int) -> list[int]:
+        # Sorted by direction: graphs built from edge lists, e.g. by graphml_to_binary, keep the edges of a state in input order.
+        edges = range(self.state_graph.offsets[index], self.state_graph.offsets[index + 1])
+        return sorted((edge for edge in edges if self._optimal_edges[edge]), key=self.state_graph.directions.__getitem__)
+
+    def _solution(self, moves: list[str], path: list[int]) -> Solution:
+        return Solution(''.join(moves), [self.kernel.unpack(int(self.state_graph.states[index])) for index in path])
@@ -0,0 +1,187 @@
+"""Breadth-first state graph generation with bounded memory, for state spaces larger than RAM.
+
+Everything the search needs lives in a directory:
+
+    visited.bitmap          one bit per packed state id, memory-mapped (a sparse file on most file systems)
+    layer-00000.states      int64 packed states of every BFS layer, in discovery order
+    layer-00000.edges       EDGE_DTYPE records of the edges leaving that layer
+    progress.json           the board, the start and the number of completed layers
+
+A layer is streamed from its file in chunks; each chunk is expanded with one batched kernel
+call, its edges are appended to the layer's edge file and its new successors to the next
+layer's state file, so memory use only depends on the chunk size. When a run is interrupted,
+the next one resumes from the last completed layer.
+"""
+import json
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from sacred_grove.bitset import bitset_size, set_bits, test_bits
+from sacred_grove.compact_state_graph import CompactStateGraph
+from sacred_grove.transition_kernel import INVALID_STATE, TransitionKernel
+
+EDGE_DTYPE = np.dtype([('source', '<i8'), ('target', '<i8'), ('direction', 'u1')])
+STATE_DTYPE = np.dtype('<i8')
+PROGRESS_FILE = 'progress.json'
+VISITED_FILE = 'visited.bitmap'
+
+
+class OutOfCoreExploration:
+    """Disk-backed breadth-first search over the states reachable from `start`.
+
+    Args:
+        kernel (TransitionKernel): the compiled board.
+        start (tuple[int, ...]): Wolf Link's tile followed by every statue's tile.
+        directory (str | Path): where the bitmap, layer files and progress are kept.
+        chunk_size (int): number of states expanded at once; memory use is proportional to it.
+
+    Raises:
+        ValueError: if `directory` holds a run for another board or start.
+    """
+
+    def __init__(self, kernel: TransitionKernel, start: tuple[int, ...], directory, chunk_size: int = 1 << 20):
+        self.kernel = kernel
+        self.start = tuple(start)
+        self.directory = Path(directory)
+        self.chunk_size = chunk_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+        run = {
+            'tiles': np.asarray(kernel.tiles).tolist(),
+            'move_table': kernel.move_table.tolist(),
+            'statue_patterns': list(kernel.statue_patterns),
+            'start': list(self.start),
+        }
+        progress_file = self.directory / PROGRESS_FILE
+        if progress_file.exists():
+            self.progress = json.loads(progress_file.read_text())
+            if self.progress['run'] != run:
+                raise ValueError(f"{self.directory} holds an exploration of another board or start")
+        else:
+            self.progress = {'run': run, 'completed_layers': 0, 'finished': False}
+        visited_file = self.directory / VISITED_FILE
+        if not visited_file.exists():
+            with open(visited_file, 'wb') as file:
+                file.truncate(bitset_size(kernel.number_of_states))
+        self.visited = np.memmap(visited_file, dtype=np.uint8, mode='r+')
+
+    @property
+    def finished(self) -> bool:
+        return self.progress['finished']
+
+    @property
+    def completed_layers(self) -> int:
+        """Number of layers whose states and outgoing edges are complete on disk."""
+        return self.progress['completed_layers']
+
+    def states_file(self, layer: int) -> Path:
+        return self.directory / f'layer-{layer:05d}.states'
+
+    def edges_file(self, layer: int) -> Path:
+        return self.directory / f'layer-{layer:05d}.edges'
+
+    def run(self, maximum_layers: int | None = None) -> 'OutOfCoreExploration':
+        """Explore layer after layer until every reachable state is found.
+
+        Args:
+            maximum_layers (int | None): stop after expanding this many more layers, e.g. to spread a run over several sessions.
+
+        Returns:
+            OutOfCoreExploration: self, so calls can be chained.
+        """
+        if self.completed_layers == 0 and not self.states_file(0).exists():
+            start_state = np.array([self.kernel.pack(*self.start)], dtype=STATE_DTYPE)
+            set_bits(self.visited, start_state)
+            self.visited.flush()
+            start_state.tofile(self.states_file(0))
+        self._discard_partial_layer()
+        expanded = 0
+        while not self.finished and (maximum_layers is None or expanded < maximum_layers):
+            self._expand_layer(self.completed_layers)
+            expanded += 1
+        return self
+
+    def _expand_layer(self, layer: int) -> None:
+        kernel = self.kernel
+        with open(self.edges_file(layer), 'wb') as edges_file, open(self.states_file(layer + 1), 'wb') as next_states_file:
+            for frontier in self._read_chunks(self.states_file(layer), STATE_DTYPE):
+                successors = kernel.successors_batch(frontier)
+                rows, directions = np.nonzero(successors != INVALID_STATE)
+                edges = np.empty(len(rows), dtype=EDGE_DTYPE)
+                edges['source'] = frontier[rows]
+                edges['target'] = successors[rows, directions]
+                edges['direction'] = directions
+                edges_file.write(edges.tobytes())
+                new_states = np.unique(edges['target'][~test_bits(self.visited, edges['target'])])
+                # The states reach the file before the bitmap, so an interrupted layer can be undone.
+                next_states_file.write(new_states.astype(STATE_DTYPE).tobytes())
+                next_states_file.flush()
+                set_bits(self.visited, new_states)
+        self.visited.flush()
+        self.progress['completed_layers'] = layer + 1
+        self.progress['finished'] = self.states_file(layer + 1).stat().st_size == 0
+        self._save_progress()
+
+    def _discard_partial_layer(self) -> None:
+        # An interrupted layer may have marked some of its successors visited: unmark
+        # the ones already written to the next layer's file and start the layer over.
+        if self.finished:
+            return
+        partial_states_file = self.states_file(self.completed_layers + 1)
+        if partial_states_file.exists():
+            for states in self._read_chunks(partial_states_file, STATE_DTYPE):
+                bytes_, bits = states >> 3, (1 << (states & 7)).astype(np.uint8)
+                np.bitwise_and.at(self.visited, bytes_, ~bits)
+            self.visited.flush()
+            partial_states_file.unlink()
+        self.edges_file(self.completed_layers).unlink(missing_ok=True)
+
+    def _save_progress(self) -> None:
+        temporary_file = self.directory / (PROGRESS_FILE + '.tmp')
+        temporary_file.write_text(json.dumps(self.progress))
+        temporary_file.replace(self.directory / PROGRESS_FILE)
+
+    def _read_chunks(self, file_name: Path, dtype: np.dtype) -> Iterator[np.ndarray]:
+        # Whole records only, a file cut short by an interruption may end with part of one.
+        number_of_records = file_name.stat().st_size // dtype.itemsize
+        if not number_of_records:
+            return
+        records = np.memmap(file_name, dtype=dtype, mode='r', shape=(number_of_records,))
+        for first in range(0, number_of_records, self.chunk_size):
+            yield np.array(records[first:first + self.chunk_size])
+
+    def layer_states(self) -> Iterator[np.ndarray]:
+        """Stream the states of every completed layer, in chunks."""
+        for layer in range(self.completed_layers + 1):
+            yield from self._read_chunks(self.states_file(layer), STATE_DTYPE)
+
+    def layer_edges(self) -> Iterator[np.ndarray]:
+        """Stream the edges of every completed layer, in chunks of EDGE_DTYPE records."""
+        for layer in range(self.completed_layers):
+            yield from self._read_chunks(self.edges_file(layer), EDGE_DTYPE)
+
+    def number_of_states(self) -> int:
+        """Number of states found so far, from the sizes of the layer files."""
+        return sum(self.states_file(layer).stat().st_size for layer in range(self.completed_layers + 1)) // STATE_DTYPE.itemsize
+
+    def number_of_edges(self) -> int:
+        return sum(self.edges_file(layer).stat().st_size for layer in range(self.completed_layers)) // EDGE_DTYPE.itemsize
+
+    def to_compact_state_graph(self) -> CompactStateGraph:
+        """Load the finished exploration as a CompactStateGraph, for state graphs that do fit in memory.
+
+        Raises:
+            RuntimeError: if the exploration has not finished.
+        """
+        if not self.finished:
+            raise RuntimeError(f"the exploration in {self.directory} has not finished, call run() first")
+        states = np.sort(np.concatenate(list(self.layer_states())))
+        edges = np.concatenate(list(self.layer_edges()))
+        return CompactStateGraph.from_edges(
+            self.kernel,
+            states,
+            sources=np.searchsorted(states, edges['source']),
+            targets=np.searchsorted(states, edges['target']),
+            directions=edges['direction'],
+        )
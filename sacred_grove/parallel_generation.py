@@ -0,0 +1,170 @@
+"""Breadth-first state graph generation spread over worker processes.
+
+Every packed state is owned by exactly one worker, picked by a hash of the state id. The hash
+is a bijection of the state ids, so each worker numbers its own states densely and its visited
+bitset only covers its share of the state space. Workers
+run the same level-synchronous search as StateGraphGenerator.batched_state_graph_generation on
+the states they own: they expand their frontier with one batched kernel call, keep the edges
+leaving their states, and route every successor, in one batch per owner and layer, to the inbox
+of the worker that owns it. The owner drops the states it has already visited and the rest form
+its next frontier. After each layer the workers report their frontier size to the parent
+process, which stops them once every frontier is empty and merges their states and edges.
+A worker that dies makes the parent raise instead of waiting for it forever.
+"""
+import math
+import multiprocessing
+import os
+
+import numpy as np
+
+from sacred_grove.bitset import new_bitset, set_bits, test_bits
+from sacred_grove.compact_state_graph import CompactStateGraph
+from sacred_grove.transition_kernel import INVALID_STATE, TransitionKernel
+
+# Low half of the Fibonacci hashing constant, spreads neighboring state ids over all workers.
+_HASH_MULTIPLIER = 0x7F4A7C15
+# Seconds between two checks that the workers are still alive while the parent waits for them.
+_POLL_SECONDS = 0.1
+
+
+def _multiplier(number_of_states: int) -> int:
+    # Multiplying by a number coprime with number_of_states modulo number_of_states is a bijection of the state ids.
+    # The product must fit in 64 bits, so larger state spaces are only split by remainder.
+    if number_of_states >= 1 << 32:
+        return 1
+    multiplier = _HASH_MULTIPLIER
+    while math.gcd(multiplier, number_of_states) != 1:
+        multiplier += 2
+    return multiplier
+
+
+def _scramble(states, number_of_states: int) -> np.ndarray:
+    states = np.asarray(states, dtype=np.int64).astype(np.uint64)
+    return (states * np.uint64(_multiplier(number_of_states)) % np.uint64(number_of_states)).astype(np.int64)
+
+
+def owners(states: np.ndarray, number_of_workers: int, number_of_states: int) -> np.ndarray:
+    """Worker that owns each packed state.
+
+    Args:
+        states (np.ndarray): packed state ids.
+        number_of_workers (int): number of partitions.
+        number_of_states (int): size of the state space, TransitionKernel.number_of_states.
+    """
+    return (_scramble(states, number_of_states) % number_of_workers).astype(np.intp)
+
+
+def local_ids(states: np.ndarray, number_of_workers: int, number_of_states: int) -> np.ndarray:
+    """Dense id of each packed state among the states of its owner, below partition_size."""
+    return _scramble(states, number_of_states) // number_of_workers
+
+
+def partition_size(number_of_workers: int, number_of_states: int) -> int:
+    """Number of state ids owned by each worker, at most."""
+    return -(-number_of_states // number_of_workers)
+
+
+def parallel_state_graph_generation(kernel: TransitionKernel, start: tuple[int, ...], number_of_workers: int | None = None) -> CompactStateGraph:
+    """Generate the reachable state graph with a pool of worker processes.
+
+    The result is identical, array for array, to StateGraphGenerator.batched_state_graph_generation.
+
+    Args:
+        kernel (TransitionKernel): the compiled board.
+        start (tuple[int, ...]): Wolf Link's tile followed by every statue's tile.
+        number_of_workers (int | None): number of worker processes, one per CPU by default.
+
+    Returns:
+        CompactStateGraph: reachable states and the edges between them.
+    """
+    number_of_workers = number_of_workers or os.cpu_count() or 1
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for _ in range(number_of_workers)]
+    pipes = [context.Pipe() for _ in range(number_of_workers)]
+    start_state = kernel.pack(*start)
+    workers = [
+        context.Process(target=_explore_partition, args=(kernel, start_state, worker, inboxes, child), daemon=True)
+        for worker, (_, child) in enumerate(pipes)
+    ]
+    for process in workers:
+        process.start()
+    # Only the workers hold the child ends now, so a dead worker's pipe reports end of file.
+    for _, child in pipes:
+        child.close()
+    finished = False
+    try:
+        connections = [parent for parent, _ in pipes]
+        while True:
+            frontier_size = sum(_receive(connection, workers) for connection in connections)
+            for connection in connections:
+                connection.send(frontier_size > 0)
+            if not frontier_size:
+                break
+        partitions = [_receive(connection, workers) for connection in connections]
+        finished = True
+    finally:
+        for process in workers:
+            # Workers left waiting for a dead peer's messages never exit on their own.
+            if not finished:
+                process.terminate()
+            process.join()
+    states = np.sort(np.concatenate([partition[0] for partition in partitions]))
+    edge_sources, edge_targets, edge_directions = (np.concatenate([partition[column] for partition in partitions]) for column in (1, 2, 3))
+    return CompactStateGraph.from_edges(
+        kernel,
+        states,
+        sources=np.searchsorted(states, edge_sources),
+        targets=np.searchsorted(states, edge_targets),
+        directions=edge_directions,
+    )
+
+
+def _receive(connection, workers: list):
+    # connection.recv(), raising if a worker dies first: it would never send, and its peers wait for its messages.
+    while not connection.poll(_POLL_SECONDS):
+        for worker, process in enumerate(workers):
+            # Workers only exit after sending their results, and a killed one exits with a non-zero code.
+            if process.exitcode not in (None, 0):
+                raise RuntimeError(f"worker {worker} of the parallel generation exited with code {process.exitcode}")
+    try:
+        return connection.recv()
+    except EOFError:
+        raise RuntimeError("a worker of the parallel generation exited before sending its results") from None
+
+
+def _explore_partition(kernel: TransitionKernel, start_state: int, worker: int, inboxes: list, connection) -> None:
+    # Runs in a worker process: breadth-first search over the states this worker owns.
+    number_of_workers, number_of_states = len(inboxes), kernel.number_of_states
+    visited = new_bitset(partition_size(number_of_workers, number_of_states))
+    owned = owners([start_state], number_of_workers, number_of_states)[0] == worker
+    frontier = np.array([start_state] if owned else [], dtype=np.int64)
+    set_bits(visited, local_ids(frontier, number_of_workers, number_of_states))
+    owned_states, edge_sources, edge_targets, edge_directions = [frontier], [], [], []
+    while True:
+        successors = kernel.successors_batch(frontier).reshape(-1, 4)
+        rows, directions = np.nonzero(successors != INVALID_STATE)
+        targets = successors[rows, directions]
+        edge_sources.append(frontier[rows])
+        edge_targets.append(targets)
+        edge_directions.append(directions.astype(np.uint8))
+        # Route the successors to their owners, one message to every worker, even if empty.
+        targets = np.unique(targets)
+        target_owners = owners(targets, number_of_workers, number_of_states)
+        for owner, inbox in enumerate(inboxes):
+            inbox.put(targets[target_owners == owner])
+        received = np.unique(np.concatenate([inboxes[worker].get() for _ in range(number_of_workers)]))
+        received_ids = local_ids(received, number_of_workers, number_of_states)
+        new = ~test_bits(visited, received_ids)
+        frontier = received[new]
+        set_bits(visited, received_ids[new])
+        owned_states.append(frontier)
+        # Every worker has drained this layer's messages before anyone starts the next one.
+        connection.send(len(frontier))
+        if not connection.recv():
+            break
+    connection.send((
+        np.concatenate(owned_states),
+        np.concatenate(edge_sources),
+        np.concatenate(edge_targets),
+        np.concatenate(edge_directions),
+    ))
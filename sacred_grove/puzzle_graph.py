@@ -0,0 +1,17 @@
+import networkx as nx
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+
+# The tiles are the nodes, numbered from 1 to 21, and the connections between them are the edges,
+# labelled with the direction of the move. The board itself is declared as an ASCII grid in board.py,
+# following figs/tile-graph.png.
+TILE_GRAPH = SACRED_GROVE.tile_graph()
+
+
+def make_grid_tile_graph(rows: int, columns: int) -> nx.DiGraph:
+    """Build a rectangular board with the same edge encoding as TILE_GRAPH.
+
+    Tiles are numbered 1 to rows * columns, row by row from the north-west corner.
+    Useful to benchmark the generators and solvers on boards larger than the Sacred Grove.
+    """
+    return grid_board(rows, columns).tile_graph()
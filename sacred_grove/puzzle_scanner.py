@@ -0,0 +1,347 @@
+"""Scan the puzzle space: every start placement of many boards derived from the Sacred Grove.
+
+The scanner answers, for every (board, start) configuration, how long the optimal solution is,
+how many states can be reached from the start and how many optimal solutions there are. It
+never searches from a start: per board layout it builds the complete state graph once and the
+answers for every start come out of whole-graph passes over it:
+
+    - one reverse BFS per goal set (DistanceTable) gives the optimal length of every start,
+    - one path count over the optimal-move DAG (OptimalSolutions) gives the number of solutions,
+    - the reachable-state counts do not depend on the goals, so they are computed once per
+      layout: the strongly connected components of the state graph are condensed into a DAG and
+      the set of reachable states of every component is the union of its successors' sets,
+      computed as bitsets from the sink components up.
+
+Boards that share tiles and edges and only differ by their goal tiles are scanned by the same
+worker and share the state graph and reachable-state counts. Layouts are spread over a process
+pool and every finished layout is appended to a columnar table (see columnar_store), one row
+per configuration, so the scan can be ranked without holding it in memory.
+
+Scan the Sacred Grove and 200 perturbed boards from the repository root with:
+
+    python -m sacred_grove.puzzle_scanner scan --boards 200 --output puzzle-scan
+"""
+import argparse
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import numpy as np
+
+from sacred_grove.bitset import bitset_size
+from sacred_grove.board import SACRED_GROVE, Board
+from sacred_grove.columnar_store import ColumnarWriter, read_columns, read_schema
+from sacred_grove.compact_state_graph import CompactStateGraph
+from sacred_grove.distance_table import UNREACHABLE, DistanceTable
+from sacred_grove.optimal_solutions import OptimalSolutions
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+BOARDS_FILE = 'boards.json'
+# Number of set bits of every byte value.
+_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+
+def remove_tiles(board: Board, removed_tiles, name: str = '') -> Board:
+    """The board without some of its tiles and every connection to them.
+
+    The start is kept if it avoids the removed tiles, otherwise Wolf Link and the statues are
+    placed on the first free tiles that are not goal tiles.
+
+    Raises:
+        ValueError: if a goal tile is removed or the board has too few tiles left.
+    """
+    removed_tiles = set(removed_tiles)
+    if removed_tiles & board.goal_tiles:
+        raise ValueError(f"Cannot remove the goal tiles {sorted(removed_tiles & board.goal_tiles)}")
+    tiles = tuple(tile for tile in board.tiles if tile not in removed_tiles)
+    edges = tuple(edge for edge in board.edges if edge[0] not in removed_tiles and edge[1] not in removed_tiles)
+    start = board.start if not removed_tiles & set(board.start) else _default_start(tiles, board.goal_tiles, len(board.start))
+    return Board(tiles, edges, board.goal_tiles, start, board.statue_patterns, name or board.name)
+
+
+def move_goals(board: Board, goal_tiles, name: str = '') -> Board:
+    """The same board with other goal tiles."""
+    return replace(board, goal_tiles=frozenset(goal_tiles), name=name or board.name)
+
+
+def _default_start(tiles, goal_tiles, number_of_positions: int) -> tuple[int, ...]:
+    free_tiles = [tile for tile in tiles if tile not in goal_tiles] + sorted(goal_tiles)
+    if len(free_tiles) < number_of_positions:
+        raise ValueError(f"{len(tiles)} tiles cannot hold Wolf Link and {number_of_positions - 1} statues")
+    return tuple(free_tiles[:number_of_positions])
+
+
+def perturbed_boards(board: Board = SACRED_GROVE, number_of_boards: int = 100, maximum_removed_tiles: int = 2,
+                     goal_sets_per_layout: int = 4, seed: int | None = None) -> list[Board]:
+    """Random variants of `board`: tiles removed, goals moved, or both.
+
+    Layouts are drawn by removing up to `maximum_removed_tiles` tiles that are not goal tiles,
+    and every layout is used with its original goal tiles and with `goal_sets_per_layout - 1`
+    random goal sets, so that boards of the same layout can share their state graph.
+
+    Args:
+        board (Board): the board to perturb, the Sacred Grove by default.
+        number_of_boards (int): number of boards to return, `board` itself first.
+        maximum_removed_tiles (int): most tiles removed from one layout.
+        goal_sets_per_layout (int): boards per layout.
+        seed (int | None): random seed.
+
+    Returns:
+        list[Board]: distinct boards, named after their perturbation.
+    """
+    generator = random.Random(seed)
+    boards = {board: None}
+    removable_tiles = [tile for tile in board.tiles if tile not in board.goal_tiles]
+    attempts = 0
+    while len(boards) < number_of_boards and attempts < 100 * number_of_boards:
+        attempts += 1
+        removed_tiles = sorted(generator.sample(removable_tiles, generator.randint(0, maximum_removed_tiles)))
+        layout = remove_tiles(board, removed_tiles, name=f"{board.name} without {removed_tiles}" if removed_tiles else board.name)
+        goal_sets = [board.goal_tiles] + [
+            frozenset(generator.sample(layout.tiles, len(board.goal_tiles))) for _ in range(goal_sets_per_layout - 1)
+        ]
+        for goal_tiles in goal_sets:
+            name = layout.name if goal_tiles == board.goal_tiles else f"{layout.name}, goals {sorted(goal_tiles)}"
+            boards.setdefault(move_goals(layout, goal_tiles, name=name.lstrip(', ')), None)
+            if len(boards) == number_of_boards:
+                break
+    return list(boards)
+
+
+def reachable_state_counts(state_graph: CompactStateGraph) -> np.ndarray:
+    """Number of states reachable from every state of the graph, itself included.
+
+    The states of a strongly connected component reach the same states, so the counts are
+    computed on the condensation of the graph: each component's reachable set is a bitset over
+    the states, filled with its own states and or-ed into its predecessors once all of its
+    successors are done. The bitsets take (number of components) x (number of states) bits.
+
+    Args:
+        state_graph (CompactStateGraph): e.g. from StateGraphGenerator.complete_state_graph_generation.
+
+    Returns:
+        np.ndarray: int64 counts, indexed like the states of the graph.
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    number_of_states = len(state_graph)
+    adjacency = csr_matrix((np.ones(state_graph.number_of_edges, dtype=np.int8), state_graph.targets, state_graph.offsets),
+                           shape=(number_of_states, number_of_states))
+    number_of_components, components = connected_components(adjacency, directed=True, connection='strong')
+    pairs = np.unique(components[state_graph.sources] * np.int64(number_of_components) + components[state_graph.targets])
+    sources, targets = np.divmod(pairs, number_of_components)
+    between_components = sources != targets
+    sources, targets = sources[between_components], targets[between_components]
+    reachable = np.zeros((number_of_components, bitset_size(number_of_states)), dtype=np.uint8)
+    states = np.arange(number_of_states)
+    np.bitwise_or.at(reachable, (components, states >> 3), (1 << (states & 7)).astype(np.uint8))
+    # Kahn's algorithm from the sinks: a component is done once all of its successors are.
+    predecessor_order = np.argsort(targets, kind='stable')
+    predecessor_offsets = np.searchsorted(targets[predecessor_order], np.arange(number_of_components + 1))
+    remaining_successors = np.bincount(sources, minlength=number_of_components)
+    done = np.flatnonzero(remaining_successors == 0)
+    while done.size:
+        edges = np.concatenate([predecessor_order[predecessor_offsets[component]:predecessor_offsets[component + 1]] for component in done])
+        if not edges.size:
+            break
+        np.bitwise_or.at(reachable, sources[edges], reachable[targets[edges]])
+        np.subtract.at(remaining_successors, sources[edges], 1)
+        predecessors = np.unique(sources[edges])
+        done = predecessors[remaining_successors[predecessors] == 0]
+    counts = _POPCOUNT[reachable].sum(axis=1, dtype=np.int64)
+    return counts[components]
+
+
+@dataclass
+class LayoutScan:
+    """Scan of every start of the boards that share one layout, one row per (board, start)."""
+    # Board id of every row.
+    boards: np.ndarray
+    # (rows, number of positions) tile labels of Wolf Link and every statue.
+    starts: np.ndarray
+    # Optimal solution length of every row, UNREACHABLE if unsolvable.
+    optimal_moves: np.ndarray
+    reachable_states: np.ndarray
+    # Number of optimal solutions, saturated at the int64 maximum.
+    optimal_solutions: np.ndarray
+    seconds: float
+
+
+def scan_layout(boards: list[tuple[int, Board]]) -> LayoutScan:
+    """Scan every valid start of boards that only differ by their goal tiles.
+
+    Args:
+        boards (list[tuple[int, Board]]): (board id, board) pairs sharing tiles, edges and statue patterns.
+
+    Returns:
+        LayoutScan: the rows of every board, in board order.
+    """
+    started = time.perf_counter()
+    layout = boards[0][1]
+    state_graph = StateGraphGenerator.from_board(layout).complete_state_graph_generation()
+    kernel = state_graph.kernel
+    starts = np.asarray(kernel.tiles)[kernel.unpack_batch(state_graph.states)]
+    reachable_states = reachable_state_counts(state_graph)
+    optimal_moves, optimal_solutions = [], []
+    for _, board in boards:
+        distance_table = DistanceTable.from_state_graph(state_graph, board.goal_tiles)
+        path_counts = OptimalSolutions(distance_table).path_counts
+        if path_counts.dtype == object:
+            path_counts = np.array([min(count, np.iinfo(np.int64).max) for count in path_counts], dtype=np.int64)
+        optimal_moves.append(distance_table.distances)
+        optimal_solutions.append(path_counts)
+    return LayoutScan(
+        boards=np.repeat([board_id for board_id, _ in boards], len(state_graph)),
+        starts=np.tile(starts, (len(boards), 1)),
+        optimal_moves=np.concatenate(optimal_moves),
+        reachable_states=np.tile(reachable_states, len(boards)),
+        optimal_solutions=np.concatenate(optimal_solutions),
+        seconds=time.perf_counter() - started,
+    )
+
+
+def scan_boards(boards: list[Board], directory, number_of_workers: int | None = None, progress=None) -> int:
+    """Scan every start of every board over a process pool and stream the rows to a columnar table.
+
+    The table in `directory` has the columns board, wolf_link_position, <pattern>_statue_position...,
+    optimal_moves, reachable_states and optimal_solutions, and boards.json maps board ids to
+    their JSON specs (see Board.to_json).
+
+    Args:
+        boards (list[Board]): boards with the same statue patterns.
+        directory (str | Path): where to write the table.
+        number_of_workers (int | None): worker processes, one per CPU by default; 1 scans in this process.
+        progress (Callable[[int, int], None] | None): called with the number of boards done and the total.
+
+    Returns:
+        int: number of rows written.
+    """
+    if len({board.statue_patterns for board in boards}) > 1:
+        raise ValueError("Every scanned board needs the same statue patterns")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / BOARDS_FILE).write_text(json.dumps([board.to_json() for board in boards]))
+    layouts = defaultdict(list)
+    for board_id, board in enumerate(boards):
+        layouts[board.tiles, board.edges].append((board_id, board))
+    position_names = boards[0].kernel().position_names
+    columns = {'board': np.int32, **{name: np.int16 for name in position_names},
+               'optimal_moves': np.int32, 'reachable_states': np.int64, 'optimal_solutions': np.int64}
+    number_of_workers = number_of_workers or os.cpu_count() or 1
+    boards_done = 0
+    with ColumnarWriter(directory, columns, metadata={'boards': len(boards), 'layouts': len(layouts)}) as writer:
+        with ProcessPoolExecutor(number_of_workers) if number_of_workers > 1 else _InProcessExecutor() as executor:
+            for scan in executor.map(scan_layout, layouts.values()):
+                writer.append({
+                    'board': scan.boards,
+                    **{name: scan.starts[:, position] for position, name in enumerate(position_names)},
+                    'optimal_moves': scan.optimal_moves,
+                    'reachable_states': scan.reachable_states,
+                    'optimal_solutions': scan.optimal_solutions,
+                })
+                boards_done += len(np.unique(scan.boards))
+                if progress is not None:
+                    progress(boards_done, len(boards))
+        return writer.rows
+
+
+class _InProcessExecutor:
+    # Executor.map without worker processes, for single-worker scans and profiling.
+    def map(self, function, *iterables):
+        return map(function, *iterables)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        pass
+
+
+def board_summaries(directory) -> list[dict]:
+    """Per-board aggregates of a scan, in board order.
+
+    Every summary has the board's name, its number of valid starts, the share of them that are
+    solvable, the longest and mean optimal solution, the mean number of reachable states and
+    the start that needs the most moves.
+    """
+    directory = Path(directory)
+    boards = json.loads((directory / BOARDS_FILE).read_text())
+    columns = read_columns(directory)
+    position_names = [column['name'] for column in read_schema(directory)['columns'] if column['name'].endswith('_position')]
+    board_ids = np.asarray(columns['board'])
+    order = np.argsort(board_ids, kind='stable')
+    bounds = np.searchsorted(board_ids[order], np.arange(len(boards) + 1))
+    optimal_moves = np.asarray(columns['optimal_moves'])
+    summaries = []
+    for board_id, spec in enumerate(boards):
+        rows = order[bounds[board_id]:bounds[board_id + 1]]
+        moves = optimal_moves[rows]
+        solvable = moves != UNREACHABLE
+        hardest = rows[np.argmax(moves)] if rows.size else None
+        summaries.append({
+            'board': board_id,
+            'name': spec['name'],
+            'starts': len(rows),
+            'solvable_share': float(solvable.mean()) if rows.size else 0.0,
+            'longest_solution': int(moves.max(initial=UNREACHABLE)),
+            'mean_solution': float(moves[solvable].mean()) if solvable.any() else float('nan'),
+            'mean_reachable_states': float(np.asarray(columns['reachable_states'])[rows].mean()) if rows.size else 0.0,
+            'hardest_start': tuple(int(columns[name][hardest]) for name in position_names) if hardest is not None else None,
+        })
+    return summaries
+
+
+def rank_boards(directory, count: int = 10) -> tuple[list[dict], list[dict]]:
+    """The hardest and the most degenerate boards of a scan.
+
+    Hardest: longest optimal solution from any start, then longest mean solution.
+    Most degenerate: smallest share of solvable starts, then smallest mean reachable state count.
+    """
+    summaries = board_summaries(directory)
+    hardest = sorted(summaries, key=lambda summary: (-summary['longest_solution'], -np.nan_to_num(summary['mean_solution'])))
+    degenerate = sorted(summaries, key=lambda summary: (summary['solvable_share'], summary['mean_reachable_states']))
+    return hardest[:count], degenerate[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan every start of perturbed Sacred Grove boards and rank them.")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    scan_parser = subcommands.add_parser('scan', help="scan boards into a columnar table, then rank them")
+    scan_parser.add_argument('--boards', type=int, default=100, help="number of boards, the Sacred Grove included (default: 100)")
+    scan_parser.add_argument('--removed-tiles', type=int, default=2, help="most tiles removed from a board (default: 2)")
+    scan_parser.add_argument('--goal-sets', type=int, default=4, help="goal sets tried per layout (default: 4)")
+    scan_parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    scan_parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    scan_parser.add_argument('--output', default='puzzle-scan', help="table directory (default: puzzle-scan)")
+    rank_parser = subcommands.add_parser('rank', help="rank the boards of an existing scan")
+    rank_parser.add_argument('--output', default='puzzle-scan', help="table directory (default: puzzle-scan)")
+    for subcommand in (scan_parser, rank_parser):
+        subcommand.add_argument('--top', type=int, default=10, help="boards listed per ranking (default: 10)")
+    arguments = parser.parse_args()
+
+    if arguments.command == 'scan':
+        boards = perturbed_boards(number_of_boards=arguments.boards, maximum_removed_tiles=arguments.removed_tiles,
+                                  goal_sets_per_layout=arguments.goal_sets, seed=arguments.seed)
+        start = time.perf_counter()
+        rows = scan_boards(boards, arguments.output, arguments.workers,
+                           progress=lambda done, total: print(f"\r{done}/{total} boards", end='', flush=True))
+        elapsed = time.perf_counter() - start
+        print(f"\r{rows} configurations of {len(boards)} boards scanned in {elapsed:.2f}s ({rows / elapsed:,.0f} per second), "
+              f"saved to {arguments.output}")
+    hardest, degenerate = rank_boards(arguments.output, arguments.top)
+    print("\nHardest boards (longest optimal solution from any start):")
+    for summary in hardest:
+        print(f"  {summary['longest_solution']:3d} moves from {summary['hardest_start']}, mean {summary['mean_solution']:5.1f}: {summary['name']}")
+    print("\nMost degenerate boards (fewest solvable starts):")
+    for summary in degenerate:
+        print(f"  {summary['solvable_share']:6.1%} solvable, {summary['mean_reachable_states']:7.1f} reachable states on average: {summary['name']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from sacred_grove.board import GOAL_TILES
+from sacred_grove.compact_state_graph import CompactStateGraph, gather_csr
+from sacred_grove.distance_table import UNREACHABLE, DistanceTable
+from sacred_grove.transition_kernel import INVALID_STATE, TransitionKernel
+
+# Hitting time of walks that did not reach a goal state.
+NOT_HIT = -1
+
+
+@dataclass
+class RandomWalkResult:
+    """Hitting times of a batch of independent random walks."""
+    # Moves until the first goal state, NOT_HIT if the walk got stuck or ran out of steps.
+    hitting_times: np.ndarray
+    # Moves made by every walk before it reached a goal, got stuck or ran out of steps.
+    walk_lengths: np.ndarray
+    maximum_steps: int
+
+    @property
+    def number_of_walks(self) -> int:
+        return len(self.hitting_times)
+
+    @property
+    def success_rate(self) -> float:
+        return float(np.mean(self.hitting_times != NOT_HIT))
+
+    @property
+    def mean_hitting_time(self) -> float:
+        """Mean number of moves of the walks that reached a goal state."""
+        hits = self.hitting_times[self.hitting_times != NOT_HIT]
+        return float(hits.mean()) if hits.size else float('nan')
+
+    def quantiles(self, quantiles=(0.5, 0.9, 0.99)) -> dict[float, float]:
+        """Quantiles of the hitting time of the walks that reached a goal state."""
+        hits = self.hitting_times[self.hitting_times != NOT_HIT]
+        if not hits.size:
+            return {quantile: float('nan') for quantile in quantiles}
+        return dict(zip(quantiles, np.quantile(hits, quantiles).tolist()))
+
+    def histogram(self) -> np.ndarray:
+        """histogram[t] is the number of walks that first reached a goal state after t moves."""
+        return np.bincount(self.hitting_times[self.hitting_times != NOT_HIT], minlength=self.maximum_steps + 1)
+
+
+def simulate_random_walks(kernel: TransitionKernel, start, goal_tiles=GOAL_TILES, number_of_walks: int = 10000,
+                          maximum_steps: int = 200, seed=None, live_states=None) -> RandomWalkResult:
+    """Run many independent random walks at once, like Search.random_walk_search but without printing.
+
+    Every walk is a packed state in one array. At each step all walks that are still running pick
+    one of their valid moves uniformly at random, in a single batched kernel call.
+
+    Args:
+        kernel (TransitionKernel): the compiled board.
+        start (tuple[int, ...]): Wolf Link's tile followed by every statue's tile.
+        goal_tiles (Iterable[int]): tiles the statues must occupy.
+        number_of_walks (int): how many walks to run.
+        maximum_steps (int): walks that have not reached a goal after this many moves fail.
+        seed (int | np.random.Generator | None): seed for reproducible walks.
+        live_states (LiveStateIndex | None): if given, walks never move into states that cannot reach a goal.
+
+    Returns:
+        RandomWalkResult: the hitting time of every walk.
+    """
+    rng = np.random.default_rng(seed)
+    states = np.full(number_of_walks, kernel.pack(*start), dtype=np.int64)
+    hitting_times = np.full(number_of_walks, NOT_HIT, dtype=np.int64)
+    walk_lengths = np.zeros(number_of_walks, dtype=np.int64)
+    running = np.arange(number_of_walks)
+    for step in range(maximum_steps + 1):
+        reached = kernel.goal_state_mask(states[running], goal_tiles)
+        hitting_times[running[reached]] = step
+        running = running[~reached]
+        if step == maximum_steps or not running.size:
+            break
+        successors = kernel.successors_batch(states[running])
+        valid = successors != INVALID_STATE
+        if live_states is not None:
+            valid &= live_states.are_live(successors)
+        number_of_moves = valid.sum(axis=1)
+        # Walks without any valid move are stuck for good
+        stuck = number_of_moves == 0
+        running, successors, valid, number_of_moves = running[~stuck], successors[~stuck], valid[~stuck], number_of_moves[~stuck]
+        # Pick the k-th valid move, k uniform in [0, number_of_moves)
+        choices = (rng.random(len(running)) * number_of_moves).astype(np.int64)
+        moves = np.argmax(np.cumsum(valid, axis=1) > choices[:, None], axis=1)
+        states[running] = successors[np.arange(len(running)), moves]
+        walk_lengths[running] += 1
+    return RandomWalkResult(hitting_times, walk_lengths, maximum_steps)
+
+
+@dataclass
+class AbsorbingChainAnalysis:
+    """Exact random walk statistics for every state of a state graph.
+
+    The random walk is an absorbing Markov chain: each move is picked uniformly among the valid
+    ones, goal states absorb, and so do states without any valid move.
+    """
+    state_graph: CompactStateGraph
+    # Probability to ever reach a goal state.
+    goal_probabilities: np.ndarray
+    # Expected number of moves to a goal state; infinite when the walk may never get there.
+    expected_steps: np.ndarray
+    # Expected number of moves of the walks that do reach a goal state; NaN when none does.
+    expected_steps_given_success: np.ndarray
+
+    def for_state(self, state) -> tuple[float, float, float]:
+        """(goal probability, expected steps, expected steps given success) of a state tuple."""
+        index = self.state_graph.index_of(self.state_graph.kernel.pack(*state))
+        if index < 0:
+            raise KeyError(f"{state} is not in the state graph")
+        return float(self.goal_probabilities[index]), float(self.expected_steps[index]), float(self.expected_steps_given_success[index])
+
+
+def absorbing_chain_analysis(state_graph: CompactStateGraph, goal_tiles=GOAL_TILES,
+                             distance_table: DistanceTable | None = None) -> AbsorbingChainAnalysis:
+    """Solve the random walk on a state graph exactly with sparse linear systems, without sampling.
+
+    With Q the transitions between non-goal states, the goal probabilities h solve (I - Q) h = r
+    (r the probability to step into a goal), the expected steps t solve (I - Q) t = 1 on the states
+    that reach a goal almost surely, and E[steps | success] = u / h where (I - Q) u = h.
+
+    Args:
+        state_graph (CompactStateGraph): a state graph closed under moves, e.g. from batched_state_graph_generation.
+        goal_tiles (Iterable[int]): tiles the statues must occupy.
+        distance_table (DistanceTable | None): reused to find the states that can reach a goal, if given.
+
+    Returns:
+        AbsorbingChainAnalysis: the exact statistics of every state.
+    """
+    # Only the exact analysis needs scipy, simulate_random_walks does not.
+    import scipy.sparse
+    import scipy.sparse.linalg
+
+    if distance_table is None:
+        distance_table = DistanceTable.from_state_graph(state_graph, goal_tiles)
+    number_of_states = len(state_graph)
+    goals = distance_table.distances == 0
+    live = distance_table.distances != UNREACHABLE
+    # Walks can only succeed from live non-goal states, everything else is absorbed or hopeless.
+    transient = live & ~goals
+    out_degrees = np.diff(state_graph.offsets)
+    sources, targets = state_graph.sources, state_graph.targets
+    probabilities = 1.0 / np.maximum(out_degrees[sources], 1)
+
+    transient_index = np.full(number_of_states, -1, dtype=np.int64)
+    transient_index[transient] = np.arange(int(transient.sum()))
+    inner = transient[sources] & transient[targets]
+    size = int(transient.sum())
+    q = scipy.sparse.csr_matrix((probabilities[inner], (transient_index[sources[inner]], transient_index[targets[inner]])), shape=(size, size))
+    system = (scipy.sparse.identity(size, format='csr') - q).tocsc()
+    into_goal = transient[sources] & goals[targets]
+    r = np.bincount(transient_index[sources[into_goal]], weights=probabilities[into_goal], minlength=size)
+
+    goal_probabilities = np.zeros(number_of_states)
+    goal_probabilities[goals] = 1.0
+    goal_probabilities[transient] = scipy.sparse.linalg.spsolve(system, r) if size else []
+
+    # States that can step into a hopeless state (without having reached a goal first) may never succeed.
+    doomed = ~live
+    offsets, edge_ids = state_graph.predecessor_csr()
+    predecessors = sources[edge_ids]
+    frontier = np.flatnonzero(doomed)
+    while frontier.size:
+        candidates = gather_csr(offsets, predecessors, frontier)
+        candidates = candidates[~doomed[candidates] & ~goals[candidates]]
+        frontier = np.unique(candidates)
+        doomed[frontier] = True
+    sure = transient & ~doomed
+    expected_steps = np.full(number_of_states, np.inf)
+    expected_steps[goals] = 0.0
+    if sure.any():
+        sure_transient = sure[transient]
+        sure_system = system[sure_transient][:, sure_transient]
+        expected_steps[sure] = scipy.sparse.linalg.spsolve(sure_system.tocsc(), np.ones(int(sure.sum())))
+
+    expected_steps_given_success = np.full(number_of_states, np.nan)
+    expected_steps_given_success[goals] = 0.0
+    if size:
+        weighted_steps = scipy.sparse.linalg.spsolve(system, goal_probabilities[transient])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            expected_steps_given_success[transient] = weighted_steps / goal_probabilities[transient]
+    return AbsorbingChainAnalysis(state_graph, goal_probabilities, expected_steps, expected_steps_given_success)
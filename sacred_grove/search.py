@@ -0,0 +1,418 @@
+import functools
+import heapq
+import random
+import time
+from dataclasses import dataclass, field
+from itertools import count, permutations
+
+from sacred_grove.board import GOAL_TILES
+from sacred_grove.heuristics import TileDistanceHeuristic
+from sacred_grove.moving_characters import *
+from sacred_grove.transition_kernel import DIRECTION_CODES, OPPOSITE_DIRECTION_CODES, TransitionKernel
+from sacred_grove.transposition_table import TranspositionTable
+
+
+@dataclass
+class SearchResult:
+    """Outcome of an informed search."""
+    # States from the start to the goal state, (wolf_link_position, shadow_statue_position, mirror_statue_position); None if no solution.
+    path: list[tuple[int, int, int]] | None
+    nodes_expanded: int
+    peak_frontier_size: int
+    # Extra counters of a specific search, e.g. the forward and backward expansions of the bidirectional search.
+    details: dict = field(default_factory=dict)
+
+    @property
+    def number_of_moves(self) -> int | None:
+        return len(self.path) - 1 if self.path is not None else None
+
+
+def _instrumented_search(search):
+    # Reports the counters of a SearchResult to the Search's instrumentation, if any; the search loop itself is untouched.
+    @functools.wraps(search)
+    def wrapper(self, *arguments, **keywords) -> SearchResult:
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return search(self, *arguments, **keywords)
+        started = time.perf_counter()
+        result = search(self, *arguments, **keywords)
+        instrumentation.add_time(search.__name__, started)
+        instrumentation.count('states_expanded', result.nodes_expanded)
+        instrumentation.maximum('peak_frontier', result.peak_frontier_size)
+        instrumentation.emit('search_finished', search=search.__name__, moves=result.number_of_moves, nodes_expanded=result.nodes_expanded,
+                             peak_frontier_size=result.peak_frontier_size, seconds_searching=time.perf_counter() - started, **result.details,
+                             **(self.successor_cache.statistics() if self.successor_cache is not None else {}))
+        return result
+    return wrapper
+
+
+class Search:
+    opposite_directions = {
+        'N': 'S',
+        'S': 'N',
+        'E': 'W',
+        'W': 'E'
+    }
+
+    def __init__(self, graph , wolf_link: MovingCharacter, statue_mirror: Statue, statue_shadow: Statue, maximum_steps: int = 25, goal_tiles=GOAL_TILES,
+                 live_states=None, instrumentation=None, successor_cache=None):
+        self.graph = graph
+        self.wolf_link = wolf_link
+        self.statue_mirror = statue_mirror
+        self.statue_shadow = statue_shadow
+        self.maximum_steps = maximum_steps
+        self.goal_tiles = frozenset(goal_tiles)
+        self.kernel = TransitionKernel.from_graph(graph)
+        # LiveStateIndex of the state graph; when given, moves into states that cannot reach the goal are refused
+        self.live_states = live_states
+        # Instrumentation receiving the moves tried by random_walk_search and a "search_finished" event per search
+        self.instrumentation = instrumentation
+        # SuccessorCache of the same board, shared by the searches; the informed searches ask it for moves instead of the kernel
+        if successor_cache is not None and not successor_cache.serves(self.kernel):
+            raise ValueError("The successor cache was built for another board")
+        self.successor_cache = successor_cache
+
+    @property
+    def next_states(self):
+        """next_states of the successor cache if there is one, else of the kernel: (direction code, packed next state) pairs of a packed state."""
+        return self.successor_cache.next_states if self.successor_cache is not None else self.kernel.next_states
+
+    def get_available_tiles(self, current_tile) -> set[int]:
+        """Wolf link can move to empty tiles
+
+        Args:
+            current_tile (int): where Wolf Link is currently standing.
+
+        Returns:
+            set[int]: a set of tile numbers that Wolf Link can move to.
+        """
+        neighbors = set(self.graph.neighbors(current_tile))
+        available_tiles = neighbors - set([
+            self.statue_shadow.position,
+            self.statue_mirror.position
+        ])
+        return available_tiles
+    
+    def has_reached_goal(self,) -> bool:
+        """Check if both statues are in the goal tiles.
+
+        Returns:
+            bool: true if goal reached, false otherwise.
+        """
+        positions = {self.statue_shadow.position, self.statue_mirror.position}
+        return positions == self.goal_tiles
+    
+    def has_link_moved_to_invalid_position(self,) -> bool:
+        """Check if Wolf Link has moved to a tile occupied by a statue.
+
+        Returns:
+            bool: true if Wolf Link is on the same tile as a statue, false otherwise.
+        """
+        return self.wolf_link.position in {self.statue_shadow.position, self.statue_mirror.position}
+    
+    def will_link_move_to_invalid_position(self, new_link_position: int, new_shadow_statue_position: int, new_mirror_statue_position: int) -> bool:
+        """Check if Wolf Link will move to a tile occupied by a statue after the move.
+
+        Args:
+            new_link_position (int): the tile number where Wolf Link will move to.
+            new_shadow_statue_position (int): the tile number where the shadow statue will move to.
+            new_mirror_statue_position (int): the tile number where the mirror statue will move to.
+        Returns:
+            bool: true if Wolf Link will be on the same tile as a statue after the move
+        """
+        return new_link_position in {new_shadow_statue_position, new_mirror_statue_position}
+    
+    def get_shadow_statue_new_position(self, link_movement_direction: str) -> int:
+        """Calculate the new position of the shadow statue based on Wolf Link's movement direction.
+
+        Args:
+            link_movement_direction (str): the direction in which Wolf Link is moving ('N', 'S', 'E', 'W').
+
+        Returns:
+            int: the new tile number for the shadow statue, or its current position if it cannot move.
+        """
+        # If no valid move for the shadow statue, the move table points back to its current tile
+        shadow_statue_new_position = self.kernel.neighbor(self.statue_shadow.position, DIRECTION_CODES[link_movement_direction])
+        return shadow_statue_new_position
+    
+    def get_mirror_statue_new_position(self, link_movement_direction: str) -> int:
+        """Calculate the new position of the mirror statue based on Wolf Link's movement direction.
+
+        Args:
+            link_movement_direction (str): the direction in which Wolf Link is moving ('N', 'S', 'E', 'W').
+
+        Returns:
+            int: the new tile number for the mirror statue, or its current position if it cannot move.
+        """
+        mirror_statue_direction = OPPOSITE_DIRECTION_CODES[DIRECTION_CODES[link_movement_direction]]
+        # If no valid move for the mirror statue, the move table points back to its current tile
+        mirror_statue_new_position = self.kernel.neighbor(self.statue_mirror.position, mirror_statue_direction)
+        return mirror_statue_new_position
+
+    def move(self, new_link_position: int, mirror_statue_new_position: int, shadow_statue_new_position: int):
+        """Move Wolf Link to a new tile and update the statues' positions according to their patterns.
+        """
+        # Move Statues to new positions 
+        self.statue_mirror.move(mirror_statue_new_position)
+        self.statue_shadow.move(shadow_statue_new_position)
+
+        # Move Wolf Link to the new position
+        self.wolf_link.move(new_link_position)
+
+    def random_walk_search(self,):
+        """Decide randomly where to search
+        """
+        steps = 0
+        while True:
+            where_can_link_go = self.get_available_tiles(self.wolf_link.position)
+            if not where_can_link_go:
+                print("No more available moves for Wolf Link. Search failed.")
+                break
+            else:
+                # shuffle next possible tiles for link:
+                shuffled_next_tiles = list(where_can_link_go)
+                random.shuffle(shuffled_next_tiles)
+
+                # Now, for each one, try if it is safe:
+                for next_link_position in shuffled_next_tiles:
+                    print(next_link_position)
+                    link_movement_direction = self.graph.get_edge_data(self.wolf_link.position, next_link_position).get('dir')
+                    shadow_statue_new_position = self.get_shadow_statue_new_position(link_movement_direction)
+                    mirror_statue_new_position = self.get_mirror_statue_new_position(link_movement_direction)
+
+                    print(f"Trying to move Wolf Link to {next_link_position} with direction {link_movement_direction}. Shadow Statue would move to {shadow_statue_new_position}, Mirror Statue would move to {mirror_statue_new_position}.")
+                    if self.will_link_move_to_invalid_position(next_link_position, shadow_statue_new_position, mirror_statue_new_position):
+                        print("Wolf Link moved to an invalid position. Search failed.")
+                        outcome = 'invalid'
+                    elif self.is_dead_state(self.kernel.pack(next_link_position, shadow_statue_new_position, mirror_statue_new_position)):
+                        print("The goal cannot be reached from there. Move refused.")
+                        outcome = 'dead'
+                    else:
+                        outcome = 'moved'
+                    if self.instrumentation is not None:
+                        self.instrumentation.count('moves_tried')
+                        self.instrumentation.emit('move_tried', step=steps, direction=link_movement_direction, outcome=outcome,
+                                                  state=[next_link_position, shadow_statue_new_position, mirror_statue_new_position])
+                    if outcome == 'moved':
+                        # go there
+                        self.move(
+                            next_link_position,
+                            mirror_statue_new_position,
+                            shadow_statue_new_position
+                        )
+                        # increase steps
+                        steps += 1
+                        break
+            if self.has_reached_goal():
+                print("Goal reached!")
+                break
+            if self.has_link_moved_to_invalid_position():
+                break
+            if steps >= self.maximum_steps:
+                print("Maximum steps reached. Search failed.")
+                break
+        if self.instrumentation is not None:
+            self.instrumentation.count('steps', steps)
+            self.instrumentation.emit('search_finished', search='random_walk_search', steps=steps, reached_goal=self.has_reached_goal())
+
+    def is_dead_state(self, state: int) -> bool:
+        """Whether a packed state is known to never reach the goal; always false without a live state index."""
+        return self.live_states is not None and not self.live_states.is_live(state)
+
+    def current_state(self) -> int:
+        """The characters' current positions as a packed state, see TransitionKernel."""
+        return self.kernel.pack(self.wolf_link.position, self.statue_shadow.position, self.statue_mirror.position)
+
+    def follow_path(self, path: list[tuple[int, int, int]]) -> None:
+        """Move the characters along a list of (wolf_link, shadow_statue, mirror_statue) states, recording their history."""
+        for wolf_link_position, shadow_statue_position, mirror_statue_position in path[1:]:
+            self.move(wolf_link_position, mirror_statue_position, shadow_statue_position)
+
+    @_instrumented_search
+    def astar_search(self,) -> SearchResult:
+        """A* search from the current positions, without building the state graph.
+
+        The frontier is a priority queue ordered by moves so far plus TileDistanceHeuristic,
+        which never overestimates, so the solution found is optimal. On success the characters
+        are moved along it.
+
+        Returns:
+            SearchResult: the solution with the number of states expanded and the peak frontier size.
+        """
+        kernel = self.kernel
+        heuristic = TileDistanceHeuristic(kernel, self.goal_tiles)
+        start = self.current_state()
+        tie_breaker = count()
+        frontier = [(heuristic(start), next(tie_breaker), 0, start)]
+        best_moves = {start: 0}
+        parents = {start: None}
+        nodes_expanded = 0
+        peak_frontier_size = 1
+        next_states = self.next_states
+        while frontier:
+            _, _, moves, state = heapq.heappop(frontier)
+            if moves > best_moves[state]:
+                continue  # stale entry, the state was reached by a shorter path since
+            if heuristic.is_goal(state):
+                path = [kernel.unpack(visited) for visited in self._unwind(parents, state)[::-1]]
+                self.follow_path(path)
+                return SearchResult(path, nodes_expanded, peak_frontier_size)
+            nodes_expanded += 1
+            for _, next_state in next_states(state):
+                if moves + 1 < best_moves.get(next_state, float('inf')) and not self.is_dead_state(next_state):
+                    estimate = heuristic(next_state)
+                    if estimate == float('inf'):
+                        continue  # some statue can never reach a goal tile
+                    best_moves[next_state] = moves + 1
+                    parents[next_state] = state
+                    heapq.heappush(frontier, (moves + 1 + estimate, next(tie_breaker), moves + 1, next_state))
+            peak_frontier_size = max(peak_frontier_size, len(frontier))
+        return SearchResult(None, nodes_expanded, peak_frontier_size)
+
+    @_instrumented_search
+    def bidirectional_search(self,) -> SearchResult:
+        """Breadth-first search from the current positions and backwards from every goal state at once.
+
+        Both sides expand a whole layer at a time, always the smaller one, and stop at the first
+        layer where they meet; the best meeting state of that layer gives an optimal solution.
+        On success the characters are moved along it.
+
+        Returns:
+            SearchResult: the solution with the number of states expanded and the peak frontier size.
+        """
+        kernel = self.kernel
+        start = self.current_state()
+        goal_indices = [kernel.tile_index[tile] for tile in self.goal_tiles]
+        goal_states = []
+        for link in range(kernel.number_of_tiles):
+            if link not in goal_indices:
+                for statues in permutations(goal_indices):
+                    goal_states.append(kernel.pack_indices([link, *statues]))
+        forward_parents = {start: None}
+        backward_parents = {goal_state: None for goal_state in goal_states}
+        forward_frontier, backward_frontier = [start], goal_states
+        forward_depth = {start: 0}
+        backward_depth = dict.fromkeys(goal_states, 0)
+        expanded = {'forward': 0, 'backward': 0}
+        peak_frontier_size = len(forward_frontier) + len(backward_frontier)
+        meeting_states = [start] if start in backward_parents else []
+        next_states = self.next_states
+        while not meeting_states and forward_frontier and backward_frontier:
+            forward = len(forward_frontier) <= len(backward_frontier)
+            frontier = forward_frontier if forward else backward_frontier
+            parents, depth = (forward_parents, forward_depth) if forward else (backward_parents, backward_depth)
+            other_parents = backward_parents if forward else forward_parents
+            next_frontier = []
+            for state in frontier:
+                expanded['forward' if forward else 'backward'] += 1
+                neighbors = next_states(state) if forward else kernel.predecessors(state)
+                for _, neighbor in neighbors:
+                    if neighbor not in parents and not (forward and self.is_dead_state(neighbor)):
+                        parents[neighbor] = state
+                        depth[neighbor] = depth[state] + 1
+                        next_frontier.append(neighbor)
+                        if neighbor in other_parents:
+                            meeting_states.append(neighbor)
+            if forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+            peak_frontier_size = max(peak_frontier_size, len(forward_frontier) + len(backward_frontier))
+        nodes_expanded = expanded['forward'] + expanded['backward']
+        if not meeting_states:
+            return SearchResult(None, nodes_expanded, peak_frontier_size, expanded)
+        meeting_state = min(meeting_states, key=lambda state: forward_depth[state] + backward_depth[state])
+        states = self._unwind(forward_parents, meeting_state)[::-1] + self._unwind(backward_parents, meeting_state)[1:]
+        path = [kernel.unpack(state) for state in states]
+        self.follow_path(path)
+        return SearchResult(path, nodes_expanded, peak_frontier_size, expanded)
+
+    @_instrumented_search
+    def ida_star_search(self, memory_budget: int = 1 << 20) -> SearchResult:
+        """Iterative-deepening A* from the current positions, in memory bounded by `memory_budget`.
+
+        Each iteration is a depth-first search that cuts every branch whose moves so far plus
+        TileDistanceHeuristic exceed a threshold, raised to the smallest cut value after each
+        iteration, so the first solution found is optimal. Only the current path is kept, plus a
+        fixed-size TranspositionTable that prunes states already searched at a smaller depth and
+        remembers the lower bounds learned by earlier iterations. A bigger budget means fewer
+        states expanded again; 0 gives plain IDA* with memory proportional to the solution length.
+        On success the characters are moved along the solution.
+
+        Args:
+            memory_budget (int): bytes for the transposition table.
+
+        Returns:
+            SearchResult: the solution, the states expanded over all iterations and the deepest path.
+        """
+        kernel = self.kernel
+        heuristic = TileDistanceHeuristic(kernel, self.goal_tiles)
+        table = TranspositionTable(memory_budget)
+        start = self.current_state()
+        path, on_path = [start], {start}
+        counters = {'nodes_expanded': 0, 'iterations': 0, 'deepest_path': 1}
+        next_states = self.next_states
+
+        def bound(state: int) -> float:
+            return max(heuristic(state), table.lower_bound(state))
+
+        def search(state: int, moves: int, threshold: float) -> tuple[float, bool] | None:
+            # None when a solution is found; otherwise the smallest estimate over the threshold, and whether
+            # it is a lower bound on the moves through `state`: not if a successor was skipped anywhere below.
+            estimate = moves + bound(state)
+            if estimate > threshold:
+                return estimate, True
+            if heuristic.is_goal(state):
+                return None
+            counters['nodes_expanded'] += 1
+            counters['deepest_path'] = max(counters['deepest_path'], len(path))
+            table.store(state, moves, int(estimate - moves))
+            smallest = float('inf')
+            # The smallest estimate is only a valid lower bound if no successor was skipped, in the whole subtree.
+            complete = True
+            for _, next_state in next_states(state):
+                if next_state in on_path or self.is_dead_state(next_state) or table.seen_at_most(next_state, moves + 1):
+                    complete = False
+                    continue
+                path.append(next_state)
+                on_path.add(next_state)
+                result = search(next_state, moves + 1, threshold)
+                if result is None:
+                    return None
+                path.pop()
+                on_path.discard(next_state)
+                smallest = min(smallest, result[0])
+                complete = complete and result[1]
+            if complete and smallest != float('inf'):
+                table.store(state, moves, int(smallest - moves))
+            return smallest, complete
+
+        threshold = bound(start)
+        while threshold != float('inf'):
+            counters['iterations'] += 1
+            table.next_iteration()
+            result = search(start, 0, threshold)
+            if result is None:
+                solution = [kernel.unpack(state) for state in path]
+                self.follow_path(solution)
+                return SearchResult(solution, counters['nodes_expanded'], counters['deepest_path'], self._ida_star_details(counters, table))
+            threshold = result[0]
+        return SearchResult(None, counters['nodes_expanded'], counters['deepest_path'], self._ida_star_details(counters, table))
+
+    @staticmethod
+    def _ida_star_details(counters: dict, table: TranspositionTable) -> dict:
+        return {
+            'iterations': counters['iterations'],
+            'table_entries': len(table),
+            'table_bytes': table.memory_usage,
+            'table_hits': table.hits,
+            'table_replacements': table.replacements,
+        }
+
+    @staticmethod
+    def _unwind(parents: dict, state: int) -> list[int]:
+        states = []
+        while state is not None:
+            states.append(state)
+            state = parents[state]
+        return states
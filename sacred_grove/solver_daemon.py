@@ -0,0 +1,280 @@
+"""Long-running solver service answering queries from a preloaded state graph and distance table.
+
+The service speaks JSON lines over a Unix socket (or a localhost TCP port): one request object
+per line, one response object per line, in order. Requests name a method and carry either one
+state or a batch of states, each state being [wolf_link, shadow_statue, mirror_statue]:
+
+    {"id": 1, "method": "distance", "state": [11, 13, 9]}
+    {"id": 2, "method": "next_move", "states": [[11, 13, 9], [12, 13, 9]]}
+    {"id": 3, "method": "solve", "state": [11, 13, 9]}
+    {"id": 4, "method": "stats"}
+
+Responses echo the id and hold either "result" (a list for batched requests) or "error":
+
+    {"id": 1, "result": 12}
+    {"id": 2, "result": [["N", [7, 13, 15]], ["N", [8, 13, 15]]]}
+    {"id": 3, "error": "(5, 5, 9) is not a state of this state graph"}
+
+A state that is not in the served graph is an error, while a state of the graph that cannot
+reach a goal gets -1 (distance) or null (next_move, solve). Files written by main.py or by
+`sacred-grove generate --complete` hold every placement, so only malformed states are errors.
+
+Start it from the repository root with:
+
+    python -m sacred_grove.solver_daemon --socket /tmp/sacred-grove.sock
+"""
+import argparse
+import asyncio
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from sacred_grove.compact_state_graph import CompactStateGraph
+from sacred_grove.distance_table import UNREACHABLE, DistanceTable
+from sacred_grove.state_graph_format import load_state_graph
+from sacred_grove.transition_kernel import DIRECTIONS
+
+DEFAULT_STATE_GRAPH_FILE = Path(__file__).parent / 'state-graph.bin'
+# Batched requests can be long lines.
+STREAM_LIMIT = 64 * 2 ** 20
+
+
+class SolverService:
+    """Answers solver queries from tables loaded once.
+
+    Args:
+        distance_table (DistanceTable): distances of the state graph to serve.
+        cache_size (int): number of full solutions kept in the LRU cache.
+    """
+
+    def __init__(self, distance_table: DistanceTable, cache_size: int = 4096):
+        self.distance_table = distance_table
+        self.state_graph: CompactStateGraph = distance_table.state_graph
+        self.kernel = distance_table.kernel
+        self.requests_served = 0
+        self.started = time.time()
+        self._cached_solve = lru_cache(maxsize=cache_size)(self._solve)
+        self.methods = {
+            'distance': self.distance,
+            'next_move': self.next_move,
+            'solve': self.solve,
+        }
+
+    @classmethod
+    def from_file(cls, file_name=DEFAULT_STATE_GRAPH_FILE, cache_size: int = 4096) -> 'SolverService':
+        """Load a binary state graph file, building the distance table if the file has none."""
+        state_graph, distance_table = load_state_graph(file_name)
+        if distance_table is None:
+            distance_table = DistanceTable.from_state_graph(state_graph)
+        return cls(distance_table, cache_size)
+
+    def distances(self, states: list[tuple[int, ...]]) -> list[int]:
+        """Distances of many states with a single vectorized lookup.
+
+        Raises:
+            KeyError: if a state is not in the state graph.
+        """
+        if not states:
+            return []
+        indices = self._indices(states, self.kernel.pack_batch(self._tile_indices(states)))
+        return self.distance_table.distances[indices].tolist()
+
+    def next_moves(self, states: list[tuple[int, ...]]) -> list[tuple[str, tuple[int, ...]] | None]:
+        """Vectorized `next_move`: the same move DistanceTable.best_next_move picks, for many states at once.
+
+        Raises:
+            KeyError: if a state is not in the state graph.
+        """
+        if not states:
+            return []
+        packed = self.kernel.pack_batch(self._tile_indices(states))
+        distances = self.distance_table.distances[self._indices(states, packed)]
+        successors = self.kernel.successors_batch(packed)
+        optimal = (self._packed_distances(successors) == (distances - 1)[:, None]) & (distances > 0)[:, None]
+        directions = np.argmax(optimal, axis=1)
+        found = optimal.any(axis=1)
+        next_states = successors[np.arange(len(packed)), directions]
+        return [
+            (DIRECTIONS[direction], self.kernel.unpack(next_state)) if has_move else None
+            for has_move, direction, next_state in zip(found.tolist(), directions.tolist(), next_states.tolist())
+        ]
+
+    def _indices(self, states, packed: np.ndarray) -> np.ndarray:
+        # Indices of the packed `states` in the state graph, KeyError like DistanceTable.index for the first missing one.
+        indices = self.state_graph.indices_of(packed)
+        missing = np.flatnonzero(indices < 0)
+        if missing.size:
+            raise KeyError(f"{tuple(states[missing[0]])} is not a state of this state graph")
+        return indices
+
+    def _packed_distances(self, packed: np.ndarray) -> np.ndarray:
+        # UNREACHABLE for states outside the graph, including INVALID_STATE.
+        indices = self.state_graph.indices_of(packed)
+        return np.where(indices >= 0, self.distance_table.distances[np.maximum(indices, 0)], UNREACHABLE)
+
+    def distance(self, state: tuple[int, ...]) -> int:
+        return self.distances([state])[0]
+
+    def next_move(self, state: tuple[int, ...]) -> tuple[str, tuple[int, ...]] | None:
+        return self.distance_table.best_next_move(state)
+
+    def solve(self, state: tuple[int, ...]) -> list[tuple[int, ...]] | None:
+        path = self._cached_solve(state)
+        return list(path) if path is not None else None
+
+    def _solve(self, state: tuple[int, ...]) -> tuple[tuple[int, ...], ...] | None:
+        path = self.distance_table.solve(state)
+        return tuple(path) if path is not None else None
+
+    def _tile_indices(self, states) -> np.ndarray:
+        # Tile labels to tile indices, see TransitionKernel; rejects states that are not placements on the board.
+        size = self.kernel.number_of_statues + 1
+        if not states:
+            return np.empty((0, size), dtype=np.int64)
+        for state in states:
+            # Checked before the cast, which would truncate 11.5 to 11 (bool is an int subclass, so it is excluded by name).
+            if not isinstance(state, (list, tuple)) or len(state) != size:
+                raise ValueError(f"states must have {size} positions each")
+            if any(type(position) is not int for position in state):
+                raise ValueError(f"positions must be integer tile labels, got {list(state)}")
+        placements = np.asarray(states, dtype=np.int64)
+        tiles = np.asarray(self.kernel.tiles)
+        indices = np.searchsorted(tiles, placements)
+        if np.any(indices >= len(tiles)) or np.any(tiles[np.minimum(indices, len(tiles) - 1)] != placements):
+            raise ValueError("states must only use tiles of the board")
+        return indices
+
+    def stats(self) -> dict:
+        cache = self._cached_solve.cache_info()
+        return {
+            'states': len(self.state_graph),
+            'requests_served': self.requests_served,
+            'uptime_seconds': time.time() - self.started,
+            'solve_cache': {'hits': cache.hits, 'misses': cache.misses, 'size': cache.currsize, 'maximum_size': cache.maxsize},
+        }
+
+    def handle(self, request: dict) -> dict:
+        """Answer one decoded request, see the module docstring for the protocol."""
+        if not isinstance(request, dict):
+            return {'id': None, 'error': "requests must be JSON objects"}
+        response = {'id': request.get('id')}
+        try:
+            method = request.get('method')
+            if method == 'stats':
+                response['result'] = self.stats()
+            elif method not in self.methods:
+                raise ValueError(f"unknown method {method!r}, expected one of {sorted([*self.methods, 'stats'])}")
+            elif 'states' in request:
+                states = [tuple(state) for state in request['states']]
+                self._tile_indices(states)
+                if method == 'distance':
+                    response['result'] = self.distances(states)
+                elif method == 'next_move':
+                    response['result'] = self.next_moves(states)
+                else:
+                    response['result'] = [self.methods[method](state) for state in states]
+            elif 'state' in request:
+                state = tuple(request['state'])
+                self._tile_indices([state])
+                response['result'] = self.methods[method](state)
+            else:
+                raise ValueError("request needs a 'state' or a 'states' field")
+        except (ValueError, TypeError) as error:
+            response.pop('result', None)
+            response['error'] = str(error)
+        except KeyError as error:
+            # str() of a KeyError quotes its message.
+            response.pop('result', None)
+            response['error'] = error.args[0]
+        self.requests_served += 1
+        return response
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                try:
+                    response = self.handle(json.loads(line))
+                except json.JSONDecodeError as error:
+                    response = {'id': None, 'error': f"invalid JSON: {error}"}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionResetError:
+            pass
+        finally:
+            writer.close()
+
+
+async def start_server(service: SolverService, socket_path=None, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+    """Start serving `service` on a Unix socket if `socket_path` is given, on a localhost TCP port otherwise."""
+    if socket_path is not None:
+        Path(socket_path).unlink(missing_ok=True)
+        return await asyncio.start_unix_server(service.handle_connection, path=str(socket_path), limit=STREAM_LIMIT)
+    return await asyncio.start_server(service.handle_connection, host=host, port=port, limit=STREAM_LIMIT)
+
+
+class SolverClient:
+    """Minimal asyncio client for the solver service; requests on one connection are answered in order."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 0
+
+    @classmethod
+    async def connect(cls, socket_path=None, host: str = '127.0.0.1', port: int | None = None) -> 'SolverClient':
+        if socket_path is not None:
+            return cls(*await asyncio.open_unix_connection(str(socket_path), limit=STREAM_LIMIT))
+        return cls(*await asyncio.open_connection(host, port, limit=STREAM_LIMIT))
+
+    async def request(self, method: str, state=None, states=None):
+        """Send one request and wait for its result.
+
+        Raises:
+            ValueError: if the service answers with an error.
+        """
+        self._next_id += 1
+        request = {'id': self._next_id, 'method': method}
+        if state is not None:
+            request['state'] = list(state)
+        if states is not None:
+            request['states'] = [list(state) for state in states]
+        self.writer.write(json.dumps(request).encode() + b'\n')
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if 'error' in response:
+            raise ValueError(response['error'])
+        return response['result']
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def serve_forever(file_name, socket_path=None, host: str = '127.0.0.1', port: int = 0, cache_size: int = 4096) -> None:
+    start = time.perf_counter()
+    service = SolverService.from_file(file_name, cache_size)
+    server = await start_server(service, socket_path, host, port)
+    address = socket_path if socket_path is not None else '%s:%d' % server.sockets[0].getsockname()[:2]
+    print(f"Loaded {len(service.state_graph)} states in {(time.perf_counter() - start) * 1e3:.1f} ms, serving on {address}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve solve, next_move and distance queries for a compiled state graph.")
+    parser.add_argument('--file', default=DEFAULT_STATE_GRAPH_FILE, help="binary state graph file (default: state-graph.bin)")
+    parser.add_argument('--socket', help="Unix socket path; serves on localhost TCP when omitted")
+    parser.add_argument('--port', type=int, default=8765, help="TCP port when no socket is given")
+    parser.add_argument('--cache-size', type=int, default=4096, help="number of solutions kept in the LRU cache")
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(serve_forever(arguments.file, arguments.socket, port=arguments.port, cache_size=arguments.cache_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Compact binary state graph files.
+
+Layout (little endian), every section starting on an 8-byte boundary:
+
+    header      magic b'SGRV', uint16 version, uint16 flags,
+                uint64 number of tiles, states, edges, goal tiles and statues
+    tiles       int64[number of tiles]        tile labels, see TransitionKernel
+    move_table  int64[number of tiles * 4]    compiled neighbor indices
+    patterns    uint8[number of statues]      statue patterns, as positions in STATUE_PATTERNS
+    goal_tiles  int64[number of goal tiles]
+    states      int64[number of states]       sorted packed state ids
+    offsets     int64[number of states + 1]   CSR offsets of the outgoing edges
+    targets     int64[number of edges]        target state index of every edge
+    directions  uint8[number of edges]        direction code of every edge
+    distances   int32[number of states]       distance to goal, only if FLAG_DISTANCES is set
+    live_states uint8[(number of states + 7) // 8]  bitset of the states that can reach a goal, only if FLAG_LIVE_STATES is set
+
+Loading memory-maps the file and hands out zero-copy views, so opening even a graph with
+millions of states only touches the pages that are actually read.
+"""
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from sacred_grove.bitset import bitset_size
+from sacred_grove.compact_state_graph import CompactStateGraph
+from sacred_grove.dead_states import LiveStateIndex
+from sacred_grove.distance_table import GOAL_TILES, DistanceTable
+from sacred_grove.transition_kernel import DIRECTIONS, SACRED_GROVE_PATTERNS, STATUE_PATTERNS, TransitionKernel
+
+MAGIC = b'SGRV'
+# Version 2 added the statue patterns.
+FORMAT_VERSION = 2
+FLAG_DISTANCES = 1
+# Optional sections only append to the layout, so they do not need a new version.
+FLAG_LIVE_STATES = 2
+
+_HEADER = struct.Struct('<4sHHQQQQQ')
+_PATTERN_NAMES = list(STATUE_PATTERNS)
+
+
+def _sections(number_of_tiles: int, number_of_states: int, number_of_edges: int, number_of_goal_tiles: int, number_of_statues: int, flags: int):
+    sections = [
+        ('tiles', np.int64, number_of_tiles),
+        ('move_table', np.int64, number_of_tiles * len(DIRECTIONS)),
+        ('patterns', np.uint8, number_of_statues),
+        ('goal_tiles', np.int64, number_of_goal_tiles),
+        ('states', np.int64, number_of_states),
+        ('offsets', np.int64, number_of_states + 1),
+        ('targets', np.int64, number_of_edges),
+        ('directions', np.uint8, number_of_edges),
+    ]
+    if flags & FLAG_DISTANCES:
+        sections.append(('distances', np.int32, number_of_states))
+    if flags & FLAG_LIVE_STATES:
+        sections.append(('live_states', np.uint8, bitset_size(number_of_states)))
+    offset = _HEADER.size
+    for name, dtype, count in sections:
+        offset = (offset + 7) // 8 * 8
+        yield name, dtype, count, offset
+        offset += np.dtype(dtype).itemsize * count
+
+
+def save_state_graph(file_name, state_graph: CompactStateGraph, distance_table: DistanceTable | None = None, goal_tiles=GOAL_TILES,
+                     live_states: LiveStateIndex | None = None) -> None:
+    """Write a state graph, and optionally its distance table and live state index, to a binary file.
+
+    Args:
+        file_name (str | Path): where to write.
+        state_graph (CompactStateGraph): the graph to save.
+        distance_table (DistanceTable | None): distances to store next to the graph; its goal tiles take precedence.
+        goal_tiles (Iterable[int]): goal tiles recorded in the file when there is no distance table.
+        live_states (LiveStateIndex | None): live state bitset to store next to the graph.
+    """
+    kernel = state_graph.kernel
+    flags = (FLAG_DISTANCES if distance_table is not None else 0) | (FLAG_LIVE_STATES if live_states is not None else 0)
+    goal_tiles = sorted(distance_table.goal_tiles if distance_table is not None else goal_tiles)
+    arrays = {
+        'tiles': np.asarray(kernel.tiles),
+        'move_table': kernel.move_table,
+        'patterns': np.array([_PATTERN_NAMES.index(pattern) for pattern in kernel.statue_patterns]),
+        'goal_tiles': np.asarray(goal_tiles),
+        'states': state_graph.states,
+        'offsets': state_graph.offsets,
+        'targets': state_graph.targets,
+        'directions': state_graph.directions,
+    }
+    if distance_table is not None:
+        arrays['distances'] = distance_table.distances
+    if live_states is not None:
+        arrays['live_states'] = live_states.live
+    with open(file_name, 'wb') as file:
+        counts = (kernel.number_of_tiles, len(state_graph), state_graph.number_of_edges, len(goal_tiles), kernel.number_of_statues)
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, flags, *counts))
+        for name, dtype, count, offset in _sections(*counts, flags):
+            file.write(b'\0' * (offset - file.tell()))
+            file.write(np.ascontiguousarray(arrays[name], dtype=dtype).tobytes())
+
+
+def load_state_graph(file_name) -> tuple[CompactStateGraph, DistanceTable | None]:
+    """Memory-map a binary state graph file.
+
+    Args:
+        file_name (str | Path): a file written by save_state_graph.
+
+    Raises:
+        ValueError: if the file is not a state graph file or has an unsupported version.
+
+    Returns:
+        tuple[CompactStateGraph, DistanceTable | None]: the graph, and its distance table if the file has one.
+    """
+    state_graph, distance_table, _ = load_state_graph_with_live_states(file_name)
+    return state_graph, distance_table
+
+
+def load_state_graph_with_live_states(file_name) -> tuple[CompactStateGraph, DistanceTable | None, LiveStateIndex | None]:
+    """Like load_state_graph, also returning the live state index if the file has one."""
+    buffer = np.memmap(file_name, dtype=np.uint8, mode='r')
+    if len(buffer) < _HEADER.size:
+        raise ValueError(f"{file_name} is too short to be a state graph file")
+    magic, version, flags, *counts = _HEADER.unpack(bytes(buffer[:_HEADER.size]))
+    if magic != MAGIC:
+        raise ValueError(f"{file_name} is not a state graph file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{file_name} has format version {version}, expected {FORMAT_VERSION}")
+    arrays = {
+        name: np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+        for name, dtype, count, offset in _sections(*counts, flags)
+    }
+    kernel = TransitionKernel(arrays['tiles'], arrays['move_table'], [_PATTERN_NAMES[code] for code in arrays['patterns']])
+    state_graph = CompactStateGraph(
+        kernel=kernel,
+        states=arrays['states'],
+        offsets=arrays['offsets'],
+        targets=arrays['targets'],
+        directions=arrays['directions'],
+    )
+    goal_tiles = arrays['goal_tiles'].tolist()
+    distance_table = DistanceTable(state_graph, arrays['distances'], goal_tiles) if flags & FLAG_DISTANCES else None
+    live_states = LiveStateIndex(state_graph, arrays['live_states']) if flags & FLAG_LIVE_STATES else None
+    return state_graph, distance_table, live_states
+
+
+def graphml_to_binary(graphml_file_name, binary_file_name, tile_graph, goal_tiles=GOAL_TILES, with_distances: bool = True,
+                      statue_patterns=SACRED_GROVE_PATTERNS) -> CompactStateGraph:
+    """Convert a GraphML state graph (as written by main.save_state_graph) to the binary format.
+
+    The GraphML file does not record move directions, so they are recovered from `tile_graph`.
+
+    Args:
+        graphml_file_name (str | Path): the GraphML file to read.
+        binary_file_name (str | Path): the binary file to write.
+        tile_graph (nx.DiGraph): the tile graph the state graph was generated from.
+        goal_tiles (Iterable[int]): goal tiles for the distance table.
+        with_distances (bool): also compute and store the distance table.
+        statue_patterns (Sequence[str]): the statues of the state graph, in state order.
+
+    Returns:
+        CompactStateGraph: the converted graph.
+    """
+    import networkx as nx
+
+    graphml = nx.read_graphml(graphml_file_name)
+    kernel = TransitionKernel.from_graph(tile_graph, statue_patterns)
+    packed = {
+        node: kernel.pack(*(data[name] for name in kernel.position_names))
+        for node, data in graphml.nodes(data=True)
+    }
+    states = np.array(sorted(packed.values()), dtype=np.int64)
+    edge_sources = np.array([packed[source] for source, _ in graphml.edges], dtype=np.int64)
+    edge_targets = np.array([packed[target] for _, target in graphml.edges], dtype=np.int64)
+    successors = kernel.successors_batch(edge_sources)
+    directions = np.argmax(successors == edge_targets[:, None], axis=1)
+    if not np.all(successors[np.arange(len(edge_sources)), directions] == edge_targets):
+        raise ValueError(f"{graphml_file_name} has edges that are not moves of the given tile graph")
+    state_graph = CompactStateGraph.from_edges(
+        kernel,
+        states,
+        sources=np.searchsorted(states, edge_sources),
+        targets=np.searchsorted(states, edge_targets),
+        directions=directions,
+    )
+    distance_table = DistanceTable.from_state_graph(state_graph, goal_tiles) if with_distances else None
+    save_state_graph(binary_file_name, state_graph, distance_table, goal_tiles)
+    return state_graph
+
+
+def binary_to_graphml(binary_file_name, graphml_file_name) -> None:
+    """Convert a binary state graph file to GraphML with the same node attributes main.save_state_graph writes."""
+    import networkx as nx
+
+    state_graph, _ = load_state_graph(binary_file_name)
+    nx.write_graphml(state_graph.to_networkx(), Path(graphml_file_name), encoding='utf-8', infer_numeric_types=True)
@@ -0,0 +1,368 @@
+import time
+
+import numpy as np
+
+from sacred_grove.bitset import bitset_members, new_bitset, set_bits, test_bits
+from sacred_grove.board import GOAL_TILES, SACRED_GROVE, Board
+from sacred_grove.compact_state_graph import CompactStateGraph
+from sacred_grove.instrumentation import phase_timer
+from sacred_grove.transition_kernel import DIRECTION_CODES, INVALID_STATE, OPPOSITE_DIRECTION_CODES, SACRED_GROVE_PATTERNS, TransitionKernel
+
+class StateGraphGenerator:
+
+    opposite_directions = {
+        'N': 'S',
+        'S': 'N',
+        'E': 'W',
+        'W': 'E'
+    }
+
+    def __init__(self, graph, maximum_number_of_states: int = 7980, statue_patterns=SACRED_GROVE_PATTERNS, start=SACRED_GROVE.start,
+                 successor_cache=None, kernel: TransitionKernel | None = None):
+        # The tile graph; None for generators made by from_board, which build it on first use
+        self._graph = graph
+        self._board = None
+        self.maximum_number_of_states = maximum_number_of_states
+        self.kernel = kernel if kernel is not None else TransitionKernel.from_graph(graph, statue_patterns)
+        self.start = tuple(start)
+        # SuccessorCache of the same board answering get_next_states, for callers that expand the same states repeatedly
+        if successor_cache is not None and not successor_cache.serves(self.kernel):
+            raise ValueError("The successor cache was built for another board")
+        self.successor_cache = successor_cache
+
+    @classmethod
+    def from_board(cls, board: Board) -> 'StateGraphGenerator':
+        """Generator for any board, with as many statues as the board has.
+
+        The state cap is the number of ways to place Wolf Link and the statues on distinct tiles.
+        The move table is compiled straight from the board, so networkx is only imported if the
+        tile graph itself is used, e.g. by brute_force_state_graph_generation.
+        """
+        maximum_number_of_states = 1
+        for placed in range(len(board.start)):
+            maximum_number_of_states *= board.number_of_tiles - placed
+        generator = cls(None, maximum_number_of_states, board.statue_patterns, board.start, kernel=board.kernel())
+        generator._board = board
+        return generator
+
+    @property
+    def graph(self):
+        """The tile graph (nx.DiGraph) the generator moves on."""
+        if self._graph is None:
+            self._graph = self._board.tile_graph()
+        return self._graph
+
+    def get_available_tiles(self, current_tile, statue_shadow_position, statue_mirror_position) -> set[int]:
+        """Wolf link can move to empty tiles
+
+        Args:
+            current_tile (int): where Wolf Link is currently standing.
+
+        Returns:
+            set[int]: a set of tile numbers that Wolf Link can move to.
+        """
+        neighbors = set(self.graph.neighbors(current_tile))
+        available_tiles = neighbors - set([
+            statue_shadow_position,
+            statue_mirror_position
+        ])
+        return available_tiles      
+    
+    def will_link_move_to_invalid_position(self, new_link_position: int, new_shadow_statue_position: int, new_mirror_statue_position: int) -> bool:
+        """Check if Wolf Link will move to a tile occupied by a statue after the move.
+
+        Args:
+            new_link_position (int): the tile number where Wolf Link will move to.
+            new_shadow_statue_position (int): the tile number where the shadow statue will move to.
+            new_mirror_statue_position (int): the tile number where the mirror statue will move to.
+        Returns:
+            bool: true if Wolf Link will be on the same tile as a statue after the move
+        """
+        return new_link_position in {new_shadow_statue_position, new_mirror_statue_position}
+    
+    def get_shadow_statue_new_position(self, statue_shadow_position: int, link_movement_direction: str, old_mirror_statue_position) -> int:
+        """Calculate the new position of the shadow statue based on Wolf Link's movement direction.
+
+        Args:
+            statue_shadow_position (int): the current position of the shadow statue.
+            link_movement_direction (str): the direction in which Wolf Link is moving ('N', 'S', 'E', 'W').
+
+        Returns:
+            int: the new tile number for the shadow statue, or its current position if it cannot move.
+        """
+        # If no valid move for the shadow statue, the move table points back to its current tile
+        shadow_statue_new_position = self.kernel.neighbor(statue_shadow_position, DIRECTION_CODES[link_movement_direction])
+        if shadow_statue_new_position == old_mirror_statue_position:
+            # If the shadow statue tries to move to the tile where the mirror statue is, it cannot move and stays in place
+            shadow_statue_new_position = statue_shadow_position
+        return shadow_statue_new_position
+    
+    def get_mirror_statue_new_position(self, statue_mirror_position: int, link_movement_direction: str, old_shadow_statue_position: int) -> int:
+        """Calculate the new position of the mirror statue based on Wolf Link's movement direction.
+
+        Args:
+            statue_mirror_position (int): the current position of the mirror statue.
+            link_movement_direction (str): the direction in which Wolf Link is moving ('N', 'S', 'E', 'W').
+
+        Returns:
+            int: the new tile number for the mirror statue, or its current position if it cannot move.
+        """
+        mirror_statue_direction = OPPOSITE_DIRECTION_CODES[DIRECTION_CODES[link_movement_direction]]
+        # If no valid move for the mirror statue, the move table points back to its current tile
+        mirror_statue_new_position = self.kernel.neighbor(statue_mirror_position, mirror_statue_direction)
+        if mirror_statue_new_position == old_shadow_statue_position:
+            # If the mirror statue tries to move to the tile where the shadow statue is, it cannot move and stays in place
+            mirror_statue_new_position = statue_mirror_position
+        return mirror_statue_new_position   
+
+    def get_next_states(self, current_state: tuple[int, int, int]) -> list[tuple[int, int, int]]:
+        """Generate the next possible states based on the current state.
+
+        Args:
+            current_state (tuple[int, int, int]): a tuple representing the current positions of Wolf Link, the shadow statue, and the mirror statue
+                (or of Wolf Link and every statue, for boards with other statues).
+
+        Returns:
+            list[tuple[int, int, int]]: a list of tuples representing the next possible states.
+        """
+        # Each move is a handful of array lookups in the compiled move table, see TransitionKernel.step
+        state = self.kernel.pack(*current_state)
+        moves = self.successor_cache if self.successor_cache is not None else self.kernel
+        return [self.kernel.unpack(next_state) for _, next_state in moves.next_states(state)]
+
+    def brute_force_state_graph_generation(self, *start_positions: int, wolf_link_position: int | None = None,
+                                           shadow_statue_position: int | None = None, mirror_statue_position: int | None = None,
+                                           instrumentation=None):
+        """Depth-first generation of the reachable state graph as an nx.DiGraph.
+
+        Args:
+            start_positions (int): Wolf Link's tile, then every statue's tile. Defaults to the generator's start.
+            wolf_link_position (int | None): with shadow_statue_position and mirror_statue_position, the start
+                of a two-statue board by keyword, as before boards had any number of statues. Positions left
+                out are taken from the generator's start.
+            instrumentation (Instrumentation | None): if given, receives counters, 'expand'/'dedupe'/'graph_insert'
+                phase times and a "progress" event every `progress_every` states.
+        """
+        keyword_positions = (wolf_link_position, shadow_statue_position, mirror_statue_position)
+        if any(position is not None for position in keyword_positions):
+            if start_positions:
+                raise TypeError("Give the start positions either positionally or by keyword, not both")
+            if len(self.start) != len(keyword_positions):
+                raise TypeError(f"The position keywords only describe boards with two statues, this one has {len(self.start) - 1}")
+            start_positions = tuple(default if position is None else position for position, default in zip(keyword_positions, self.start))
+        state = tuple(start_positions) or self.start
+        if instrumentation is not None:
+            # A separate loop, so the plain one does not test for instrumentation at every state.
+            return self._instrumented_brute_force_state_graph_generation(state, instrumentation)
+        position_names = self.kernel.position_names
+        import networkx as nx
+
+        state_graph = nx.DiGraph()
+        states_to_visit_stack = [state]
+        visited_states = set()
+        while states_to_visit_stack:
+            # Check if the current state has already been added to the state graph
+            current_state = states_to_visit_stack.pop()
+            if current_state in visited_states: 
+            # if current_state in state_graph: 
+                pass
+            else:
+                visited_states.add(current_state)
+                state_graph.add_node(current_state, **dict(zip(position_names, current_state)))
+                # Generate new states based on possible moves for Wolf Link
+                # For each possible move for Wolf Link, calculate the new positions of the statues and create a new state tuple
+                # This will lead to new possible states that can be added to the state graph
+                # Add each new state to the states_to_visit_stack for further exploration
+                # Also add edges to the state graph to represent the transitions between states based on Wolf Link's moves
+                # This process will continue until all reachable states have been explored and added to the state graph
+                next_states = self.get_next_states(current_state)
+                for next_state in next_states:
+                    # First we add the new node
+                    state_graph.add_node(next_state, **dict(zip(position_names, next_state)))
+                    # Then we add the edge from the current state to the new state
+                    state_graph.add_edge(current_state, next_state)
+                    # At last, we add the new state to the stack to explore its neighbors later
+                    states_to_visit_stack.append(next_state)
+            if len(state_graph) >= self.maximum_number_of_states:
+                print("Maximum number of states reached. Stopping state graph generation.")
+                break
+        return state_graph
+
+    def _instrumented_brute_force_state_graph_generation(self, state: tuple[int, ...], instrumentation):
+        # brute_force_state_graph_generation, charging every step to its phase and reporting progress.
+        position_names = self.kernel.position_names
+        import networkx as nx
+
+        state_graph = nx.DiGraph()
+        states_to_visit_stack = [state]
+        visited_states = set()
+        while states_to_visit_stack:
+            clock = time.perf_counter()
+            current_state = states_to_visit_stack.pop()
+            if current_state in visited_states:
+                instrumentation.count('duplicate_hits')
+                instrumentation.add_time('dedupe', clock)
+            else:
+                visited_states.add(current_state)
+                clock = instrumentation.add_time('dedupe', clock)
+                state_graph.add_node(current_state, **dict(zip(position_names, current_state)))
+                clock = instrumentation.add_time('graph_insert', clock)
+                next_states = self.get_next_states(current_state)
+                clock = instrumentation.add_time('expand', clock)
+                for next_state in next_states:
+                    state_graph.add_node(next_state, **dict(zip(position_names, next_state)))
+                    state_graph.add_edge(current_state, next_state)
+                    states_to_visit_stack.append(next_state)
+                instrumentation.add_time('graph_insert', clock)
+                instrumentation.count('states_expanded')
+                instrumentation.count('edges_emitted', len(next_states))
+                instrumentation.maximum('peak_stack_depth', len(states_to_visit_stack))
+                if len(visited_states) % instrumentation.progress_every == 0:
+                    instrumentation.emit('progress', states=len(visited_states), stack_depth=len(states_to_visit_stack),
+                                         **instrumentation.metrics())
+            if len(state_graph) >= self.maximum_number_of_states:
+                print("Maximum number of states reached. Stopping state graph generation.")
+                instrumentation.emit('state_cap_reached', states=len(state_graph), maximum_number_of_states=self.maximum_number_of_states)
+                break
+        instrumentation.emit('generation_finished', generator='brute_force', states=len(state_graph),
+                             edges=state_graph.number_of_edges(), **instrumentation.metrics())
+        return state_graph
+
+    def batched_state_graph_generation(self, *start_positions: int, live_states=None, instrumentation=None) -> CompactStateGraph:
+        """Level-synchronous breadth-first generation of the reachable state graph.
+
+        The whole frontier is kept as an array of packed states and all four moves of every
+        frontier state are computed in one batched kernel call. Visited states are tracked in a
+        bitset indexed by packed state id, so there is no per-state Python work and no state cap.
+
+        Args:
+            start_positions (int): Wolf Link's tile, then every statue's tile. Defaults to the generator's start.
+            live_states (LiveStateIndex | None): if given, dead states are pruned on the fly: moves into
+                them are dropped and they are never expanded.
+            instrumentation (Instrumentation | None): if given, receives counters, 'expand'/'dedupe'/'graph_insert'
+                phase times and one "layer" event per BFS layer.
+
+        Returns:
+            CompactStateGraph: reachable states and the edges between them.
+        """
+        kernel = self.kernel
+        phase = phase_timer(instrumentation)
+        visited = new_bitset(kernel.number_of_states)
+        frontier = np.array([kernel.pack(*(start_positions or self.start))], dtype=np.int64)
+        set_bits(visited, frontier)
+        edge_sources, edge_targets, edge_directions = [], [], []
+        layer = 0
+        while frontier.size:
+            with phase('expand'):
+                successors = kernel.successors_batch(frontier)
+                valid = successors != INVALID_STATE
+                if live_states is not None:
+                    valid &= live_states.are_live(successors)
+                rows, directions = np.nonzero(valid)
+                targets = successors[rows, directions]
+                edge_sources.append(frontier[rows])
+                edge_targets.append(targets)
+                edge_directions.append(directions.astype(np.uint8))
+            expanded = len(frontier)
+            with phase('dedupe'):
+                frontier = np.unique(targets[~test_bits(visited, targets)])
+                set_bits(visited, frontier)
+            if instrumentation is not None:
+                layer += 1
+                self._report_layer(instrumentation, layer, expanded, len(targets), len(frontier))
+
+        with phase('graph_insert'):
+            states = bitset_members(visited, kernel.number_of_states)
+            state_graph = CompactStateGraph.from_edges(
+                kernel,
+                states,
+                sources=np.searchsorted(states, np.concatenate(edge_sources)),
+                targets=np.searchsorted(states, np.concatenate(edge_targets)),
+                directions=np.concatenate(edge_directions),
+            )
+        if instrumentation is not None:
+            instrumentation.emit('generation_finished', generator='batched', states=len(state_graph),
+                                 edges=state_graph.number_of_edges, layers=layer, **instrumentation.metrics())
+        return state_graph
+
+    @staticmethod
+    def _report_layer(instrumentation, layer: int, expanded: int, edges: int, new_states: int) -> None:
+        instrumentation.count('states_expanded', expanded)
+        instrumentation.count('edges_emitted', edges)
+        instrumentation.count('duplicate_hits', edges - new_states)
+        instrumentation.maximum('peak_frontier', new_states)
+        instrumentation.emit('layer', layer=layer, states_expanded=expanded, edges_emitted=edges, new_states=new_states,
+                             states_per_second=instrumentation.metrics()['states_per_second'])
+
+    def parallel_state_graph_generation(self, *start_positions: int, number_of_workers: int | None = None) -> CompactStateGraph:
+        """batched_state_graph_generation spread over worker processes, see parallel_generation.
+
+        Args:
+            start_positions (int): Wolf Link's tile, then every statue's tile. Defaults to the generator's start.
+            number_of_workers (int | None): number of worker processes, one per CPU by default.
+
+        Returns:
+            CompactStateGraph: the same graph as batched_state_graph_generation.
+        """
+        from sacred_grove.parallel_generation import parallel_state_graph_generation
+
+        return parallel_state_graph_generation(self.kernel, tuple(start_positions) or self.start, number_of_workers)
+
+    def out_of_core_state_graph_generation(self, directory, *start_positions: int, chunk_size: int = 1 << 20):
+        """Breadth-first generation that keeps the visited states and the layers on disk, see out_of_core_generation.
+
+        Unlike brute_force_state_graph_generation there is no state cap; memory use only depends
+        on `chunk_size`. Calling it again with the same directory resumes an interrupted run.
+
+        Args:
+            directory (str | Path): where the visited bitmap, layer files and progress are kept.
+            start_positions (int): Wolf Link's tile, then every statue's tile. Defaults to the generator's start.
+            chunk_size (int): number of states expanded at once.
+
+        Returns:
+            OutOfCoreExploration: the finished exploration, to stream its layers or load it as a CompactStateGraph.
+        """
+        from sacred_grove.out_of_core_generation import OutOfCoreExploration
+
+        return OutOfCoreExploration(self.kernel, tuple(start_positions) or self.start, directory, chunk_size).run()
+
+    def symmetric_state_graph_generation(self, *start_positions: int, goal_tiles=GOAL_TILES, complete: bool = False):
+        """batched_state_graph_generation over one canonical state per class of symmetric states, see symmetry.
+
+        The board's direction-preserving automorphisms that keep `goal_tiles` in place are found
+        first. With `complete`, like complete_state_graph_generation, the graph is about k times
+        smaller on a board with a symmetry group of size k; from a start it shrinks as much as the
+        start reaches states symmetric to each other.
+
+        Args:
+            start_positions (int): Wolf Link's tile, then every statue's tile. Defaults to the generator's start.
+            goal_tiles (Iterable[int]): tiles the statues must occupy.
+            complete (bool): every valid placement instead of the states reachable from the start.
+
+        Returns:
+            QuotientStateGraph: the graph of representatives, with the symmetry group to map solutions back.
+        """
+        from sacred_grove.symmetry import SymmetryGroup, quotient_complete_state_graph_generation, quotient_state_graph_generation
+
+        symmetry_group = SymmetryGroup.from_kernel(self.kernel, goal_tiles)
+        if complete:
+            return quotient_complete_state_graph_generation(self.kernel, symmetry_group)
+        return quotient_state_graph_generation(self.kernel, tuple(start_positions) or self.start, symmetry_group)
+
+    def complete_state_graph_generation(self) -> CompactStateGraph:
+        """State graph over every valid placement (Wolf Link and the statues on distinct tiles), reachable or not.
+
+        Returns:
+            CompactStateGraph: all valid states and every move between them.
+        """
+        kernel = self.kernel
+        states = np.flatnonzero(kernel.valid_placement_mask(np.arange(kernel.number_of_states, dtype=np.int64)))
+        successors = kernel.successors_batch(states)
+        rows, directions = np.nonzero(successors != INVALID_STATE)
+        return CompactStateGraph.from_edges(
+            kernel,
+            states,
+            sources=rows,
+            targets=np.searchsorted(states, successors[rows, directions]),
+            directions=directions,
+        )
@@ -0,0 +1,194 @@
+"""Bounded cache of the moves of packed states, for searches that keep coming back to the same states.
+
+IDA* expands the same states again at every iteration and repeated A* queries from nearby starts
+expand the same neighborhoods. SuccessorCache keeps the next state in every direction of the
+states seen last, in fixed-size array slabs: one row of len(DIRECTIONS) packed states per cached
+state, INVALID_STATE where the move is not allowed, so the directions are the column indices and
+nothing is stored per move. A hit pays off on boards with three statues or more, where the kernel
+computes a move through the general path; on two-statue boards a move is about as cheap as a hit.
+
+The cache is set-associative: a state can only live in the WAYS slots of the set its hash
+picks, and a full set evicts with the CLOCK (second chance) policy: a hand sweeps the set,
+clearing the reference bit of recently used entries, and replaces the first entry found
+unreferenced. There is no dictionary, so a lookup only reads the slabs: after freeze(), lookups
+never write to them, and processes forked afterwards share the warmed cache copy-on-write.
+"""
+from array import array
+
+import numpy as np
+
+from sacred_grove.transition_kernel import DIRECTIONS, INVALID_STATE, TransitionKernel
+
+# Fibonacci hashing picks the set of a packed state, so neighboring states land in different sets.
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_EMPTY = -1
+_NUMBER_OF_DIRECTIONS = len(DIRECTIONS)
+
+
+class SuccessorCache:
+    """Next states of recently seen packed states, computed by a TransitionKernel on a miss.
+
+    It has the kernel's next_states, so a search can use either.
+
+    Args:
+        kernel (TransitionKernel): computes the moves of the states that are not cached.
+        capacity (int): number of states held, rounded down to a multiple of WAYS (at least WAYS).
+    """
+    # Slots per set.
+    WAYS = 4
+    # Key, one next state per direction (8 bytes each) and the reference bit.
+    BYTES_PER_ENTRY = 8 * (1 + _NUMBER_OF_DIRECTIONS) + 1
+
+    def __init__(self, kernel: TransitionKernel, capacity: int = 1 << 16):
+        self.kernel = kernel
+        self.number_of_sets = max(capacity // self.WAYS, 1)
+        self.capacity = self.number_of_sets * self.WAYS
+        self._keys = array('q', [_EMPTY]) * self.capacity
+        self._next_states = array('q', [INVALID_STATE]) * (self.capacity * _NUMBER_OF_DIRECTIONS)
+        self._referenced = bytearray(self.capacity)
+        self._hands = bytearray(self.number_of_sets)
+        self.frozen = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_memory_budget(cls, kernel: TransitionKernel, memory_budget: int) -> 'SuccessorCache':
+        """A cache as large as `memory_budget` bytes allow."""
+        return cls(kernel, memory_budget // cls.BYTES_PER_ENTRY)
+
+    @property
+    def memory_usage(self) -> int:
+        """Bytes held by the slabs."""
+        return (self._keys.itemsize * len(self._keys) + self._next_states.itemsize * len(self._next_states)
+                + len(self._referenced) + len(self._hands))
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def statistics(self) -> dict:
+        """Counters of the cache, e.g. for Instrumentation.emit or SearchResult.details."""
+        return {
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'cache_hit_rate': self.hit_rate,
+            'cache_evictions': self.evictions,
+            'cache_entries': len(self),
+            'cache_bytes': self.memory_usage,
+        }
+
+    def serves(self, kernel: TransitionKernel) -> bool:
+        """Whether `kernel` has the same moves as the cache's kernel, so the cached next states are its next states."""
+        return kernel is self.kernel or (kernel.tiles == self.kernel.tiles and kernel.statue_patterns == self.kernel.statue_patterns
+                                         and np.array_equal(kernel.move_table, self.kernel.move_table))
+
+    def __len__(self) -> int:
+        return self.capacity - self._keys.count(_EMPTY)
+
+    def __contains__(self, state: int) -> bool:
+        return self._slot(state) >= 0
+
+    def _first_slot(self, state: int) -> int:
+        return ((state * _HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) % self.number_of_sets * self.WAYS
+
+    def _slot(self, state: int) -> int:
+        # Slot holding `state`, -1 if it is not cached.
+        first = self._first_slot(state)
+        keys = self._keys
+        for slot in range(first, first + self.WAYS):
+            if keys[slot] == state:
+                return slot
+        return -1
+
+    def successors(self, state: int) -> list[int]:
+        """Packed next state of `state` in every direction, INVALID_STATE where the move is not allowed.
+
+        Args:
+            state (int): packed state id.
+
+        Returns:
+            list[int]: one next state per direction code, see DIRECTION_CODES.
+        """
+        # _first_slot and _slot inlined: this is the hot path of the searches using the cache.
+        first = ((state * _HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) % self.number_of_sets * self.WAYS
+        keys = self._keys
+        for slot in range(first, first + self.WAYS):
+            if keys[slot] == state:
+                self.hits += 1
+                if not self.frozen:
+                    self._referenced[slot] = 1
+                row = slot * _NUMBER_OF_DIRECTIONS
+                return self._next_states[row:row + _NUMBER_OF_DIRECTIONS].tolist()
+        self.misses += 1
+        step = self.kernel.step
+        successors = [step(state, direction) for direction in range(_NUMBER_OF_DIRECTIONS)]
+        if not self.frozen:
+            self._store(first, state, successors)
+        return successors
+
+    def next_states(self, state: int) -> list[tuple[int, int]]:
+        """All valid moves from a packed state, like TransitionKernel.next_states.
+
+        Returns:
+            list[tuple[int, int]]: (direction code, packed next state) pairs.
+        """
+        return [(direction, next_state) for direction, next_state in enumerate(self.successors(state)) if next_state != INVALID_STATE]
+
+    def _store(self, first: int, state: int, successors) -> None:
+        # CLOCK over the set: referenced entries get a second chance, the first unreferenced (or empty) slot is replaced.
+        keys, referenced = self._keys, self._referenced
+        set_index = first // self.WAYS
+        hand = self._hands[set_index]
+        while True:
+            slot = first + hand
+            hand = (hand + 1) % self.WAYS
+            if keys[slot] == _EMPTY:
+                break
+            if not referenced[slot]:
+                self.evictions += 1
+                break
+            referenced[slot] = 0
+        self._hands[set_index] = hand
+        keys[slot] = state
+        referenced[slot] = 1
+        row = slot * _NUMBER_OF_DIRECTIONS
+        self._next_states[row:row + _NUMBER_OF_DIRECTIONS] = array('q', successors)
+
+    def warm(self, states) -> None:
+        """Compute the moves of many states at once with the batched kernel and cache them.
+
+        Later states replace earlier ones where their sets overflow, as lookups would.
+
+        Args:
+            states (Iterable[int] | np.ndarray): packed state ids, e.g. CompactStateGraph.states.
+        """
+        if self.frozen:
+            raise ValueError("A frozen successor cache is read-only")
+        states = np.asarray(states, dtype=np.int64)
+        for start in range(0, len(states), 1 << 16):
+            chunk = states[start:start + (1 << 16)]
+            for state, successors in zip(chunk.tolist(), self.kernel.successors_batch(chunk).tolist()):
+                slot = self._slot(state)
+                if slot < 0:
+                    self._store(self._first_slot(state), state, successors)
+
+    def freeze(self) -> 'SuccessorCache':
+        """Make the cache read-only: misses are still answered by the kernel but no longer stored.
+
+        Lookups then never write to the slabs, so worker processes forked after freeze() share
+        them copy-on-write instead of each copying the pages they read. Statistics stay per process.
+
+        Returns:
+            SuccessorCache: the cache itself.
+        """
+        self.frozen = True
+        return self
+
+    def clear(self) -> None:
+        """Drop every entry and reset the statistics; a frozen cache stays frozen."""
+        self._keys[:] = array('q', [_EMPTY]) * self.capacity
+        self._referenced[:] = bytes(self.capacity)
+        self._hands[:] = bytes(self.number_of_sets)
+        self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,318 @@
+"""Board symmetries and state graphs over one representative per class of symmetric states.
+
+A symmetry of a board is a permutation of its tiles together with a permutation of the four
+directions (one of the eight rotations and reflections of the compass) that maps every
+connection onto a connection: if tile t leads to tile u going N, the image of t leads to the
+image of u going in the image of N. Applying it to a state also changes how the statues move:
+under a reflection that swaps E and W a 'clockwise' statue behaves like a 'counterclockwise'
+one, so the statues are permuted to the slot of the statue with the transformed pattern, and
+a symmetry only exists if there is one. The 'shadow' and 'mirror' patterns are their own images
+under every direction permutation. Symmetries must also keep the goal tiles in place.
+
+Symmetric states have the same distance to the goal, and a move from one maps onto a move from
+the other, so the state graph can be generated over canonical representatives only, the
+smallest packed id of every class. Over every valid placement it has about 1/|group| of the
+states and edges. From a start, it saves as much as the start's class connects states that are
+symmetric to each other: from the symmetric start of the Sacred Grove it halves the graph, while
+from a start whose images lie in other components of the state graph it saves little. Its
+paths are turned back into moves of the original orientation by following, from the real
+start, the move that leads into the next class.
+"""
+from dataclasses import dataclass
+from itertools import permutations
+
+import numpy as np
+
+from sacred_grove.bitset import bitset_members, new_bitset, set_bits, test_bits
+from sacred_grove.board import GOAL_TILES
+from sacred_grove.compact_state_graph import CompactStateGraph
+from sacred_grove.distance_table import UNREACHABLE, DistanceTable
+from sacred_grove.transition_kernel import DIRECTIONS, INVALID_STATE, OPPOSITE_DIRECTION_CODES, STATUE_PATTERNS, TransitionKernel
+
+# The eight permutations of the direction codes that keep opposite directions opposite.
+DIRECTION_PERMUTATIONS = tuple(
+    permutation for permutation in permutations(range(len(DIRECTIONS)))
+    if all(permutation[OPPOSITE_DIRECTION_CODES[direction]] == OPPOSITE_DIRECTION_CODES[permutation[direction]] for direction in range(len(DIRECTIONS)))
+)
+
+
+@dataclass(frozen=True)
+class Symmetry:
+    """A direction-preserving automorphism of a board."""
+    # tile_permutation[tile index] is the index of its image.
+    tile_permutation: tuple[int, ...]
+    # direction_permutation[direction code] is the code of its image.
+    direction_permutation: tuple[int, ...]
+    # statue_permutation[statue] is the state slot (among the statues) of its image.
+    statue_permutation: tuple[int, ...]
+
+    def apply(self, kernel: TransitionKernel, states) -> np.ndarray:
+        """Images of packed states."""
+        placements = kernel.unpack_batch(states)
+        tile_permutation = np.asarray(self.tile_permutation, dtype=np.int64)
+        images = np.empty_like(placements)
+        images[..., 0] = tile_permutation[placements[..., 0]]
+        for statue, slot in enumerate(self.statue_permutation):
+            images[..., 1 + slot] = tile_permutation[placements[..., 1 + statue]]
+        return kernel.pack_batch(images)
+
+
+def find_symmetries(kernel: TransitionKernel, goal_tiles=GOAL_TILES) -> list[Symmetry]:
+    """Every direction-preserving automorphism of the kernel's board that keeps the goal tiles, identity first.
+
+    Args:
+        kernel (TransitionKernel): the compiled board.
+        goal_tiles (Iterable[int]): tiles the statues must occupy.
+
+    Returns:
+        list[Symmetry]: the symmetry group.
+    """
+    goal_indices = {kernel.tile_index[tile] for tile in goal_tiles}
+    symmetries = []
+    for direction_permutation in DIRECTION_PERMUTATIONS:
+        statue_permutation = _statue_permutation(kernel.statue_patterns, direction_permutation)
+        if statue_permutation is None:
+            continue
+        for tile_permutation in _tile_permutations(kernel.move_table.tolist(), direction_permutation):
+            if {tile_permutation[goal] for goal in goal_indices} == goal_indices:
+                symmetries.append(Symmetry(tuple(tile_permutation), direction_permutation, statue_permutation))
+    return symmetries
+
+
+def _statue_permutation(statue_patterns, direction_permutation) -> tuple[int, ...] | None:
+    # A statue with pattern P, seen through the symmetry, moves with P'(permuted d) = permuted P(d).
+    inverse = [direction_permutation.index(direction) for direction in range(len(DIRECTIONS))]
+    free_slots = list(range(len(statue_patterns)))
+    slots = []
+    for pattern in statue_patterns:
+        directions = STATUE_PATTERNS[pattern]
+        image = tuple(direction_permutation[directions[inverse[direction]]] for direction in range(len(DIRECTIONS)))
+        slot = next((slot for slot in free_slots if STATUE_PATTERNS[statue_patterns[slot]] == image), None)
+        if slot is None:
+            return None
+        free_slots.remove(slot)
+        slots.append(slot)
+    return tuple(slots)
+
+
+def _tile_permutations(moves: list[list[int]], direction_permutation):
+    # Backtracking over the image of one tile per connected component; the connections fix the rest.
+    number_of_tiles = len(moves)
+
+    def signature(tile, permutation=None):
+        # Directions with a neighbor, the image of a tile must have them in the permuted directions.
+        permutation = permutation or range(len(DIRECTIONS))
+        return tuple(moves[tile][permutation[direction]] != tile for direction in range(len(DIRECTIONS)))
+
+    signatures = [signature(tile) for tile in range(number_of_tiles)]
+    frequencies = {value: signatures.count(value) for value in signatures}
+    # Anchor components on their rarest kind of tile, e.g. corners, to try few images.
+    order = sorted(range(number_of_tiles), key=lambda tile: frequencies[signatures[tile]])
+
+    def propagate(mapping, inverse, tile, image):
+        mapping, inverse = mapping[:], inverse[:]
+        pending = [(tile, image)]
+        while pending:
+            tile, image = pending.pop()
+            if mapping[tile] == image:
+                continue
+            if mapping[tile] != -1 or inverse[image] != -1:
+                return None
+            mapping[tile], inverse[image] = image, tile
+            for direction in range(len(DIRECTIONS)):
+                pending.append((moves[tile][direction], moves[image][direction_permutation[direction]]))
+        return mapping, inverse
+
+    def search(mapping, inverse):
+        tile = next((tile for tile in order if mapping[tile] == -1), None)
+        if tile is None:
+            yield mapping
+            return
+        for image in range(number_of_tiles):
+            if inverse[image] == -1 and signature(image, direction_permutation) == signatures[tile]:
+                extended = propagate(mapping, inverse, tile, image)
+                if extended is not None:
+                    yield from search(*extended)
+
+    yield from search([-1] * number_of_tiles, [-1] * number_of_tiles)
+
+
+class SymmetryGroup:
+    """The symmetries of a board, used to map states to canonical representatives.
+
+    Args:
+        kernel (TransitionKernel): the compiled board.
+        symmetries (list[Symmetry]): e.g. from find_symmetries.
+    """
+
+    def __init__(self, kernel: TransitionKernel, symmetries: list[Symmetry]):
+        self.kernel = kernel
+        self.symmetries = symmetries
+        # Tile permutation and column order of every symmetry but the identity, for canonicalize.
+        identity = Symmetry(tuple(range(kernel.number_of_tiles)), tuple(range(len(DIRECTIONS))), tuple(range(kernel.number_of_statues)))
+        self._images = []
+        for symmetry in symmetries:
+            if symmetry != identity:
+                columns = [0] * (kernel.number_of_statues + 1)
+                for statue, slot in enumerate(symmetry.statue_permutation):
+                    columns[1 + slot] = 1 + statue
+                self._images.append((np.asarray(symmetry.tile_permutation, dtype=np.int64), columns))
+
+    @classmethod
+    def from_kernel(cls, kernel: TransitionKernel, goal_tiles=GOAL_TILES) -> 'SymmetryGroup':
+        return cls(kernel, find_symmetries(kernel, goal_tiles))
+
+    def __len__(self) -> int:
+        return len(self.symmetries)
+
+    def canonicalize(self, states) -> np.ndarray:
+        """Smallest packed id of the class of every state; INVALID_STATE stays INVALID_STATE."""
+        states = np.asarray(states, dtype=np.int64)
+        if not self._images:
+            return states
+        invalid = states == INVALID_STATE
+        canonical = np.where(invalid, 0, states)
+        placements = self.kernel.unpack_batch(canonical)
+        for tile_permutation, columns in self._images:
+            canonical = np.minimum(canonical, self.kernel.pack_batch(tile_permutation[placements][..., columns]))
+        return np.where(invalid, INVALID_STATE, canonical)
+
+    def canonical(self, state: tuple[int, ...]) -> tuple[int, ...]:
+        """Representative of the class of a (wolf_link, statue, ...) state, as tile labels."""
+        return self.kernel.unpack(int(self.canonicalize([self.kernel.pack(*state)])[0]))
+
+    def lift_path(self, start: tuple[int, ...], canonical_path) -> list[tuple[int, ...]]:
+        """A path of canonical packed states, turned into the symmetric path that starts at `start`.
+
+        Args:
+            start (tuple[int, ...]): the real start, any state of the class of the first canonical state.
+            canonical_path (Sequence[int]): packed canonical states, each one move away from the previous one's class.
+
+        Returns:
+            list[tuple[int, ...]]: the states of the same solution in the original orientation.
+
+        Raises:
+            ValueError: if `start` is not in the first class or two classes are not one move apart.
+        """
+        kernel = self.kernel
+        state = kernel.pack(*start)
+        if int(self.canonicalize([state])[0]) != canonical_path[0]:
+            raise ValueError(f"{start} is not symmetric to the first state of the path")
+        path = [state]
+        for canonical_state in canonical_path[1:]:
+            successors = kernel.successors_batch([state])[0]
+            matches = np.flatnonzero(self.canonicalize(successors) == canonical_state)
+            if not matches.size:
+                raise ValueError(f"no move from {kernel.unpack(state)} leads to the class of {kernel.unpack(canonical_state)}")
+            state = int(successors[matches[0]])
+            path.append(state)
+        return [kernel.unpack(state) for state in path]
+
+
+@dataclass
+class QuotientStateGraph:
+    """State graph over the canonical representatives of a board's classes of symmetric states.
+
+    The graph's states are canonical packed ids and its edges go from a representative to the
+    representatives of its successors, labelled with the direction of the move.
+    """
+    state_graph: CompactStateGraph
+    symmetry_group: SymmetryGroup
+
+    def __len__(self) -> int:
+        return len(self.state_graph)
+
+    def index_of(self, state: tuple[int, ...]) -> int:
+        """Index of the class of a (wolf_link, statue, ...) state, -1 if it is not in the graph."""
+        return self.state_graph.index_of(int(self.symmetry_group.canonicalize([self.symmetry_group.kernel.pack(*state)])[0]))
+
+    def distance_table(self, goal_tiles=GOAL_TILES) -> DistanceTable:
+        """Distances of the representatives, which are the distances of every state of their class.
+
+        Only valid for goal tiles kept in place by the symmetries, like those the group was built for.
+        """
+        return DistanceTable.from_state_graph(self.state_graph, goal_tiles)
+
+    def solve(self, start: tuple[int, ...], distance_table: DistanceTable) -> list[tuple[int, ...]] | None:
+        """An optimal solution from `start` in the original orientation.
+
+        Args:
+            start (tuple[int, ...]): Wolf Link's tile followed by every statue's tile.
+            distance_table (DistanceTable): from distance_table().
+
+        Returns:
+            list[tuple[int, ...]] | None: the states from `start` to a goal state, None if there is no solution.
+
+        Raises:
+            KeyError: if the class of `start` is not in the graph, like DistanceTable.index.
+        """
+        index = self.index_of(start)
+        if index < 0:
+            raise KeyError(f"{tuple(start)} is not a state of this state graph")
+        distances = distance_table.distances
+        if distances[index] == UNREACHABLE:
+            return None
+        graph = self.state_graph
+        canonical_path = [int(graph.states[index])]
+        while distances[index] > 0:
+            targets = graph.targets[graph.offsets[index]:graph.offsets[index + 1]]
+            index = int(targets[np.argmax(distances[targets] == distances[index] - 1)])
+            canonical_path.append(int(graph.states[index]))
+        return self.symmetry_group.lift_path(start, canonical_path)
+
+
+def quotient_state_graph_generation(kernel: TransitionKernel, start: tuple[int, ...], symmetry_group: SymmetryGroup) -> QuotientStateGraph:
+    """StateGraphGenerator.batched_state_graph_generation over canonical representatives.
+
+    Args:
+        kernel (TransitionKernel): the compiled board.
+        start (tuple[int, ...]): Wolf Link's tile followed by every statue's tile.
+        symmetry_group (SymmetryGroup): symmetries of the board.
+
+    Returns:
+        QuotientStateGraph: the classes reachable from `start`, which are the classes of the states reachable from it.
+    """
+    visited = new_bitset(kernel.number_of_states)
+    frontier = symmetry_group.canonicalize([kernel.pack(*start)])
+    set_bits(visited, frontier)
+    edge_sources, edge_targets, edge_directions = [], [], []
+    while frontier.size:
+        successors = symmetry_group.canonicalize(kernel.successors_batch(frontier))
+        rows, directions = np.nonzero(successors != INVALID_STATE)
+        targets = successors[rows, directions]
+        edge_sources.append(frontier[rows])
+        edge_targets.append(targets)
+        edge_directions.append(directions.astype(np.uint8))
+        frontier = np.unique(targets[~test_bits(visited, targets)])
+        set_bits(visited, frontier)
+
+    states = bitset_members(visited, kernel.number_of_states)
+    state_graph = CompactStateGraph.from_edges(
+        kernel,
+        states,
+        sources=np.searchsorted(states, np.concatenate(edge_sources)),
+        targets=np.searchsorted(states, np.concatenate(edge_targets)),
+        directions=np.concatenate(edge_directions),
+    )
+    return QuotientStateGraph(state_graph, symmetry_group)
+
+
+def quotient_complete_state_graph_generation(kernel: TransitionKernel, symmetry_group: SymmetryGroup) -> QuotientStateGraph:
+    """StateGraphGenerator.complete_state_graph_generation over canonical representatives.
+
+    Returns:
+        QuotientStateGraph: one representative of every class of valid placements and the moves between classes.
+    """
+    states = np.arange(kernel.number_of_states, dtype=np.int64)
+    states = states[kernel.valid_placement_mask(states)]
+    states = states[symmetry_group.canonicalize(states) == states]
+    successors = symmetry_group.canonicalize(kernel.successors_batch(states))
+    rows, directions = np.nonzero(successors != INVALID_STATE)
+    state_graph = CompactStateGraph.from_edges(
+        kernel,
+        states,
+        sources=rows,
+        targets=np.searchsorted(states, successors[rows, directions]),
+        directions=directions.astype(np.uint8),
+    )
+    return QuotientStateGraph(state_graph, symmetry_group)
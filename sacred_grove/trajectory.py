@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from sacred_grove.board import GOAL_TILES
+from sacred_grove.transition_kernel import DIRECTION_CODES, DIRECTIONS, INVALID_STATE, TransitionKernel
+
+# first_illegal_step of move sequences that are legal all the way.
+NO_ILLEGAL_STEP = -1
+# Codes of the characters of a move sequence that are not directions, and of the padding after its end.
+_UNKNOWN_MOVE = len(DIRECTIONS)
+_NO_MOVE = len(DIRECTIONS) + 1
+_MOVE_CODES = np.full(256, _UNKNOWN_MOVE, dtype=np.uint8)
+for _direction, _code in DIRECTION_CODES.items():
+    _MOVE_CODES[ord(_direction)] = _code
+
+
+class PositionHistory:
+    """Growable list of tile positions stored in a preallocated int array.
+
+    It supports what MovingCharacter needs from a list (append, len, indexing and iteration),
+    and the positions recorded so far are available as an array view.
+    """
+
+    def __init__(self, positions=(), capacity: int = 16):
+        positions = np.asarray(positions, dtype=np.int64)
+        self._positions = np.empty(max(capacity, len(positions)), dtype=np.int64)
+        self._positions[:len(positions)] = positions
+        self._length = len(positions)
+
+    def append(self, position: int) -> None:
+        if self._length == len(self._positions):
+            self._positions = np.resize(self._positions, 2 * len(self._positions) or 16)
+        self._positions[self._length] = position
+        self._length += 1
+
+    @property
+    def array(self) -> np.ndarray:
+        """The recorded positions, as a view."""
+        return self._positions[:self._length]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.array[index].tolist()
+        return int(self.array[index])
+
+    def __iter__(self):
+        return iter(self.array.tolist())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PositionHistory):
+            other = other.array
+        return np.array_equal(self.array, np.asarray(other))
+
+    def __repr__(self) -> str:
+        return f"PositionHistory({self.array.tolist()})"
+
+
+class Trajectory:
+    """States visited by Wolf Link and the statues, one row of positions per state, in a preallocated int array.
+
+    Args:
+        start (tuple[int, ...]): the first state, e.g. (wolf_link_position, shadow_statue_position, mirror_statue_position).
+        capacity (int): number of states to allocate room for; the array grows as needed.
+    """
+
+    def __init__(self, start: tuple[int, ...], capacity: int = 64):
+        self._states = np.empty((max(capacity, 1), len(start)), dtype=np.int64)
+        self._states[0] = start
+        self._length = 1
+
+    @classmethod
+    def from_states(cls, states) -> 'Trajectory':
+        """A trajectory through a sequence of states, e.g. the path of a SearchResult."""
+        states = np.asarray(states, dtype=np.int64)
+        trajectory = cls(tuple(states[0]), capacity=len(states))
+        trajectory._states[:len(states)] = states
+        trajectory._length = len(states)
+        return trajectory
+
+    @classmethod
+    def from_characters(cls, *characters) -> 'Trajectory':
+        """The trajectory recorded by MovingCharacter histories: every past position, then the current one."""
+        return cls.from_states(np.column_stack([[*character.history, character.position] for character in characters]))
+
+    def append(self, state: tuple[int, ...]) -> None:
+        if self._length == len(self._states):
+            self._states = np.concatenate([self._states, np.empty_like(self._states)])
+        self._states[self._length] = state
+        self._length += 1
+
+    @property
+    def states(self) -> np.ndarray:
+        """(number of states, number of characters) array of positions, as a view."""
+        return self._states[:self._length]
+
+    @property
+    def number_of_moves(self) -> int:
+        return self._length - 1
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> tuple[int, ...]:
+        return tuple(self.states[index].tolist())
+
+    def __iter__(self):
+        return (tuple(state) for state in self.states.tolist())
+
+
+@dataclass
+class ValidationResult:
+    """Outcome of simulating many move sequences from the same start state."""
+    # Whether every move of each sequence is allowed.
+    legal: np.ndarray
+    # Index of the first move of each sequence that is not allowed (or not a direction), NO_ILLEGAL_STEP if legal.
+    first_illegal_step: np.ndarray
+    # Whether each sequence is legal and ends in a goal state.
+    solved: np.ndarray
+    # Packed state each sequence ends in, or stops at before its first illegal move.
+    final_states: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.legal)
+
+
+def validate_move_sequences(kernel: TransitionKernel, start: tuple[int, ...], sequences, goal_tiles=GOAL_TILES) -> ValidationResult:
+    """Simulate many direction strings (e.g. 'NEWWWSSEEENW') from `start` at once with the movement rules.
+
+    All sequences advance together, one batched kernel step per move index, and a sequence
+    drops out at its end or at its first illegal move.
+
+    Args:
+        kernel (TransitionKernel): the compiled board.
+        start (tuple[int, ...]): Wolf Link's tile followed by every statue's tile.
+        sequences (Iterable[str]): Wolf Link's moves, one letter of 'NSEW' per move.
+        goal_tiles (Iterable[int]): tiles the statues must occupy.
+
+    Returns:
+        ValidationResult: legality, first illegal move and solved flag of every sequence.
+    """
+    sequences = list(sequences)
+    lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+    moves = _encode_moves(sequences, lengths)
+    states = np.full(len(sequences), kernel.pack(*start), dtype=np.int64)
+    first_illegal_step = np.full(len(sequences), NO_ILLEGAL_STEP, dtype=np.int64)
+    running = np.flatnonzero(lengths > 0)
+    for step in range(moves.shape[1]):
+        running = running[lengths[running] > step]
+        if not running.size:
+            break
+        directions = moves[running, step]
+        known = directions < _UNKNOWN_MOVE
+        next_states = np.full(len(running), INVALID_STATE, dtype=np.int64)
+        next_states[known] = kernel.step_batch(states[running[known]], directions[known])
+        illegal = next_states == INVALID_STATE
+        first_illegal_step[running[illegal]] = step
+        running = running[~illegal]
+        states[running] = next_states[~illegal]
+    legal = first_illegal_step == NO_ILLEGAL_STEP
+    solved = legal & kernel.goal_state_mask(states, goal_tiles)
+    return ValidationResult(legal, first_illegal_step, solved, states)
+
+
+def _encode_moves(sequences: list[str], lengths: np.ndarray) -> np.ndarray:
+    # (number of sequences, longest length) array of direction codes, padded with _NO_MOVE.
+    moves = np.full((len(sequences), int(lengths.max(initial=0))), _NO_MOVE, dtype=np.uint8)
+    characters = np.frombuffer(''.join(sequences).encode('ascii', errors='replace'), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(sequences)), lengths)
+    columns = np.arange(len(characters)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    moves[rows, columns] = _MOVE_CODES[characters]
+    return moves
@@ -0,0 +1,341 @@
+from functools import cached_property
+from itertools import product
+
+import numpy as np
+
+# Directions are compiled to small integer codes so that a move is a plain array index.
+DIRECTIONS = ('N', 'S', 'E', 'W')
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+# OPPOSITE_DIRECTION_CODES[code] is the code of the opposite direction ('N' <-> 'S', 'E' <-> 'W').
+OPPOSITE_DIRECTION_CODES = (1, 0, 3, 2)
+
+# How a statue moves when Wolf Link moves: STATUE_PATTERNS[pattern][link direction code] is the
+# statue's direction code. 'shadow' and 'mirror' are the two Sacred Grove guardians; the others
+# are the quarter turns and reflections of the shadow pattern.
+STATUE_PATTERNS = {
+    'shadow': (0, 1, 2, 3),
+    'mirror': (1, 0, 3, 2),
+    'clockwise': (2, 3, 1, 0),
+    'counterclockwise': (3, 2, 0, 1),
+    'flip_vertical': (1, 0, 2, 3),
+    'flip_horizontal': (0, 1, 3, 2),
+}
+SACRED_GROVE_PATTERNS = ('shadow', 'mirror')
+
+# Returned by the step functions when Wolf Link cannot make the requested move.
+INVALID_STATE = -1
+
+
+class TransitionKernel:
+    """Compiled move table shared by the search and the state graph generator.
+
+    Tiles are renumbered to indices 0..n-1 (in sorted label order) and the tile graph is
+    compiled into a dense tile x direction array holding the index of the neighbor in that
+    direction. A tile without a neighbor in some direction points to itself, so "stay in
+    place" needs no special case for the statues.
+
+    A state (wolf_link, statue_1, ..., statue_k) is packed into a single integer, the base-n
+    number whose digits are the tile indices; for the Sacred Grove that is
+    (link * n + shadow) * n + mirror.
+    """
+
+    def __init__(self, tiles, move_table, statue_patterns=SACRED_GROVE_PATTERNS):
+        """Build a kernel from an already compiled move table.
+
+        Args:
+            tiles (Sequence[int]): tile labels, position i holds the label of tile index i.
+            move_table (array-like): (number of tiles, 4) array of neighbor indices, ordered as DIRECTIONS.
+            statue_patterns (Sequence[str]): one key of STATUE_PATTERNS per statue, in state order.
+        """
+        unknown_patterns = set(statue_patterns) - set(STATUE_PATTERNS)
+        if unknown_patterns:
+            raise ValueError(f"Unknown statue patterns {sorted(unknown_patterns)}, expected some of {list(STATUE_PATTERNS)}")
+        self.tiles = tuple(int(tile) for tile in tiles)
+        self.tile_index = {tile: index for index, tile in enumerate(self.tiles)}
+        self.move_table = np.asarray(move_table, dtype=np.int64).reshape(len(self.tiles), len(DIRECTIONS))
+        self.statue_patterns = tuple(statue_patterns)
+        self.number_of_tiles = len(self.tiles)
+        self.number_of_statues = len(self.statue_patterns)
+        self.number_of_states = self.number_of_tiles ** (self.number_of_statues + 1)
+        self.statue_directions = np.array([STATUE_PATTERNS[pattern] for pattern in self.statue_patterns], dtype=np.intp).reshape(-1, len(DIRECTIONS))
+        # Plain nested lists are much faster than numpy scalars for one-state-at-a-time lookups.
+        self._moves = self.move_table.tolist()
+        self._statue_directions = [STATUE_PATTERNS[pattern] for pattern in self.statue_patterns]
+
+    @classmethod
+    def from_graph(cls, graph, statue_patterns=SACRED_GROVE_PATTERNS) -> 'TransitionKernel':
+        """Compile a tile graph whose edges carry a 'dir' attribute ('N', 'S', 'E', 'W').
+
+        Args:
+            graph (nx.DiGraph): the tile graph, e.g. puzzle_graph.TILE_GRAPH.
+            statue_patterns (Sequence[str]): one key of STATUE_PATTERNS per statue.
+
+        Returns:
+            TransitionKernel: the compiled kernel.
+        """
+        return cls.from_edges(graph.nodes, graph.edges(data='dir'), statue_patterns)
+
+    @classmethod
+    def from_edges(cls, tiles, edges, statue_patterns=SACRED_GROVE_PATTERNS) -> 'TransitionKernel':
+        """Compile directed (origin, destination, direction) edges without building a graph.
+
+        Returns:
+            TransitionKernel: the compiled kernel.
+        """
+        tiles = sorted(tiles)
+        tile_index = {tile: index for index, tile in enumerate(tiles)}
+        move_table = np.repeat(np.arange(len(tiles), dtype=np.int64)[:, None], len(DIRECTIONS), axis=1)
+        for origin, destination, direction in edges:
+            if direction in DIRECTION_CODES:
+                move_table[tile_index[origin], DIRECTION_CODES[direction]] = tile_index[destination]
+        return cls(tiles, move_table, statue_patterns)
+
+    @property
+    def position_names(self) -> tuple[str, ...]:
+        """Attribute name of every position of a state, e.g. for state graph node attributes."""
+        names = ['wolf_link_position']
+        for statue, pattern in enumerate(self.statue_patterns):
+            if self.statue_patterns.count(pattern) > 1:
+                names.append(f'{pattern}_statue_{statue + 1}_position')
+            else:
+                names.append(f'{pattern}_statue_position')
+        return tuple(names)
+
+    def pack(self, *positions: int) -> int:
+        """Pack tile labels (Wolf Link first, then every statue) into a state id.
+
+        Returns:
+            int: the packed state id.
+        """
+        state = 0
+        for position in positions:
+            state = state * self.number_of_tiles + self.tile_index[position]
+        return state
+
+    def unpack(self, state: int) -> tuple[int, ...]:
+        """Unpack a state id into tile labels.
+
+        Returns:
+            tuple[int, ...]: Wolf Link's tile label followed by every statue's.
+        """
+        if self.number_of_statues == 2:
+            rest, mirror = divmod(int(state), self.number_of_tiles)
+            link, shadow = divmod(rest, self.number_of_tiles)
+            return self.tiles[link], self.tiles[shadow], self.tiles[mirror]
+        return tuple(self.tiles[index] for index in self.unpack_indices(state))
+
+    def unpack_indices(self, state: int) -> list[int]:
+        """Unpack a state id into tile indices, Wolf Link first."""
+        state = int(state)
+        indices = []
+        for _ in range(self.number_of_statues + 1):
+            state, index = divmod(state, self.number_of_tiles)
+            indices.append(index)
+        return indices[::-1]
+
+    def pack_indices(self, indices) -> int:
+        """Inverse of `unpack_indices`."""
+        state = 0
+        for index in indices:
+            state = state * self.number_of_tiles + index
+        return state
+
+    def unpack_batch(self, states) -> np.ndarray:
+        """Unpack an array of state ids into a (len(states), number of statues + 1) array of tile indices."""
+        states = np.asarray(states, dtype=np.int64)
+        columns = []
+        for _ in range(self.number_of_statues + 1):
+            states, index = np.divmod(states, self.number_of_tiles)
+            columns.append(index)
+        return np.stack(columns[::-1], axis=-1)
+
+    def pack_batch(self, placements) -> np.ndarray:
+        """Inverse of `unpack_batch`."""
+        placements = np.asarray(placements, dtype=np.int64)
+        states = np.zeros(placements.shape[:-1], dtype=np.int64)
+        for column in range(placements.shape[-1]):
+            states = states * self.number_of_tiles + placements[..., column]
+        return states
+
+    def neighbor(self, tile: int, direction: int) -> int:
+        """Tile label reached from `tile` in `direction`, or `tile` itself if there is no such neighbor.
+
+        Args:
+            tile (int): a tile label.
+            direction (int): a direction code, see DIRECTION_CODES.
+        """
+        return self.tiles[self._moves[self.tile_index[tile]][direction]]
+
+    def step(self, state: int, direction: int) -> int:
+        """Apply one Wolf Link move to a packed state.
+
+        Wolf Link moves to the neighbor in `direction` if it exists and is empty. Every statue moves
+        in the direction its pattern maps `direction` to (the shadow statue the same way, the mirror
+        statue the opposite way); a statue stays in place when it has no neighbor in its direction or
+        when that neighbor holds another statue. The move is invalid if Wolf Link would end on a
+        statue or two statues would end on the same tile.
+
+        Args:
+            state (int): packed state id.
+            direction (int): direction code, see DIRECTION_CODES.
+
+        Returns:
+            int: the packed next state, or INVALID_STATE.
+        """
+        if self.number_of_statues != 2:
+            return self._step_any(state, direction)
+        n = self.number_of_tiles
+        rest, mirror = divmod(state, n)
+        link, shadow = divmod(rest, n)
+        moves = self._moves
+        new_link = moves[link][direction]
+        if new_link == link or new_link == shadow or new_link == mirror:
+            return INVALID_STATE
+        first_directions, second_directions = self._statue_directions
+        new_shadow = moves[shadow][first_directions[direction]]
+        if new_shadow == mirror:
+            new_shadow = shadow
+        new_mirror = moves[mirror][second_directions[direction]]
+        if new_mirror == shadow:
+            new_mirror = mirror
+        if new_link == new_shadow or new_link == new_mirror or new_shadow == new_mirror:
+            return INVALID_STATE
+        return (new_link * n + new_shadow) * n + new_mirror
+
+    def _step_any(self, state: int, direction: int) -> int:
+        link, *statues = self.unpack_indices(state)
+        moves = self._moves
+        new_link = moves[link][direction]
+        if new_link == link or new_link in statues:
+            return INVALID_STATE
+        new_statues = []
+        for statue, position in enumerate(statues):
+            new_position = moves[position][self._statue_directions[statue][direction]]
+            if new_position != position and new_position in statues:
+                new_position = position
+            new_statues.append(new_position)
+        if new_link in new_statues or len(set(new_statues)) != len(new_statues):
+            return INVALID_STATE
+        return self.pack_indices([new_link, *new_statues])
+
+    def next_states(self, state: int) -> list[tuple[int, int]]:
+        """All valid moves from a packed state.
+
+        Returns:
+            list[tuple[int, int]]: (direction code, packed next state) pairs.
+        """
+        next_states = []
+        for direction in range(len(DIRECTIONS)):
+            next_state = self.step(state, direction)
+            if next_state != INVALID_STATE:
+                next_states.append((direction, next_state))
+        return next_states
+
+    @cached_property
+    def _reverse_moves(self) -> list[list[list[int]]]:
+        # _reverse_moves[tile][direction]: the other tiles whose move in `direction` leads to `tile`.
+        reverse_moves = [[[] for _ in DIRECTIONS] for _ in self.tiles]
+        for origin, destinations in enumerate(self._moves):
+            for direction, destination in enumerate(destinations):
+                if destination != origin:
+                    reverse_moves[destination][direction].append(origin)
+        return reverse_moves
+
+    def predecessors(self, state: int) -> list[tuple[int, int]]:
+        """All states with a move leading to a packed state, the inverse of `next_states`.
+
+        Returns:
+            list[tuple[int, int]]: (direction code, packed previous state) pairs.
+        """
+        link, *statues = self.unpack_indices(state)
+        reverse_moves = self._reverse_moves
+        predecessors = []
+        for direction in range(len(DIRECTIONS)):
+            # Every statue either stayed in place or came from a tile whose move in its direction leads here.
+            statue_candidates = [
+                [position, *reverse_moves[position][self._statue_directions[statue][direction]]]
+                for statue, position in enumerate(statues)
+            ]
+            for previous_link in reverse_moves[link][direction]:
+                for previous_statues in product(*statue_candidates):
+                    previous = [previous_link, *previous_statues]
+                    if len(set(previous)) != len(previous):
+                        continue
+                    previous_state = self.pack_indices(previous)
+                    if self.step(previous_state, direction) == state:
+                        predecessors.append((direction, previous_state))
+        return predecessors
+
+    def step_batch(self, states, directions) -> np.ndarray:
+        """Vectorized `step` over arrays of packed states.
+
+        Args:
+            states (array-like): packed state ids.
+            directions (int | array-like): a direction code, or one code per state.
+
+        Returns:
+            np.ndarray: packed next states, INVALID_STATE where the move is not allowed.
+        """
+        states = np.asarray(states, dtype=np.int64)
+        if np.ndim(directions) == 0:
+            return self._step_columns(self._columns(states), int(directions))
+        directions = np.broadcast_to(np.asarray(directions, dtype=np.intp), states.shape)
+        return self._step_columns(self._columns(states), directions)
+
+    def successors_batch(self, states) -> np.ndarray:
+        """Successors of every state in every direction.
+
+        Returns:
+            np.ndarray: (len(states), 4) array of packed next states, INVALID_STATE for blocked moves.
+        """
+        columns = self._columns(np.asarray(states, dtype=np.int64))
+        return np.stack([self._step_columns(columns, direction) for direction in range(len(DIRECTIONS))], axis=-1)
+
+    def _columns(self, states: np.ndarray) -> list[np.ndarray]:
+        # Tile index arrays of Wolf Link and every statue.
+        columns = []
+        for _ in range(self.number_of_statues + 1):
+            states, index = np.divmod(states, self.number_of_tiles)
+            columns.append(index)
+        return columns[::-1]
+
+    def _step_columns(self, columns: list[np.ndarray], directions) -> np.ndarray:
+        # With a single direction, a move is a lookup in one column of the move table.
+        if isinstance(directions, int):
+            def move(positions, direction_map):
+                return self.move_table[:, direction_map[directions]][positions]
+        else:
+            def move(positions, direction_map):
+                return self.move_table[positions, np.take(direction_map, directions)]
+        link, *statues = columns
+        new_link = move(link, STATUE_PATTERNS['shadow'])
+        invalid = new_link == link
+        for position in statues:
+            invalid |= new_link == position
+        new_statues = []
+        for statue, position in enumerate(statues):
+            new_position = move(position, self._statue_directions[statue])
+            blocked = np.zeros(link.shape, dtype=bool)
+            for other, other_position in enumerate(statues):
+                if other != statue:
+                    blocked |= new_position == other_position
+            new_statues.append(np.where(blocked, position, new_position))
+        for statue, position in enumerate(new_statues):
+            invalid |= new_link == position
+            for other_position in new_statues[statue + 1:]:
+                invalid |= position == other_position
+        packed = new_link
+        for position in new_statues:
+            packed = packed * self.number_of_tiles + position
+        return np.where(invalid, INVALID_STATE, packed)
+
+    def valid_placement_mask(self, states) -> np.ndarray:
+        """Boolean mask of the states where Wolf Link and every statue stand on distinct tiles."""
+        placements = np.sort(self.unpack_batch(states), axis=-1)
+        return np.all(placements[..., 1:] != placements[..., :-1], axis=-1)
+
+    def goal_state_mask(self, states, goal_tiles) -> np.ndarray:
+        """Boolean mask of the states where the statues occupy exactly `goal_tiles`, in any order."""
+        goal_indices = np.sort([self.tile_index[tile] for tile in goal_tiles])
+        statues = np.sort(self.unpack_batch(states)[..., 1:], axis=-1)
+        return np.all(statues == goal_indices, axis=-1)
@@ -0,0 +1,84 @@
+from array import array
+
+# Slot of a key, Fibonacci hashing spreads neighboring packed states over the table.
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_EMPTY = -1
+
+
+class TranspositionTable:
+    """Fixed-size hash table of the states seen by an iterative-deepening search.
+
+    Every slot holds one packed state with the depth it was last reached at, the iteration that
+    reached it, and the best lower bound on its distance to the goal learned so far. The table
+    never grows: when two states hash to the same slot, the one closer to the root is kept (it
+    prunes the larger subtree), and entries of earlier iterations are always replaced.
+
+    Args:
+        memory_budget (int): bytes the table may use; 0 disables it.
+    """
+    # Key (8 bytes), depth, iteration and lower bound (4 bytes each).
+    BYTES_PER_ENTRY = 20
+
+    def __init__(self, memory_budget: int):
+        self.capacity = memory_budget // self.BYTES_PER_ENTRY
+        self._keys = array('q', [_EMPTY]) * self.capacity
+        self._depths = array('i', [0]) * self.capacity
+        self._iterations = array('i', [0]) * self.capacity
+        self._bounds = array('i', [0]) * self.capacity
+        self.iteration = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    @property
+    def memory_usage(self) -> int:
+        """Bytes held by the table."""
+        return sum(column.itemsize * len(column) for column in (self._keys, self._depths, self._iterations, self._bounds))
+
+    def __len__(self) -> int:
+        return self.capacity - self._keys.count(_EMPTY) if self.capacity else 0
+
+    def _slot(self, state: int) -> int:
+        return ((state * _HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) % self.capacity
+
+    def next_iteration(self) -> None:
+        """Start a new deepening iteration: depths recorded before no longer prune."""
+        self.iteration += 1
+
+    def seen_at_most(self, state: int, depth: int) -> bool:
+        """Whether this iteration already reached `state` at `depth` or fewer moves, so its subtree is done."""
+        if not self.capacity:
+            return False
+        slot = self._slot(state)
+        if self._keys[slot] == state and self._iterations[slot] == self.iteration and self._depths[slot] <= depth:
+            self.hits += 1
+            return True
+        return False
+
+    def lower_bound(self, state: int) -> int:
+        """Best known lower bound on the moves left from `state`, 0 if it is not in the table."""
+        if not self.capacity:
+            return 0
+        slot = self._slot(state)
+        return self._bounds[slot] if self._keys[slot] == state else 0
+
+    def store(self, state: int, depth: int, lower_bound: int) -> None:
+        """Record that `state` was searched at `depth` and needs at least `lower_bound` more moves."""
+        if not self.capacity:
+            return
+        slot = self._slot(state)
+        key = self._keys[slot]
+        if key == state:
+            if self._iterations[slot] == self.iteration:
+                depth = min(depth, self._depths[slot])
+            lower_bound = max(lower_bound, self._bounds[slot])
+        elif key != _EMPTY:
+            # Replacement by depth: a shallower entry of this iteration stays.
+            if self._iterations[slot] == self.iteration and self._depths[slot] < depth:
+                return
+            self.replacements += 1
+        self._keys[slot] = state
+        self._depths[slot] = depth
+        self._iterations[slot] = self.iteration
+        self._bounds[slot] = lower_bound
+        self.stores += 1
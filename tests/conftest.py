@@ -0,0 +1,25 @@
+import pytest
+
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.distance_table import DistanceTable
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+
+@pytest.fixture(scope='session')
+def generator():
+    return StateGraphGenerator.from_board(SACRED_GROVE)
+
+
+@pytest.fixture(scope='session')
+def state_graph(generator):
+    return generator.batched_state_graph_generation()
+
+
+@pytest.fixture(scope='session')
+def complete_state_graph(generator):
+    return generator.complete_state_graph_generation()
+
+
+@pytest.fixture(scope='session')
+def complete_distance_table(complete_state_graph):
+    return DistanceTable.from_state_graph(complete_state_graph)
@@ -0,0 +1,35 @@
+from sacred_grove import cli
+def test_bench_help_of_a_benchmark_without_options(capsys):
+    assert cli.main(['bench', 'transition_kernel', '--help']) == 0
+    assert 'python -m benchmarks.transition_kernel' in capsys.readouterr().out
+
+
+def test_bench_rejects_options_of_a_benchmark_without_options(capsys):
+    assert cli.main(['bench', 'transition_kernel', '--quick']) == 2
+    assert 'takes no options' in capsys.readouterr().err
+
+
+def test_bench_lists_the_benchmarks(capsys):
+    assert cli.main(['bench']) == 0
+    assert 'suite' in capsys.readouterr().out
+
+
+def imported_optional_dependencies(tmp_path, *argv) -> list[str]:
+    # Runs the command in a fresh interpreter, where nothing has imported networkx or scipy yet.
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    script = ("import contextlib, io, sys\nfrom sacred_grove import cli\n"
+              "with contextlib.redirect_stdout(io.StringIO()): cli.main(sys.argv[1:])\n"
+              "print(' '.join(name for name in ('networkx', 'scipy') if name in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', script, *argv], capture_output=True, text=True, check=True,
+                            cwd=tmp_path, env={'PYTHONPATH': str(Path(cli.__file__).parent.parent)})
+    return result.stdout.split()
+
+
+def test_solve_walk_and_generate_do_not_import_networkx_or_scipy(tmp_path):
+    assert imported_optional_dependencies(tmp_path, 'solve') == []
+    assert imported_optional_dependencies(tmp_path, 'walk', '--walks', '100') == []
+    assert imported_optional_dependencies(tmp_path, 'generate', '--output', str(tmp_path / 'board.bin')) == []
+    assert imported_optional_dependencies(tmp_path, 'walk', '--walks', '100', '--exact') == ['scipy']
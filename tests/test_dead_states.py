@@ -0,0 +1,34 @@
+import numpy as np
+
+from sacred_grove.dead_states import LiveStateIndex, prune_dead_states
+from sacred_grove.distance_table import UNREACHABLE, DistanceTable
+from sacred_grove.state_graph_format import load_state_graph_with_live_states, save_state_graph
+
+
+def test_live_states_are_the_solvable_states(complete_state_graph, complete_distance_table):
+    live_states = LiveStateIndex.from_state_graph(complete_state_graph)
+    solvable = complete_distance_table.distances != UNREACHABLE
+    assert np.array_equal(live_states.live_mask(), solvable)
+    reused = LiveStateIndex.from_state_graph(complete_state_graph, distance_table=complete_distance_table)
+    assert np.array_equal(reused.live, live_states.live)
+    assert live_states.number_of_live_states < len(complete_state_graph)
+
+
+def test_pruning_keeps_the_distances(complete_state_graph, complete_distance_table):
+    live_states = LiveStateIndex.from_state_graph(complete_state_graph)
+    pruned = prune_dead_states(complete_state_graph, live_states)
+    assert len(pruned) == live_states.number_of_live_states
+    pruned_distances = DistanceTable.from_state_graph(pruned).distances
+    live = complete_distance_table.distances != UNREACHABLE
+    assert np.array_equal(pruned_distances, complete_distance_table.distances[live])
+
+
+def test_live_states_round_trip(tmp_path, state_graph):
+    distance_table = DistanceTable.from_state_graph(state_graph)
+    live_states = LiveStateIndex.from_state_graph(state_graph, distance_table=distance_table)
+    file_name = tmp_path / 'state-graph.bin'
+    save_state_graph(file_name, state_graph, distance_table, live_states=live_states)
+    loaded, loaded_distances, loaded_live_states = load_state_graph_with_live_states(file_name)
+    assert np.array_equal(loaded.states, state_graph.states)
+    assert np.array_equal(loaded_distances.distances, distance_table.distances)
+    assert np.array_equal(loaded_live_states.live, live_states.live)
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.distance_table import DistanceTable, goal_state_mask
+
+
+def test_distance_table_optimum(complete_distance_table):
+    assert complete_distance_table.distance(SACRED_GROVE.start) == 12
+    path = complete_distance_table.solve(SACRED_GROVE.start)
+    assert len(path) == 13
+    assert set(path[-1][1:]) == SACRED_GROVE.goal_tiles
+
+
+def test_distance_table_rejects_states_outside_the_graph(state_graph):
+    distance_table = DistanceTable.from_state_graph(state_graph)
+    # A placement the complete graph solves in 12 moves, but not reachable from the start.
+    assert (5, 13, 9) not in distance_table
+    with pytest.raises(KeyError):
+        distance_table.distance((5, 13, 9))
+    with pytest.raises(KeyError):
+        distance_table.distance((99, 13, 9))
+
+
+def test_reachable_part_of_the_complete_graph(state_graph, complete_state_graph):
+    start_index = complete_state_graph.index_of(complete_state_graph.kernel.pack(*SACRED_GROVE.start))
+    reachable = complete_state_graph.reachable_mask(start_index)
+    assert np.array_equal(complete_state_graph.states[reachable], state_graph.states)
+    solutions = goal_state_mask(complete_state_graph, SACRED_GROVE.goal_tiles)
+    assert (int(solutions.sum()), int((solutions & reachable).sum())) == (38, 24)
@@ -0,0 +1,52 @@
+import pytest
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+# The Sacred Grove baseline: states reachable from the start and the moves between them.
+NUMBER_OF_STATES = 3398
+NUMBER_OF_EDGES = 8950
+
+
+def test_batched_generation_matches_the_baseline(state_graph):
+    assert len(state_graph) == NUMBER_OF_STATES
+    assert state_graph.number_of_edges == NUMBER_OF_EDGES
+
+
+def test_brute_force_generation_matches_the_baseline(generator):
+    state_graph = generator.brute_force_state_graph_generation()
+    assert state_graph.number_of_nodes() == NUMBER_OF_STATES
+    assert state_graph.number_of_edges() == NUMBER_OF_EDGES
+
+
+def test_brute_force_and_batched_generation_agree(generator, state_graph):
+    brute_force = generator.brute_force_state_graph_generation()
+    kernel = state_graph.kernel
+    assert sorted(kernel.pack(*state) for state in brute_force.nodes) == state_graph.states.tolist()
+    edges = {(kernel.pack(*source), kernel.pack(*target)) for source, target in brute_force.edges}
+    assert edges == set(zip(state_graph.states[state_graph.sources].tolist(), state_graph.states[state_graph.targets].tolist()))
+
+
+def test_complete_generation_has_every_placement(complete_state_graph):
+    # 21 tiles for Wolf Link and two statues, all on different tiles.
+    assert len(complete_state_graph) == 21 * 20 * 19
+
+
+def test_brute_force_start_by_keyword(generator):
+    by_position = generator.brute_force_state_graph_generation(2, 13, 9)
+    by_keyword = generator.brute_force_state_graph_generation(wolf_link_position=2, shadow_statue_position=13, mirror_statue_position=9)
+    # Positions left out come from the board's start (11, 13, 9).
+    partial = generator.brute_force_state_graph_generation(wolf_link_position=2)
+    assert set(by_keyword.edges) == set(by_position.edges) == set(partial.edges)
+    with pytest.raises(TypeError):
+        generator.brute_force_state_graph_generation(2, 13, 9, wolf_link_position=2)
+
+
+def test_brute_force_with_three_statues():
+    generator = StateGraphGenerator.from_board(grid_board(5, 5, ('shadow', 'mirror', 'clockwise')))
+    state_graph = generator.brute_force_state_graph_generation(*generator.start)
+    assert generator.start in state_graph
+    assert all(len(state) == 4 for state in state_graph.nodes)
+    assert sorted(generator.kernel.pack(*state) for state in state_graph.nodes) == generator.batched_state_graph_generation().states.tolist()
+    with pytest.raises(TypeError):
+        generator.brute_force_state_graph_generation(wolf_link_position=generator.start[0])
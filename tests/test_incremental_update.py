@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.distance_table import DistanceTable
+from sacred_grove.incremental_update import BoardDelta, update_state_graph
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+DELTAS = {
+    'wall removed': BoardDelta(removed_edges=((12, 13),)),
+    'tile removed': BoardDelta(removed_tiles=(8,)),
+    'tile added': BoardDelta(added_tiles=(30,), added_edges=((6, 30, 'S'),)),
+    'goals moved': BoardDelta(goal_tiles=frozenset({1, 21})),
+}
+
+
+def regenerate(board, complete: bool) -> DistanceTable:
+    generator = StateGraphGenerator.from_board(board)
+    state_graph = generator.complete_state_graph_generation() if complete else generator.batched_state_graph_generation()
+    return DistanceTable.from_state_graph(state_graph, board.goal_tiles)
+
+
+def edge_set(state_graph) -> set[tuple[int, int, int]]:
+    states = state_graph.states
+    return set(zip(states[state_graph.sources].tolist(), states[state_graph.targets].tolist(), state_graph.directions.tolist()))
+
+
+@pytest.mark.parametrize('name', DELTAS)
+def test_complete_update_equals_regeneration(name, complete_distance_table):
+    delta = DELTAS[name]
+    updated = update_state_graph(complete_distance_table, delta, complete=True).distance_table
+    regenerated = regenerate(delta.apply(SACRED_GROVE), complete=True)
+    assert np.array_equal(updated.state_graph.states, regenerated.state_graph.states)
+    assert edge_set(updated.state_graph) == edge_set(regenerated.state_graph)
+    assert np.array_equal(updated.distances, regenerated.distances)
+    assert updated.goal_tiles == regenerated.goal_tiles
+
+
+@pytest.mark.parametrize('name', DELTAS)
+def test_reachable_update_contains_regeneration(name, state_graph):
+    # The update keeps states the start no longer reaches, so the regenerated graph is a part of it.
+    delta = DELTAS[name]
+    updated = update_state_graph(DistanceTable.from_state_graph(state_graph), delta).distance_table
+    regenerated = regenerate(delta.apply(SACRED_GROVE), complete=False)
+    indices = updated.state_graph.indices_of(regenerated.state_graph.states)
+    assert np.all(indices >= 0)
+    assert np.array_equal(updated.distances[indices], regenerated.distances)
+    assert edge_set(regenerated.state_graph) <= edge_set(updated.state_graph)
+    assert updated.distance(SACRED_GROVE.start) == regenerated.distance(SACRED_GROVE.start)
+
+
+def test_update_on_a_grid():
+    board = grid_board(6, 6)
+    middle = 3 * 6 + 3
+    distance_table = regenerate(board, complete=True)
+    for delta in (BoardDelta(removed_edges=((middle, middle + 1),)), BoardDelta(removed_tiles=(middle,))):
+        updated = update_state_graph(distance_table, delta, complete=True).distance_table
+        regenerated = regenerate(delta.apply(board), complete=True)
+        assert edge_set(updated.state_graph) == edge_set(regenerated.state_graph)
+        assert np.array_equal(updated.distances, regenerated.distances)
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.distance_table import UNREACHABLE
+from sacred_grove.optimal_solutions import OptimalSolutions
+from sacred_grove.trajectory import validate_move_sequences
+
+
+@pytest.fixture(scope='module')
+def optimal_solutions(complete_distance_table):
+    return OptimalSolutions(complete_distance_table)
+
+
+def sample_starts(distance_table, number_of_starts: int = 50) -> list[tuple[int, ...]]:
+    return [SACRED_GROVE.start] + random.Random(0).sample(distance_table.state_graph.state_tuples(), number_of_starts)
+
+
+def bounded_solutions(distance_table, start, maximum_moves: int) -> set[str]:
+    # Every solution of at most maximum_moves moves that never revisits a state, by depth-first search.
+    kernel = distance_table.kernel
+    solutions = set()
+
+    def extend(state, moves, visited):
+        if distance_table.distance(state) == 0:
+            solutions.add(moves)
+            return
+        for direction, next_state in kernel.next_states(kernel.pack(*state)):
+            next_state = kernel.unpack(next_state)
+            remaining = distance_table.distance(next_state)
+            if remaining != UNREACHABLE and len(moves) + 1 + remaining <= maximum_moves and next_state not in visited:
+                extend(next_state, moves + 'NSEW'[direction], visited | {next_state})
+
+    extend(start, '', {start})
+    return solutions
+
+
+def test_sacred_grove_solutions(optimal_solutions):
+    assert optimal_solutions.count(SACRED_GROVE.start) == 2
+    assert [solution.moves for solution in optimal_solutions.iterate(SACRED_GROVE.start)] == ['NEWWWSSEEENW', 'SEWWWNNEEESW']
+
+
+def test_count_matches_iterate(optimal_solutions, complete_distance_table):
+    kernel = complete_distance_table.kernel
+    for start in sample_starts(complete_distance_table):
+        solutions = list(optimal_solutions.iterate(start))
+        assert optimal_solutions.count(start) == len(solutions), start
+        moves = [solution.moves for solution in solutions]
+        assert moves == sorted(set(moves), key=lambda sequence: ['NSEW'.index(direction) for direction in sequence])
+        distance = complete_distance_table.distance(start)
+        assert all(solution.number_of_moves == distance for solution in solutions)
+        if solutions:
+            result = validate_move_sequences(kernel, start, moves, SACRED_GROVE.goal_tiles)
+            assert result.solved.all()
+            assert [kernel.unpack(state) for state in result.final_states.tolist()] == [solution.states[-1] for solution in solutions]
+
+
+def test_near_optimal_respects_its_bounds(optimal_solutions, complete_distance_table):
+    for start in sample_starts(complete_distance_table, 10):
+        distance = complete_distance_table.distance(start)
+        if distance == UNREACHABLE:
+            assert list(optimal_solutions.near_optimal(start)) == []
+            continue
+        maximum_moves = distance + 2
+        solutions = list(optimal_solutions.near_optimal(start, maximum_moves=maximum_moves))
+        lengths = [solution.number_of_moves for solution in solutions]
+        assert lengths == sorted(lengths)
+        assert {solution.moves for solution in solutions} == bounded_solutions(complete_distance_table, start, maximum_moves)
+        # The optimal solutions come first.
+        assert lengths.count(distance) == optimal_solutions.count(start)
+        # Ties may come out in another order, the lengths may not.
+        assert [solution.number_of_moves for solution in optimal_solutions.near_optimal(start, k=3)] == lengths[:3]
+        assert list(optimal_solutions.near_optimal(start, maximum_moves=distance - 1)) == []
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from sacred_grove import out_of_core_generation
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.out_of_core_generation import OutOfCoreExploration
+
+FIELDS = ('states', 'offsets', 'targets', 'directions')
+
+
+class Interruption(Exception):
+    pass
+
+
+def interrupt_spill(monkeypatch, after_calls: int) -> None:
+    # Raise from the bitmap update that follows a chunk's spill to the next layer's file.
+    set_bits = out_of_core_generation.set_bits
+    calls = 0
+
+    def interrupted_set_bits(bitset, states):
+        nonlocal calls
+        calls += 1
+        if calls > after_calls:
+            raise Interruption
+        set_bits(bitset, states)
+
+    monkeypatch.setattr(out_of_core_generation, 'set_bits', interrupted_set_bits)
+
+
+def assert_same_graph(first, second):
+    for field in FIELDS:
+        assert np.array_equal(getattr(first, field), getattr(second, field)), field
+
+
+def test_uninterrupted_run_equals_batched_generation(tmp_path, generator, state_graph):
+    exploration = OutOfCoreExploration(generator.kernel, SACRED_GROVE.start, tmp_path, chunk_size=64).run()
+    assert exploration.finished
+    assert exploration.number_of_states() == len(state_graph)
+    assert exploration.number_of_edges() == state_graph.number_of_edges
+    assert_same_graph(exploration.to_compact_state_graph(), state_graph)
+
+
+@pytest.mark.parametrize('after_calls', [3, 25, 60])
+def test_run_resumes_after_an_interrupted_layer(tmp_path, monkeypatch, generator, state_graph, after_calls):
+    with monkeypatch.context() as patch:
+        interrupt_spill(patch, after_calls)
+        with pytest.raises(Interruption):
+            OutOfCoreExploration(generator.kernel, SACRED_GROVE.start, tmp_path, chunk_size=64).run()
+    interrupted = OutOfCoreExploration(generator.kernel, SACRED_GROVE.start, tmp_path, chunk_size=64)
+    assert not interrupted.finished
+    # The layer was cut off after some of its chunks were spilled.
+    assert interrupted.states_file(interrupted.completed_layers + 1).stat().st_size > 0
+    with pytest.raises(RuntimeError):
+        interrupted.to_compact_state_graph()
+    assert_same_graph(interrupted.run().to_compact_state_graph(), state_graph)
+
+
+def test_run_over_several_sessions(tmp_path, generator, state_graph):
+    exploration = OutOfCoreExploration(generator.kernel, SACRED_GROVE.start, tmp_path, chunk_size=64)
+    while not exploration.finished:
+        exploration = OutOfCoreExploration(generator.kernel, SACRED_GROVE.start, tmp_path, chunk_size=64).run(maximum_layers=2)
+    assert_same_graph(exploration.to_compact_state_graph(), state_graph)
+
+
+def test_directory_of_another_start_is_rejected(tmp_path, generator):
+    OutOfCoreExploration(generator.kernel, SACRED_GROVE.start, tmp_path).run(maximum_layers=1)
+    with pytest.raises(ValueError):
+        OutOfCoreExploration(generator.kernel, (12, 13, 9), tmp_path)
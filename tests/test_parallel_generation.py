@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.parallel_generation import parallel_state_graph_generation
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+FIELDS = ('states', 'offsets', 'targets', 'directions')
+
+
+@pytest.mark.parametrize('number_of_workers', [1, 3])
+def test_parallel_generation_is_identical(generator, state_graph, number_of_workers):
+    parallel = parallel_state_graph_generation(generator.kernel, SACRED_GROVE.start, number_of_workers=number_of_workers)
+    for field in FIELDS:
+        assert np.array_equal(getattr(parallel, field), getattr(state_graph, field)), field
+
+
+def test_parallel_generation_with_three_statues():
+    generator = StateGraphGenerator.from_board(grid_board(5, 5, ('shadow', 'mirror', 'clockwise')))
+    parallel = parallel_state_graph_generation(generator.kernel, generator.start, number_of_workers=2)
+    batched = generator.batched_state_graph_generation()
+    for field in FIELDS:
+        assert np.array_equal(getattr(parallel, field), getattr(batched, field)), field
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.columnar_store import ColumnarWriter, read_columns, read_schema
+from sacred_grove.puzzle_scanner import board_summaries, move_goals, reachable_state_counts, scan_boards
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+
+@pytest.mark.parametrize('board', [grid_board(3, 4), grid_board(4, 4)], ids=lambda board: board.name)
+def test_reachable_state_counts_match_a_search_per_start(board):
+    state_graph = StateGraphGenerator.from_board(board).complete_state_graph_generation()
+    counts = reachable_state_counts(state_graph)
+    expected = [int(state_graph.reachable_mask(index).sum()) for index in range(len(state_graph))]
+    assert counts.tolist() == expected
+
+
+def test_reachable_state_count_of_the_sacred_grove(complete_state_graph):
+    counts = reachable_state_counts(complete_state_graph)
+    assert counts[complete_state_graph.index_of(complete_state_graph.kernel.pack(*SACRED_GROVE.start))] == 3398
+
+
+def test_columnar_round_trip(tmp_path):
+    columns = {'board': np.int32, 'position': np.int16, 'count': np.int64}
+    chunks = [
+        {'board': [0, 0, 1], 'position': [5, 15, 9], 'count': [2**40, 7, -1]},
+        {'board': [], 'position': [], 'count': []},
+        {'board': [2], 'position': [-3], 'count': [0]},
+    ]
+    with ColumnarWriter(tmp_path, columns, metadata={'boards': 3}) as writer:
+        for chunk in chunks:
+            writer.append(chunk)
+        with pytest.raises(ValueError):
+            writer.append({'board': [1], 'position': [1]})
+        with pytest.raises(ValueError):
+            writer.append({'board': [1], 'position': [1, 2], 'count': [1]})
+    schema = read_schema(tmp_path)
+    assert schema['rows'] == 4
+    assert schema['metadata'] == {'boards': 3}
+    assert [column['name'] for column in schema['columns']] == list(columns)
+    read = read_columns(tmp_path)
+    for name, dtype in columns.items():
+        assert read[name].dtype == dtype
+        assert read[name].tolist() == sum((list(chunk[name]) for chunk in chunks), [])
+    assert list(read_columns(tmp_path, names=['count'])) == ['count']
+
+
+def test_empty_columnar_table(tmp_path):
+    with ColumnarWriter(tmp_path, {'board': np.int32}):
+        pass
+    assert read_columns(tmp_path)['board'].tolist() == []
+
+
+def test_scan_boards(tmp_path):
+    boards = [SACRED_GROVE, move_goals(SACRED_GROVE, {1, 21}, name='goals on 1 and 21')]
+    rows = scan_boards(boards, tmp_path, number_of_workers=1)
+    assert rows == 2 * 21 * 20 * 19
+    columns = read_columns(tmp_path)
+    starts = np.column_stack([columns[name] for name in SACRED_GROVE.kernel().position_names])
+    row = np.flatnonzero((columns['board'] == 0) & np.all(starts == SACRED_GROVE.start, axis=1))
+    assert columns['optimal_moves'][row].tolist() == [12]
+    assert columns['optimal_solutions'][row].tolist() == [2]
+    assert columns['reachable_states'][row].tolist() == [3398]
+    summaries = board_summaries(tmp_path)
+    assert [summary['starts'] for summary in summaries] == [21 * 20 * 19] * 2
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.distance_table import UNREACHABLE
+from sacred_grove.moving_characters import Statue, WolfLink
+from sacred_grove.search import Search
+
+SEARCHES = ('astar_search', 'bidirectional_search', 'ida_star_search')
+
+
+def new_search(start) -> Search:
+    wolf_link_position, shadow_statue_position, mirror_statue_position = start
+    return Search(SACRED_GROVE.tile_graph(), WolfLink(position=wolf_link_position), Statue(position=mirror_statue_position, pattern='mirror'),
+                  Statue(position=shadow_statue_position, pattern='shadow'), goal_tiles=SACRED_GROVE.goal_tiles)
+
+
+def solvable_starts(complete_distance_table, number_of_starts: int = 25) -> list[tuple[int, ...]]:
+    state_graph = complete_distance_table.state_graph
+    states = [state_graph.kernel.unpack(state) for state in state_graph.states.tolist()]
+    starts = [state for state in states if complete_distance_table.distance(state) != UNREACHABLE]
+    return [SACRED_GROVE.start] + random.Random(0).sample(starts, number_of_starts)
+
+
+@pytest.mark.parametrize('method', SEARCHES)
+def test_search_lengths_match_the_distance_table(method, complete_distance_table):
+    kernel = complete_distance_table.state_graph.kernel
+    for start in solvable_starts(complete_distance_table):
+        result = getattr(new_search(start), method)()
+        assert result.number_of_moves == complete_distance_table.distance(start), start
+        # Every step of the path is a move of Wolf Link, and the path ends on the goal tiles.
+        assert result.path[0] == start
+        for state, next_state in zip(result.path, result.path[1:]):
+            assert kernel.pack(*next_state) in {successor for _, successor in kernel.next_states(kernel.pack(*state))}
+        assert set(result.path[-1][1:]) == SACRED_GROVE.goal_tiles
+
+
+def test_ida_star_with_a_tiny_transposition_table(complete_distance_table):
+    # Collisions in a table of a few entries must not make the learned bounds inadmissible.
+    for start in solvable_starts(complete_distance_table):
+        result = new_search(start).ida_star_search(memory_budget=200)
+        assert result.number_of_moves == complete_distance_table.distance(start), start
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+
+from sacred_grove.solver_daemon import SolverClient, SolverService, start_server
+
+
+@pytest.fixture(scope='module')
+def service(complete_distance_table):
+    return SolverService(complete_distance_table)
+
+
+@pytest.mark.parametrize('request_, message', [
+    ([11, 13, 9], "requests must be JSON objects"),
+    ({'method': 'teleport', 'state': [11, 13, 9]}, "unknown method"),
+    ({'method': 'distance'}, "needs a 'state' or a 'states' field"),
+    ({'method': 'distance', 'state': [11.5, 13, 9]}, "integer tile labels"),
+    ({'method': 'distance', 'state': [True, 13, 9]}, "integer tile labels"),
+    ({'method': 'distance', 'state': ['11', 13, 9]}, "integer tile labels"),
+    ({'method': 'distance', 'state': 11}, "not iterable"),
+    ({'method': 'distance', 'state': [11, 13]}, "3 positions"),
+    ({'method': 'solve', 'state': [99, 13, 9]}, "tiles of the board"),
+    ({'method': 'next_move', 'states': [[11, 13, 9], [11, 13]]}, "3 positions"),
+    ({'method': 'next_move', 'state': [5, 5, 9]}, "not a state of this state graph"),
+    ({'method': 'distance', 'states': [[11, 13, 9], [5, 5, 9]]}, "not a state of this state graph"),
+])
+def test_malformed_requests_get_an_error(service, request_, message):
+    response = service.handle(request_)
+    assert 'result' not in response
+    assert message in response['error']
+
+
+def test_requests(service):
+    assert service.handle({'id': 1, 'method': 'distance', 'state': [11, 13, 9]}) == {'id': 1, 'result': 12}
+    assert service.handle({'id': 2, 'method': 'distance', 'state': [5, 13, 9]})['result'] == 12
+    assert service.handle({'id': 3, 'method': 'distance', 'states': []}) == {'id': 3, 'result': []}
+    assert len(service.handle({'id': 4, 'method': 'solve', 'state': [11, 13, 9]})['result']) == 13
+    batch = service.handle({'id': 5, 'method': 'next_move', 'states': [[11, 13, 9], [12, 13, 9]]})['result']
+    assert batch == [service.next_move((11, 13, 9)), service.next_move((12, 13, 9))]
+
+
+def test_connection_survives_bad_lines(service):
+    async def exchange():
+        server = await start_server(service)
+        port = server.sockets[0].getsockname()[1]
+        client = await SolverClient.connect(port=port)
+        try:
+            client.writer.write(b'not json\n')
+            await client.writer.drain()
+            invalid = json.loads(await client.reader.readline())
+            with pytest.raises(ValueError, match="not a state"):
+                await client.request('distance', state=[5, 5, 9])
+            return invalid, await client.request('distance', state=[11, 13, 9])
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+
+    invalid, distance = asyncio.run(exchange())
+    assert invalid['error'].startswith("invalid JSON")
+    assert distance == 12
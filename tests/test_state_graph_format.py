@@ -0,0 +1,42 @@
+import numpy as np
+
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.distance_table import DistanceTable
+from sacred_grove.state_graph_format import binary_to_graphml, graphml_to_binary, load_state_graph, save_state_graph
+
+FIELDS = ('states', 'offsets', 'targets', 'directions')
+
+
+def assert_same_graph(first, second):
+    for field in FIELDS:
+        assert np.array_equal(getattr(first, field), getattr(second, field)), field
+
+
+def test_binary_round_trip(tmp_path, state_graph):
+    distance_table = DistanceTable.from_state_graph(state_graph)
+    file_name = tmp_path / 'state-graph.bin'
+    save_state_graph(file_name, state_graph, distance_table)
+    loaded, loaded_distances = load_state_graph(file_name)
+    assert_same_graph(loaded, state_graph)
+    assert np.array_equal(loaded_distances.distances, distance_table.distances)
+    assert loaded_distances.goal_tiles == distance_table.goal_tiles
+
+
+def test_binary_round_trip_without_distances(tmp_path, state_graph):
+    file_name = tmp_path / 'state-graph.bin'
+    save_state_graph(file_name, state_graph)
+    loaded, distance_table = load_state_graph(file_name)
+    assert_same_graph(loaded, state_graph)
+    assert distance_table is None
+
+
+def test_graphml_round_trip(tmp_path, state_graph):
+    binary_file, graphml_file = tmp_path / 'state-graph.bin', tmp_path / 'state-graph.graphml'
+    save_state_graph(binary_file, state_graph)
+    binary_to_graphml(binary_file, graphml_file)
+    converted = graphml_to_binary(graphml_file, tmp_path / 'converted.bin', SACRED_GROVE.tile_graph())
+    # The CSR rows may come back in another order, the edges are the same.
+    assert np.array_equal(converted.states, state_graph.states)
+    assert np.array_equal(converted.offsets, state_graph.offsets)
+    edges = lambda graph: sorted(zip(graph.sources.tolist(), graph.targets.tolist(), graph.directions.tolist()))
+    assert edges(converted) == edges(state_graph)
@@ -0,0 +1,43 @@
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.successor_cache import SuccessorCache
+
+
+def states_of_one_set(cache, number_of_states):
+    # Packed states that hash to the same set as the first one, in increasing order.
+    first = cache._first_slot(0)
+    return [state for state in range(cache.kernel.number_of_states) if cache._first_slot(state) == first][:number_of_states]
+
+
+def test_answers_like_the_kernel(state_graph):
+    kernel = state_graph.kernel
+    cache = SuccessorCache(kernel, 64)
+    for state in state_graph.states.tolist():
+        for _ in range(2):
+            assert cache.next_states(state) == kernel.next_states(state)
+    assert cache.hits and cache.misses
+    assert len(cache) <= cache.capacity
+
+
+def test_clock_gives_referenced_entries_a_second_chance():
+    cache = SuccessorCache(SACRED_GROVE.kernel(), SuccessorCache.WAYS * 8)
+    first, second, third, fourth, fifth, sixth = states_of_one_set(cache, SuccessorCache.WAYS + 2)
+    for state in (first, second, third, fourth):
+        cache.successors(state)
+    # A full set with every entry referenced: the hand clears them all, then replaces the first slot.
+    cache.successors(fifth)
+    assert first not in cache and cache.evictions == 1
+    # `second` is used again, so it survives the next eviction and `third`, unreferenced, goes instead.
+    cache.successors(second)
+    cache.successors(sixth)
+    assert second in cache and third not in cache
+    assert all(state in cache for state in (fourth, fifth, sixth))
+    assert cache.evictions == 2
+
+
+def test_frozen_cache_does_not_store():
+    board = grid_board(5, 5, ('shadow', 'mirror', 'clockwise'))
+    kernel = board.kernel()
+    cache = SuccessorCache(kernel, 16).freeze()
+    state = kernel.pack(*board.start)
+    assert cache.next_states(state) == kernel.next_states(state)
+    assert state not in cache and len(cache) == 0
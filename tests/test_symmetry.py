@@ -0,0 +1,53 @@
+import random
+
+import numpy as np
+import pytest
+
+from sacred_grove.board import SACRED_GROVE, grid_board
+from sacred_grove.distance_table import UNREACHABLE, DistanceTable
+from sacred_grove.state_graph_generation import StateGraphGenerator
+
+BOARDS = [SACRED_GROVE, grid_board(5, 5)]
+
+
+@pytest.fixture(scope='module', params=BOARDS, ids=lambda board: board.name)
+def board_graphs(request):
+    board = request.param
+    generator = StateGraphGenerator.from_board(board)
+    full = DistanceTable.from_state_graph(generator.complete_state_graph_generation(), board.goal_tiles)
+    quotient = generator.symmetric_state_graph_generation(goal_tiles=board.goal_tiles, complete=True)
+    return board, full, quotient
+
+
+def test_quotient_distances_equal_full_distances(board_graphs):
+    board, full, quotient = board_graphs
+    assert len(quotient.symmetry_group) > 1
+    states = full.state_graph.states
+    classes = quotient.state_graph.indices_of(quotient.symmetry_group.canonicalize(states))
+    assert np.all(classes >= 0)
+    assert np.array_equal(quotient.distance_table(board.goal_tiles).distances[classes], full.distances)
+
+
+def test_lifted_solutions_are_optimal_paths(board_graphs):
+    board, full, quotient = board_graphs
+    kernel = full.state_graph.kernel
+    distance_table = quotient.distance_table(board.goal_tiles)
+    states = full.state_graph.state_tuples()
+    for start in random.Random(0).sample(states, 200):
+        path = quotient.solve(start, distance_table)
+        if full.distance(start) == UNREACHABLE:
+            assert path is None
+            continue
+        assert path[0] == start
+        assert len(path) - 1 == full.distance(start)
+        for state, next_state in zip(path, path[1:]):
+            assert kernel.pack(*next_state) in {successor for _, successor in kernel.next_states(kernel.pack(*state))}
+        assert set(path[-1][1:]) <= board.goal_tiles
+
+
+def test_quotient_from_the_start(board_graphs):
+    board, full, _ = board_graphs
+    generator = StateGraphGenerator.from_board(board)
+    quotient = generator.symmetric_state_graph_generation(goal_tiles=board.goal_tiles)
+    path = quotient.solve(board.start, quotient.distance_table(board.goal_tiles))
+    assert len(path) - 1 == full.distance(board.start)
@@ -0,0 +1,59 @@
+import numpy as np
+
+from sacred_grove.board import SACRED_GROVE
+from sacred_grove.trajectory import NO_ILLEGAL_STEP, PositionHistory, Trajectory, validate_move_sequences
+
+
+def test_validate_move_sequences():
+    kernel = SACRED_GROVE.kernel()
+    sequences = [
+        'NEWWWSSEEENW',  # an optimal solution
+        'SEWWWNNEEESW',  # the other one
+        'NEWW',          # legal, but not a solution
+        '',
+        'W',             # the mirror statue cannot move west of the start, so neither can Wolf Link
+        'EE',            # blocked on the second move
+        'NXW',           # not a direction
+        'nE',            # directions are upper case
+    ]
+    result = validate_move_sequences(kernel, SACRED_GROVE.start, sequences, SACRED_GROVE.goal_tiles)
+    assert len(result) == len(sequences)
+    assert result.legal.tolist() == [True, True, True, True, False, False, False, False]
+    assert result.solved.tolist() == [True, True, False, False, False, False, False, False]
+    assert result.first_illegal_step.tolist() == [NO_ILLEGAL_STEP] * 4 + [0, 1, 1, 0]
+    # Sequences stop in the state before their first illegal move.
+    final_states = [kernel.unpack(state) for state in result.final_states.tolist()]
+    assert final_states[3] == final_states[4] == final_states[7] == SACRED_GROVE.start
+    assert final_states[5] == (12, 13, 9)
+    assert set(final_states[0][1:]) == SACRED_GROVE.goal_tiles
+
+
+def test_validate_no_sequences():
+    result = validate_move_sequences(SACRED_GROVE.kernel(), SACRED_GROVE.start, [])
+    assert len(result) == 0
+
+
+def test_position_history_behaves_like_a_list():
+    history = PositionHistory([11, 12], capacity=2)
+    for position in range(13, 40):
+        history.append(position)
+    positions = list(range(11, 40))
+    assert history == positions
+    assert history == PositionHistory(positions)
+    assert history != positions[:-1]
+    assert history != positions[:-1] + [0]
+    assert len(history) == len(positions)
+    assert history[0] == 11 and history[-1] == 39 and history[2:5] == [13, 14, 15]
+    assert list(history) == positions
+    assert np.array_equal(history.array, positions)
+    assert PositionHistory() == []
+
+
+def test_trajectory_from_states():
+    # East, then west: Wolf Link is back, the statues moved.
+    trajectory = Trajectory.from_states([(11, 13, 9), (12, 13, 9)])
+    trajectory.append((11, 12, 10))
+    assert list(trajectory) == [(11, 13, 9), (12, 13, 9), (11, 12, 10)]
+    assert trajectory.number_of_moves == 2
+    assert trajectory[1] == (12, 13, 9)
+    assert trajectory.states.shape == (3, 3)